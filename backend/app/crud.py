@@ -1,12 +1,21 @@
 """Database CRUD operations for basketball analysis."""
 
+import io
+import json
+import time
+from itertools import islice
+from sqlalchemy import JSON, insert
 from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator
 from datetime import datetime
 from . import db_models
 from .models import VideoAnalysisResult, ShotAttempt, PossessionEvent, PlayerStats
 
 
+# Rows per executemany / COPY round trip when storing analysis results
+BULK_CHUNK_SIZE = 5000
+
+
 # Analysis CRUD operations (existing)
 
 
@@ -38,12 +47,60 @@ def get_analyses(db: Session, skip: int = 0, limit: int = 100) -> List[db_models
     return db.query(db_models.Analysis).offset(skip).limit(limit).all()
 
 
-def update_analysis_results(db: Session, analysis_id: str, results: VideoAnalysisResult) -> Optional[db_models.Analysis]:
-    """Update analysis with complete results."""
+def update_analysis_results(db: Session, analysis_id: str, results: VideoAnalysisResult,
+                            bulk: bool = True, frame_data: Optional[Iterable[Dict[str, Any]]] = None,
+                            chunk_size: int = BULK_CHUNK_SIZE) -> Optional[db_models.Analysis]:
+    """
+    Update analysis with complete results.
+    
+    Args:
+        db: Database session
+        analysis_id: Analysis ID
+        results: Complete analysis results
+        bulk: Store detail rows with Core bulk inserts in a single transaction
+            (``COPY`` on PostgreSQL) instead of one ORM object per row
+        frame_data: Optional frame summaries to store instead of
+            ``results.frame_by_frame_data`` (e.g. read back from a frame store)
+        chunk_size: Rows per bulk insert round trip
+        
+    Returns:
+        Updated analysis or None if it does not exist
+    """
     db_analysis = get_analysis(db, analysis_id)
     if not db_analysis:
         return None
     
+    frames = results.frame_by_frame_data if frame_data is None else frame_data
+    
+    if bulk:
+        try:
+            _apply_analysis_results(db_analysis, results)
+            report = bulk_store_analysis_rows(db, analysis_id, results, frames, chunk_size=chunk_size)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        
+        print(f"Stored {report['total_rows']} rows for analysis {analysis_id} "
+              f"in {report['seconds']:.2f}s ({report['rows_per_second']:.0f} rows/sec)")
+        db.refresh(db_analysis)
+        return db_analysis
+    
+    _apply_analysis_results(db_analysis, results)
+    db.commit()
+    
+    # Store detailed data
+    _store_player_stats(db, analysis_id, results.game_statistics.player_stats if results.game_statistics else {})
+    _store_shots(db, analysis_id, results.shot_attempts or [])
+    _store_possessions(db, analysis_id, results.possession_events or [])
+    _store_frame_data(db, analysis_id, frames)
+    
+    db.refresh(db_analysis)
+    return db_analysis
+
+
+def _apply_analysis_results(db_analysis: db_models.Analysis, results: VideoAnalysisResult):
+    """Copy metadata and summary fields of the results onto the analysis record."""
     # Update video metadata
     video_metadata = results.video_metadata
     db_analysis.fps = video_metadata.fps
@@ -67,17 +124,75 @@ def update_analysis_results(db: Session, analysis_id: str, results: VideoAnalysi
     # Update status
     db_analysis.status = "completed"
     db_analysis.completed_at = datetime.utcnow()
+
+
+def bulk_store_analysis_rows(db: Session, analysis_id: str, results: VideoAnalysisResult,
+                             frame_data: Optional[Iterable[Dict[str, Any]]] = None,
+                             chunk_size: int = BULK_CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Insert players, shots, possessions and frame data for an analysis in bulk.
     
-    db.commit()
+    Rows are built as plain dicts and sent in chunks with Core ``insert()``
+    executemany, or ``COPY ... FROM STDIN`` when the session is bound to
+    PostgreSQL. Nothing is committed; the caller owns the transaction.
     
-    # Store detailed data
-    _store_player_stats(db, analysis_id, results.game_statistics.player_stats if results.game_statistics else {})
-    _store_shots(db, analysis_id, results.shot_attempts or [])
-    _store_possessions(db, analysis_id, results.possession_events or [])
-    _store_frame_data(db, analysis_id, results.frame_by_frame_data)
+    Args:
+        db: Database session
+        analysis_id: Analysis ID
+        results: Complete analysis results
+        frame_data: Frame summaries (defaults to ``results.frame_by_frame_data``)
+        chunk_size: Rows per round trip
+        
+    Returns:
+        Report with per-table row counts, ``total_rows``, ``seconds`` and
+        ``rows_per_second``
+    """
+    start_time = time.perf_counter()
+    player_stats = results.game_statistics.player_stats if results.game_statistics else {}
+    frames = results.frame_by_frame_data if frame_data is None else frame_data
     
-    db.refresh(db_analysis)
-    return db_analysis
+    rows = {
+        'players': _bulk_insert(db, db_models.Player, _player_rows(analysis_id, player_stats), chunk_size),
+        'shots': _bulk_insert(db, db_models.Shot, _shot_rows(analysis_id, results.shot_attempts or []), chunk_size),
+        'possessions': _bulk_insert(db, db_models.Possession,
+                                    _possession_rows(analysis_id, results.possession_events or []), chunk_size),
+        'frame_data': _bulk_insert(db, db_models.FrameData, _frame_rows(analysis_id, frames), chunk_size),
+    }
+    
+    seconds = time.perf_counter() - start_time
+    total_rows = sum(rows.values())
+    return {
+        'rows': rows,
+        'total_rows': total_rows,
+        'seconds': seconds,
+        'rows_per_second': total_rows / seconds if seconds > 0 else 0.0,
+    }
+
+
+def update_analysis_progress(db: Session, analysis_id: str, frames_processed: int,
+                             total_frames: Optional[int] = None) -> bool:
+    """
+    Record how many frames of an analysis have been processed so far.
+    
+    Args:
+        db: Database session
+        analysis_id: Analysis ID
+        frames_processed: Frames processed so far
+        total_frames: Total frame count (stored when given)
+        
+    Returns:
+        Whether the analysis exists
+    """
+    values = {'frames_processed': frames_processed}
+    if total_frames:
+        values['total_frames'] = total_frames
+    
+    # Single UPDATE statement, no need to load the row on every tick
+    updated = db.query(db_models.Analysis).filter(
+        db_models.Analysis.id == analysis_id
+    ).update(values, synchronize_session=False)
+    db.commit()
+    return updated > 0
 
 
 def update_analysis_error(db: Session, analysis_id: str, error_message: str) -> Optional[db_models.Analysis]:
@@ -175,7 +290,7 @@ def _store_possessions(db: Session, analysis_id: str, possessions: List[Possessi
     db.commit()
 
 
-def _store_frame_data(db: Session, analysis_id: str, frame_data: List[Dict[str, Any]]):
+def _store_frame_data(db: Session, analysis_id: str, frame_data: Iterable[Dict[str, Any]]):
     """Store frame-by-frame data."""
     for frame in frame_data:
         db_frame = db_models.FrameData(
@@ -191,6 +306,147 @@ def _store_frame_data(db: Session, analysis_id: str, frame_data: List[Dict[str,
     db.commit()
 
 
+def _player_rows(analysis_id: str, player_stats: Dict[int, PlayerStats]) -> Iterator[Dict[str, Any]]:
+    """Player table rows for bulk insertion."""
+    for track_id, stats in player_stats.items():
+        yield {
+            'analysis_id': analysis_id,
+            'track_id': track_id,
+            'shots_attempted': stats.shots_attempted,
+            'shots_made': stats.shots_made,
+            'field_goal_percentage': stats.field_goal_percentage,
+            'three_point_attempts': stats.three_point_attempts,
+            'three_point_made': stats.three_point_made,
+            'three_point_percentage': stats.three_point_percentage,
+            'possessions': stats.possessions,
+            'total_possession_time': stats.total_possession_time,
+            'avg_possession_time': stats.avg_possession_time,
+            'distance_covered': stats.distance_covered,
+            'time_in_zones': stats.time_in_zones
+        }
+
+
+def _shot_rows(analysis_id: str, shots: List[ShotAttempt]) -> Iterator[Dict[str, Any]]:
+    """Shot table rows for bulk insertion."""
+    for shot in shots:
+        yield {
+            'analysis_id': analysis_id,
+            'timestamp': shot.timestamp,
+            'frame_id': shot.frame_id,
+            'shooter_id': shot.shooter_id,
+            'shot_position_x': shot.shot_position[0],
+            'shot_position_y': shot.shot_position[1],
+            'shot_zone': shot.shot_zone,
+            'confidence': shot.confidence,
+            'made': shot.made,
+            'shot_value': shot.shot_value,
+            'trajectory': shot.trajectory
+        }
+
+
+def _possession_rows(analysis_id: str, possessions: List[PossessionEvent]) -> Iterator[Dict[str, Any]]:
+    """Possession table rows for bulk insertion."""
+    for possession in possessions:
+        yield {
+            'analysis_id': analysis_id,
+            'timestamp': possession.timestamp,
+            'frame_id': possession.frame_id,
+            'player_id': possession.player_id,
+            'previous_player_id': possession.previous_player_id,
+            'ball_position_x': possession.ball_position[0],
+            'ball_position_y': possession.ball_position[1],
+            'duration': possession.duration
+        }
+
+
+def _frame_rows(analysis_id: str, frame_data: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Frame data table rows for bulk insertion."""
+    for frame in frame_data:
+        yield {
+            'analysis_id': analysis_id,
+            'frame_id': frame.get('frame_id', 0),
+            'timestamp': frame.get('timestamp', 0.0),
+            'detections': frame.get('detections'),
+            'tracking_data': frame.get('tracking_data'),
+            'events': frame.get('events'),
+            'ball_analysis': frame.get('ball_analysis')
+        }
+
+
+def _bulk_insert(db: Session, model, rows: Iterable[Dict[str, Any]], chunk_size: int) -> int:
+    """
+    Insert rows into a model's table in chunks without creating ORM objects.
+    
+    Args:
+        db: Database session (the transaction is left open)
+        model: ORM model class
+        rows: Row dicts with identical keys
+        chunk_size: Rows per round trip
+        
+    Returns:
+        Number of rows inserted
+    """
+    table = model.__table__
+    use_copy = db.get_bind().dialect.name == "postgresql"
+    rows = iter(rows)
+    total = 0
+    
+    while True:
+        chunk = list(islice(rows, max(1, chunk_size)))
+        if not chunk:
+            break
+        if not (use_copy and _copy_rows(db, table, chunk)):
+            db.execute(insert(table), chunk)
+        total += len(chunk)
+    
+    return total
+
+
+def _copy_rows(db: Session, table, chunk: List[Dict[str, Any]]) -> bool:
+    """
+    Stream a chunk into PostgreSQL with ``COPY ... FROM STDIN``.
+    
+    Returns:
+        False if the DBAPI driver does not support ``copy_expert`` (the
+        caller then falls back to executemany)
+    """
+    cursor = db.connection().connection.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        cursor.close()
+        return False
+    
+    columns = list(chunk[0].keys())
+    json_columns = {name for name in columns if isinstance(table.c[name].type, JSON)}
+    
+    # In CSV format only an unquoted empty field is NULL, so quoting every
+    # value keeps any string (including an empty one) from being read as NULL
+    buffer = io.StringIO()
+    for row in chunk:
+        buffer.write(",".join(
+            _csv_field(json.dumps(row[name]) if name in json_columns and row[name] is not None
+                       else row[name])
+            for name in columns
+        ))
+        buffer.write("\n")
+    buffer.seek(0)
+    
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer
+        )
+    finally:
+        cursor.close()
+    return True
+
+
+def _csv_field(value: Any) -> str:
+    """A ``COPY`` CSV field: NULL as an unquoted empty field, anything else quoted."""
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
 def update_analysis_status(db: Session, analysis_id: str, status: str) -> Optional[db_models.Analysis]:
     """Update analysis status."""
     db_analysis = get_analysis(db, analysis_id)
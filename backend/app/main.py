@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException, BackgroundTasks, File, UploadFile, Depends, Form
 from fastapi.responses import FileResponse
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
@@ -8,16 +9,23 @@ from typing import Optional
 import tempfile
 import uuid
 import os
+import shutil
+import threading
+import numpy as np
 import sys
 import redis
 from rq import Queue
-from rq.job import Job
+from rq.job import Job, JobStatus
+from rq.exceptions import NoSuchJobError
 from contextlib import asynccontextmanager
 
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent.parent))
 
 from vision.processor import BasketballVideoProcessor
+from vision.frame_store import FrameStore, frame_store_dir
+from vision.render import render_analysis_video, render_cache_dir, render_cache_path
+from vision.backends import BACKENDS
 from .models import (
     AnalysisRequest, 
     AnalysisResponse, 
@@ -71,16 +79,66 @@ frontend_path = Path(__file__).parent.parent.parent / "frontend"
 if frontend_path.exists():
     app.mount("/dashboard", StaticFiles(directory=str(frontend_path), html=True), name="dashboard")
 
-# Global processor instance
+# Detector weights and the video sampled to calibrate onnx-int8
+MODEL_PATH = os.getenv("MODEL_PATH", "yolov8n.pt")
+CALIBRATION_VIDEO = os.getenv("CALIBRATION_VIDEO") or None
+
+# Processor instances, one per inference backend, created on first use;
+# ``processor`` is the most recently used one. A processor keeps per-video
+# state (tracker, analytics, totals), so each one analyzes a single video
+# at a time under its lock in ``processor_locks``.
 processor = None
+processors = {}
+processor_locks = {}
+processors_lock = threading.Lock()
 
-def get_processor():
-    """Get or create basketball processor instance."""
+def get_processor(backend: str = 'torch'):
+    """
+    Get or create the basketball processor for an inference backend.
+    
+    Creating an exported backend may export (and for ``onnx-int8``
+    quantize) the model, so call this off the event loop.
+    """
     global processor
-    if processor is None:
-        processor = BasketballVideoProcessor()
+    with processors_lock:
+        if backend not in processors:
+            processors[backend] = BasketballVideoProcessor(
+                model_path=MODEL_PATH,
+                backend=backend,
+                calibration_video=CALIBRATION_VIDEO
+            )
+            processor_locks[backend] = threading.Lock()
+        processor = processors[backend]
     return processor
 
+def analyze_with_processor(request: AnalysisRequest) -> dict:
+    """
+    Run a video analysis on the shared processor for its backend.
+    
+    Blocks until no other analysis uses that processor, so requests never
+    share tracker state or overwrite each other's confidence threshold.
+    Call this off the event loop.
+    
+    Args:
+        request: Analysis request parameters
+        
+    Returns:
+        Complete processing results
+    """
+    video_processor = get_processor(request.inference_backend)
+    with processor_locks[request.inference_backend]:
+        # Set confidence threshold if different
+        if request.confidence_threshold != video_processor.detector.confidence_threshold:
+            video_processor.detector.confidence_threshold = request.confidence_threshold
+        
+        return video_processor.process_video(
+            video_path=request.video_path,
+            output_video_path=request.output_video_path,
+            output_json_path=request.output_json_path,
+            visualize=request.visualize,
+            save_frames=request.save_frames
+        )
+
 @app.get("/")
 async def read_root():
     """Redirect to dashboard."""
@@ -172,7 +230,9 @@ async def get_job_status(job_id: str):
             "ended_at": job.ended_at.isoformat() if job.ended_at else None,
             "result": job.result,
             "exc_info": job.exc_info,
-            "progress": getattr(job.meta, 'progress', 0) if hasattr(job, 'meta') else 0
+            "progress": job.meta.get('progress', 0) if job.meta else 0,
+            "frames_processed": job.meta.get('frames_processed', 0) if job.meta else 0,
+            "total_frames": job.meta.get('total_frames', 0) if job.meta else 0
         }
         
         return result
@@ -186,7 +246,9 @@ async def upload_video_with_queue(
     file: UploadFile = File(...),
     confidence_threshold: float = 0.25,
     visualize: bool = True,
-    save_frames: bool = False
+    save_frames: bool = False,
+    inference_backend: str = 'torch',
+    frame_store: bool = False
 ):
     """
     Upload video and queue for processing with enhanced validation.
@@ -196,6 +258,10 @@ async def upload_video_with_queue(
         confidence_threshold: Detection confidence threshold
         visualize: Create visualized output video
         save_frames: Save individual analyzed frames
+        inference_backend: Detector inference backend (``torch``, ``onnx``,
+            ``openvino`` or ``onnx-int8``)
+        frame_store: Stream frame summaries to a columnar frame store instead
+            of keeping them in memory; needed for ``/analyze/{id}/video``
         
     Returns:
         Job ID for tracking processing status
@@ -210,6 +276,9 @@ async def upload_video_with_queue(
     if file.content_type not in allowed_types:
         raise HTTPException(status_code=415, detail=f"Invalid file type. Allowed: {', '.join(allowed_types)}")
     
+    if inference_backend not in BACKENDS:
+        raise HTTPException(status_code=422, detail=f"Invalid inference backend. Allowed: {', '.join(BACKENDS)}")
+    
     try:
         # Create temporary file
         with tempfile.NamedTemporaryFile(delete=False, suffix='.mp4') as temp_file:
@@ -239,8 +308,13 @@ async def upload_video_with_queue(
                 'confidence_threshold': confidence_threshold,
                 'visualize': visualize,
                 'save_frames': save_frames,
+                'inference_backend': inference_backend,
+                'model_path': MODEL_PATH,
+                'calibration_video': CALIBRATION_VIDEO,
                 'output_video_path': None,
-                'output_json_path': None
+                'output_json_path': None,
+                # Annotated video can then be rendered on demand from the store
+                'frame_store': frame_store
             }
             
             job = job_queue.enqueue(
@@ -268,7 +342,8 @@ async def upload_video_with_queue(
                     video_path=temp_video_path,
                     confidence_threshold=confidence_threshold,
                     visualize=visualize,
-                    save_frames=save_frames
+                    save_frames=save_frames,
+                    inference_backend=inference_backend
                 ),
                 db
             )
@@ -410,6 +485,77 @@ async def download_analysis_json(analysis_id: str, db: Session = Depends(get_db)
         filename=f"basketball_analysis_{analysis_id}.json"
     )
 
+@app.get("/analyze/{analysis_id}/video")
+async def get_annotated_video(
+    analysis_id: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Get the annotated video of an analysis, optionally for a time range.
+    
+    Overlays are drawn from the stored frame data on first request and the
+    clip is cached; with Redis available the rendering is queued and the
+    job ID returned, so poll ``/jobs/{job_id}`` and request the clip again.
+    Requests for a clip that is already being rendered return that job.
+    
+    Args:
+        analysis_id: Analysis ID
+        start: Clip start in seconds (defaults to the start of the video)
+        end: Clip end in seconds (defaults to the end of the video)
+        db: Database session
+        
+    Returns:
+        The MP4 clip, or the render job when it was queued
+    """
+    db_analysis = crud.get_analysis(db, analysis_id)
+    if not db_analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    if start is not None and end is not None and start >= end:
+        raise HTTPException(status_code=422, detail="start must be before end")
+    
+    filename = f"basketball_analysis_{analysis_id}.mp4"
+    cached_path = render_cache_path(analysis_id, start, end)
+    if cached_path.exists():
+        return FileResponse(str(cached_path), media_type='video/mp4', filename=filename)
+    
+    if not FrameStore.exists(str(frame_store_dir(analysis_id))):
+        raise HTTPException(status_code=404, detail="No stored frame data for this analysis")
+    
+    if job_queue:
+        from workers.video_processor import render_video_job
+        
+        # One job per clip: repeated requests while it renders get the same job
+        job_id = f"render-{analysis_id}-{cached_path.stem.replace('.', '_')}"
+        job = _pending_job(job_id)
+        if job is None:
+            job = job_queue.enqueue(
+                render_video_job,
+                analysis_id,
+                db_analysis.video_path,
+                start,
+                end,
+                None,
+                db_analysis.width,
+                job_id=job_id,
+                timeout=int(os.getenv('REDIS_JOB_TIMEOUT', '3600'))
+            )
+        return {"status": "rendering", "analysis_id": analysis_id, "job_id": job.id}
+    
+    path = await run_in_threadpool(render_analysis_video, analysis_id, db_analysis.video_path,
+                                   start, end, max_width=db_analysis.width)
+    return FileResponse(str(path), media_type='video/mp4', filename=filename)
+
+def _pending_job(job_id: str) -> Optional[Job]:
+    """A queued or running job with the given ID, or None."""
+    try:
+        job = Job.fetch(job_id, connection=redis_conn)
+    except NoSuchJobError:
+        return None
+    pending = (JobStatus.QUEUED, JobStatus.STARTED, JobStatus.DEFERRED, JobStatus.SCHEDULED)
+    return job if job.get_status() in pending else None
+
 @app.post("/analyze/live")
 async def start_live_analysis(config: LiveAnalysisConfig):
     """
@@ -455,7 +601,7 @@ async def get_current_stats():
 @app.delete("/analyze/{analysis_id}")
 async def delete_analysis(analysis_id: str, db: Session = Depends(get_db)):
     """
-    Delete analysis results from database.
+    Delete analysis results from database, with its frame store and rendered clips.
     
     Args:
         analysis_id: Analysis ID
@@ -465,6 +611,9 @@ async def delete_analysis(analysis_id: str, db: Session = Depends(get_db)):
         Success status
     """
     if crud.delete_analysis(db, analysis_id):
+        # Stored frame data and rendered clips are only reachable through the analysis
+        shutil.rmtree(frame_store_dir(analysis_id), ignore_errors=True)
+        shutil.rmtree(render_cache_dir(analysis_id), ignore_errors=True)
         return {"message": "Analysis deleted", "success": True}
     else:
         raise HTTPException(status_code=404, detail="Analysis not found")
@@ -517,21 +666,9 @@ async def process_video_background(analysis_id: str, request: AnalysisRequest, d
     db = SessionLocal()
     
     try:
-        # Get processor
-        video_processor = get_processor()
-        
-        # Set confidence threshold if different
-        if request.confidence_threshold != video_processor.detector.confidence_threshold:
-            video_processor.detector.confidence_threshold = request.confidence_threshold
-        
-        # Process video
-        results = video_processor.process_video(
-            video_path=request.video_path,
-            output_video_path=request.output_video_path,
-            output_json_path=request.output_json_path,
-            visualize=request.visualize,
-            save_frames=request.save_frames
-        )
+        # Process video in a worker thread; loading the processor (and any
+        # model export or quantization) happens there too
+        results = await run_in_threadpool(analyze_with_processor, request)
         
         # Convert to response model
         video_analysis = VideoAnalysisResult(**results)
@@ -548,14 +685,33 @@ async def process_video_background(analysis_id: str, request: AnalysisRequest, d
 
 # Add new endpoint for shot chart data
 @app.get("/analyze/{analysis_id}/shot-chart")
-async def get_shot_chart_data(analysis_id: str, db: Session = Depends(get_db)):
-    """Get shot chart data for visualization."""
+async def get_shot_chart_data(
+    analysis_id: str,
+    include_ball_track: bool = False,
+    track_window: int = 30,
+    db: Session = Depends(get_db)
+):
+    """
+    Get shot chart data for visualization.
+    
+    Args:
+        analysis_id: Analysis ID
+        include_ball_track: Attach the ball positions around each shot, read
+            from the analysis frame store when one exists
+        track_window: Number of frames before and after each shot to include
+        db: Database session
+    """
     db_analysis = crud.get_analysis(db, analysis_id)
     if not db_analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
     shots = crud.get_analysis_shots(db, analysis_id)
     
+    store = None
+    store_path = frame_store_dir(analysis_id)
+    if include_ball_track and FrameStore.exists(str(store_path)):
+        store = FrameStore(str(store_path))
+    
     shot_chart_data = {
         "analysis_id": analysis_id,
         "video_metadata": {
@@ -571,7 +727,8 @@ async def get_shot_chart_data(analysis_id: str, db: Session = Depends(get_db)):
                 "zone": shot.shot_zone,
                 "value": shot.shot_value,
                 "timestamp": shot.timestamp,
-                "player_id": shot.shooter_id
+                "player_id": shot.shooter_id,
+                **({"ball_track": _ball_track(store, shot.frame_id, track_window)} if store else {})
             }
             for shot in shots
         ],
@@ -592,6 +749,18 @@ async def get_shot_chart_data(analysis_id: str, db: Session = Depends(get_db)):
     return shot_chart_data
 
 
+def _ball_track(store: FrameStore, frame_id: int, window: int) -> list:
+    """Ball positions within ``window`` frames of ``frame_id`` from a frame store."""
+    center = store.index_of(frame_id)
+    frames = store.frame_slice(center - window, center + window + 1)
+    ball = frames['ball_position']
+    detected = ~np.isnan(ball[:, 0])
+    return [
+        {"frame_id": int(fid), "x": float(x), "y": float(y)}
+        for fid, (x, y) in zip(frames['frame_id'][detected], ball[detected])
+    ]
+
+
 # New stats endpoints
 @app.get("/players/{player_id}/stats")
 async def get_player_stats(
@@ -1,7 +1,7 @@
 """Pydantic models for basketball analysis API."""
 
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Tuple, Any
+from typing import List, Optional, Dict, Tuple, Any, Literal
 from datetime import datetime
 
 
@@ -115,6 +115,7 @@ class FrameAnalysis(BaseModel):
     players: List[Detection] = Field(default_factory=list, description="Detected players")
     ball: Optional[Detection] = Field(None, description="Detected basketball")
     court_zones: Dict[str, CourtZone] = Field(default_factory=dict, description="Court zone information")
+    zone_table_id: Optional[str] = Field(None, description="ID of the shared court zone table (WxH)")
     
     # Tracking results
     tracked_players: List[PlayerTracking] = Field(default_factory=list, description="Tracked players")
@@ -184,6 +185,9 @@ class AnalysisRequest(BaseModel):
     visualize: bool = Field(True, description="Create visualized output")
     save_frames: bool = Field(False, description="Save individual frames")
     confidence_threshold: float = Field(0.25, ge=0, le=1, description="Detection confidence threshold")
+    inference_backend: Literal['torch', 'onnx', 'openvino', 'onnx-int8'] = Field(
+        'torch', description="Detector inference backend (onnx-int8 trades a little recall for speed)"
+    )
 
 
 class AnalysisResponse(BaseModel):
@@ -0,0 +1,82 @@
+"""Benchmark keyframe detection strides: throughput vs. agreement with full detection.
+
+Usage:
+    python scripts/benchmark_detection_stride.py demo_basketball.mp4 --max-stride 8
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vision.processor import BasketballVideoProcessor
+
+
+def run(video_path, stride, confidence_threshold, output_dir):
+    """Process the video with a detection stride and return (results, seconds)."""
+    processor = BasketballVideoProcessor(
+        confidence_threshold=confidence_threshold, output_dir=output_dir
+    )
+    start = time.perf_counter()
+    results = processor.process_video(
+        video_path,
+        output_json_path=os.path.join(output_dir, f"stride_{stride}.json"),
+        visualize=False,
+        detection_stride=stride
+    )
+    return results, time.perf_counter() - start
+
+
+def compare(reference, candidate):
+    """Agreement of a strided run with the stride-1 reference, frame by frame."""
+    ball_agreement = []
+    ball_errors = []
+    player_count_errors = []
+
+    for ref, cand in zip(reference['frame_by_frame_data'], candidate['frame_by_frame_data']):
+        ref_ball, cand_ball = ref['ball_position'], cand['ball_position']
+        ball_agreement.append((ref_ball is None) == (cand_ball is None))
+        if ref_ball is not None and cand_ball is not None:
+            ball_errors.append(np.hypot(ref_ball[0] - cand_ball[0], ref_ball[1] - cand_ball[1]))
+        player_count_errors.append(abs(len(ref['tracked_players']) - len(cand['tracked_players'])))
+
+    return {
+        'ball_presence_agreement': float(np.mean(ball_agreement)) if ball_agreement else 1.0,
+        'ball_error_px': float(np.mean(ball_errors)) if ball_errors else 0.0,
+        'player_count_mae': float(np.mean(player_count_errors)) if player_count_errors else 0.0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video', help='Video to process')
+    parser.add_argument('--max-stride', type=int, default=8, help='Largest stride to try')
+    parser.add_argument('--confidence', type=float, default=0.25, help='Detection confidence threshold')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        reference, reference_seconds = run(args.video, 1, args.confidence, output_dir)
+        frames = reference['processing_summary']['total_frames_processed']
+
+        print(f"\n{'stride':>6} {'fps':>8} {'speedup':>8} {'keyframes':>10} "
+              f"{'ball agree':>11} {'ball err px':>12} {'players MAE':>12}")
+        for stride in range(1, args.max_stride + 1):
+            if stride == 1:
+                results, seconds = reference, reference_seconds
+            else:
+                results, seconds = run(args.video, stride, args.confidence, output_dir)
+
+            keyframes = results.get('keyframe_stats', {}).get('keyframes', frames)
+            metrics = compare(reference, results)
+            print(f"{stride:>6} {frames / seconds:>8.1f} {reference_seconds / seconds:>7.2f}x "
+                  f"{keyframes / max(frames, 1):>9.0%} {metrics['ball_presence_agreement']:>10.1%} "
+                  f"{metrics['ball_error_px']:>12.1f} {metrics['player_count_mae']:>12.2f}")
+
+
+if __name__ == '__main__':
+    main()
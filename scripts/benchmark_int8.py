@@ -0,0 +1,103 @@
+"""Report INT8 detector accuracy and speed against the FP32 PyTorch detector.
+
+Usage:
+    python scripts/benchmark_int8.py demo_basketball.mp4 --calibration-video demo_basketball.mp4
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vision.detector import BasketballDetector
+
+
+def read_frames(video_path, max_frames):
+    """Decode up to max_frames frames of the reference clip."""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(detector, frames):
+    """Detect every frame and return (detections, frames/sec)."""
+    detector.detect_frame(frames[0], 0.0)  # Warm-up, not timed
+    start = time.perf_counter()
+    detections = [detector.detect_frame(frame, float(i)) for i, frame in enumerate(frames)]
+    return detections, len(frames) / (time.perf_counter() - start)
+
+
+def box_iou(a, b):
+    """IoU of two (x1, y1, x2, y2) boxes."""
+    width = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    height = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def recall(reference, candidate, iou_threshold):
+    """Player and ball recall of candidate detections against the reference ones."""
+    players_found = players_total = balls_found = balls_total = 0
+
+    for ref, cand in zip(reference, candidate):
+        unmatched = [player['bbox'] for player in cand['players']]
+        for player in ref['players']:
+            players_total += 1
+            ious = [box_iou(player['bbox'], bbox) for bbox in unmatched]
+            if ious and max(ious) >= iou_threshold:
+                unmatched.pop(int(np.argmax(ious)))
+                players_found += 1
+
+        if ref['ball'] is not None:
+            balls_total += 1
+            if cand['ball'] is not None and box_iou(ref['ball']['bbox'], cand['ball']['bbox']) >= iou_threshold:
+                balls_found += 1
+
+    return (players_found / players_total if players_total else 1.0,
+            balls_found / balls_total if balls_total else 1.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video', help='Reference clip')
+    parser.add_argument('--model', default='yolov8n.pt', help='YOLO weights')
+    parser.add_argument('--calibration-video', default=None, help='Video sampled for INT8 calibration')
+    parser.add_argument('--max-frames', type=int, default=300, help='Frames of the clip to use')
+    parser.add_argument('--threads', type=int, default=None, help='Inference threads')
+    parser.add_argument('--confidence', type=float, default=0.25, help='Detection confidence threshold')
+    parser.add_argument('--iou', type=float, default=0.5, help='IoU for a detection to count as recalled')
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.max_frames)
+    if not frames:
+        sys.exit(f"Could not read frames from {args.video}")
+
+    reference, reference_fps = run(
+        BasketballDetector(args.model, args.confidence, 'torch', args.threads), frames
+    )
+
+    print(f"\n{'backend':>10} {'fps':>8} {'speedup':>8} {'player recall':>14} {'ball recall':>12}")
+    print(f"{'torch':>10} {reference_fps:>8.1f} {1.0:>7.2f}x {1.0:>13.1%} {1.0:>11.1%}")
+    for backend in ('onnx', 'onnx-int8'):
+        detector = BasketballDetector(args.model, args.confidence, backend, args.threads,
+                                      args.calibration_video)
+        detections, fps = run(detector, frames)
+        player_recall, ball_recall = recall(reference, detections, args.iou)
+        print(f"{backend:>10} {fps:>8.1f} {fps / reference_fps:>7.2f}x "
+              f"{player_recall:>13.1%} {ball_recall:>11.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""Compare tracker backends: tracking throughput and ID switches on a reference clip.
+
+Detection runs once and its output is replayed into every tracker, so the
+timings only cover tracking. Without ground truth, an ID switch is counted
+when a tracked box overlaps the previous frame's box of another track
+(IoU >= --iou) but not the one of its own ID.
+
+Usage:
+    python scripts/benchmark_tracker.py demo_basketball.mp4 --max-frames 300
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from vision.detector import BasketballDetector
+from vision.tracker import TRACKER_BACKENDS, BasketballTracker
+
+
+def detect(video_path, max_frames, confidence_threshold):
+    """Decode the clip and detect every frame once."""
+    detector = BasketballDetector(confidence_threshold=confidence_threshold)
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append((frame, detector.detect_frame(frame, len(frames) / fps)))
+    cap.release()
+    return frames
+
+
+def track(backend, frames):
+    """Track the detected frames and return (per-frame tracks, frames/sec)."""
+    tracker = BasketballTracker(backend=backend)
+    start = time.perf_counter()
+    tracked = [tracker.update_tracks(detections, frame)['tracked_players'] for frame, detections in frames]
+    return tracked, len(frames) / (time.perf_counter() - start)
+
+
+def box_iou(a, b):
+    """IoU of two (x1, y1, x2, y2) boxes."""
+    width = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    height = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    intersection = width * height
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+    return intersection / union if union > 0 else 0.0
+
+
+def id_switches(tracked, iou_threshold):
+    """Count identity changes between boxes that continue across consecutive frames."""
+    switches = 0
+    for previous, current in zip(tracked, tracked[1:]):
+        previous_boxes = {player['track_id']: player['bbox'] for player in previous}
+        for player in current:
+            own = previous_boxes.get(player['track_id'])
+            if own is not None and box_iou(own, player['bbox']) >= iou_threshold:
+                continue
+            if any(box_iou(bbox, player['bbox']) >= iou_threshold
+                   for track_id, bbox in previous_boxes.items() if track_id != player['track_id']):
+                switches += 1
+    return switches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('video', help='Reference clip')
+    parser.add_argument('--max-frames', type=int, default=300, help='Frames of the clip to use')
+    parser.add_argument('--confidence', type=float, default=0.25, help='Detection confidence threshold')
+    parser.add_argument('--iou', type=float, default=0.5, help='IoU for a box to continue a track')
+    args = parser.parse_args()
+
+    frames = detect(args.video, args.max_frames, args.confidence)
+    if not frames:
+        sys.exit(f"Could not read frames from {args.video}")
+
+    print(f"\n{'tracker':>10} {'fps':>8} {'unique IDs':>11} {'ID switches':>12}")
+    for backend in TRACKER_BACKENDS:
+        tracked, fps = track(backend, frames)
+        unique_ids = len({player['track_id'] for players in tracked for player in players})
+        print(f"{backend:>10} {fps:>8.1f} {unique_ids:>11} {id_switches(tracked, args.iou):>12}")
+
+
+if __name__ == '__main__':
+    main()
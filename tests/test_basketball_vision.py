@@ -3,7 +3,9 @@
 import pytest
 import numpy as np
 from pathlib import Path
+import shutil
 import sys
+import threading
 
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -12,6 +14,26 @@ from vision.detector import BasketballDetector
 from vision.tracker import BasketballTracker
 from vision.analytics import BasketballAnalytics
 from vision.processor import BasketballVideoProcessor
+from vision.pipeline import StagePipeline
+from vision.keyframes import KeyframeScheduler
+from vision.segments import plan_segments, match_overlap_tracks, stitch_segments
+from vision.sinks import CallbackFrameSink, JsonLinesFrameSink, read_frame_jsonl
+from vision.frame_store import FrameStore, FrameStoreWriter
+from vision.backends import (
+    ExportedModelBackend, exported_model_path, quantized_model_path, sample_calibration_frames
+)
+from vision.detection_cache import DetectionCache
+from vision.embedding import AppearanceEmbedder
+from vision.ring_buffer import RingBuffer
+from vision.geometry import iou_matrix
+from vision.proximity import ball_distances, nearest_player
+from vision.ball_roi import BallROIRedetector
+from vision.overlay import OverlayRenderer, player_color
+from vision.frame_dump import FrameDumpWriter
+from vision.serialization import StreamingJSONEncoder, dump_json, json_key
+from vision.video_io import VideoReader, FFmpegVideoWriter, open_video_writer
+from vision.render import render_analysis_video, render_annotated_video, render_cache_path
+from workers.video_processor import calculate_enhanced_stats
 
 
 @pytest.fixture
@@ -46,6 +68,20 @@ def processor():
     return BasketballVideoProcessor(confidence_threshold=0.1)
 
 
+@pytest.fixture
+def sample_video(tmp_path):
+    """Write a short synthetic video for end-to-end processing tests."""
+    import cv2
+    
+    video_path = tmp_path / "sample.mp4"
+    writer = cv2.VideoWriter(str(video_path), cv2.VideoWriter_fourcc(*'mp4v'), 30, (160, 120))
+    rng = np.random.default_rng(0)
+    for _ in range(6):
+        writer.write(rng.integers(0, 255, (120, 160, 3), dtype=np.uint8))
+    writer.release()
+    return str(video_path)
+
+
 class TestBasketballDetector:
     """Test basketball detection functionality."""
     
@@ -74,6 +110,143 @@ class TestBasketballDetector:
         assert isinstance(results['players'], list)
         assert isinstance(results['court_zones'], dict)
     
+    def test_detect_batch_matches_detect_frame(self, sample_frame):
+        """Test that batched detection yields the same per-frame output."""
+        frames = [sample_frame, np.flipud(sample_frame).copy()]
+        timestamps = [0.0, 1.0 / 30]
+
+        single_detector = BasketballDetector(confidence_threshold=0.1)
+        batch_detector = BasketballDetector(confidence_threshold=0.1)
+
+        single_results = [
+            single_detector.detect_frame(frame, ts) for frame, ts in zip(frames, timestamps)
+        ]
+        batch_results = batch_detector.detect_batch(frames, timestamps)
+
+        assert len(batch_results) == len(frames)
+        assert batch_detector.frame_count == single_detector.frame_count == 2
+        for single, batched in zip(single_results, batch_results):
+            assert batched['frame_id'] == single['frame_id']
+            assert batched['timestamp'] == single['timestamp']
+            assert batched['frame_shape'] == single['frame_shape']
+            assert len(batched['players']) == len(single['players'])
+            assert (batched['ball'] is None) == (single['ball'] is None)
+
+    def test_detect_batch_empty(self, detector):
+        """Test batched detection with no frames."""
+        assert detector.detect_batch([]) == []
+        assert detector.frame_count == 0
+
+    def test_onnx_backend_matches_torch(self, tmp_path):
+        """Test that the ONNX Runtime backend reproduces the PyTorch detections."""
+        pytest.importorskip('onnxruntime')
+        import cv2
+        import shutil
+
+        cap = cv2.VideoCapture(str(Path(__file__).parent.parent / 'demo_basketball.mp4'))
+        ok, frame = cap.read()
+        cap.release()
+        if not ok:
+            pytest.skip("demo video not available")
+
+        # Export next to a copy of the weights so the repo stays clean
+        weights = tmp_path / 'yolov8n.pt'
+        shutil.copy(Path(__file__).parent.parent / 'yolov8n.pt', weights)
+
+        torch_detector = BasketballDetector(str(weights), confidence_threshold=0.1)
+        onnx_detector = BasketballDetector(str(weights), confidence_threshold=0.1,
+                                           backend='onnx', threads=1)
+        assert onnx_detector.model.model_file == tmp_path / 'yolov8n_640.onnx'
+        assert onnx_detector.model.model_file.exists()
+
+        torch_boxes = torch_detector.model.predict([frame], 0.1)[0]
+        onnx_boxes = onnx_detector.model.predict([frame], 0.1)[0]
+        assert onnx_boxes.shape == torch_boxes.shape
+        np.testing.assert_array_equal(onnx_boxes[:, 5], torch_boxes[:, 5])
+        np.testing.assert_allclose(onnx_boxes[:, :4], torch_boxes[:, :4], atol=1.0)
+        np.testing.assert_allclose(onnx_boxes[:, 4], torch_boxes[:, 4], atol=1e-2)
+
+        torch_result = torch_detector.detect_frame(frame, 0.0)
+        onnx_result = onnx_detector.detect_frame(frame, 0.0)
+        assert onnx_result.keys() == torch_result.keys()
+        assert len(onnx_result['players']) == len(torch_result['players'])
+        assert (onnx_result['ball'] is None) == (torch_result['ball'] is None)
+
+    def test_letterbox_reuses_buffers(self):
+        """Test that letterboxing matches a fresh resize-and-pad with reused buffers."""
+        import cv2
+        
+        backend = ExportedModelBackend(imgsz=320)
+        frames = [np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8) for _ in range(2)]
+        
+        for frame in frames:
+            image, (gain, pad) = backend._letterbox(frame)
+            resized = cv2.resize(frame, (320, 240), interpolation=cv2.INTER_LINEAR)
+            # 240 rows are padded to the next multiple of the 32 px stride
+            padded = cv2.copyMakeBorder(resized, 8, 8, 0, 0, cv2.BORDER_CONSTANT, value=(114,) * 3)
+            expected = padded[..., ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+            np.testing.assert_array_equal(image, expected)
+            assert gain == (0.5, 0.5) and pad == (0, 8)
+        
+        plan = backend._letterbox_plan(frames[0].shape)
+        assert plan is backend._letterbox_plan(frames[1].shape)
+        assert backend._batch_buffer(2, plan['canvas'].shape) is backend._batch_buffer(2, plan['canvas'].shape)
+        
+        # A new input size gets its own geometry
+        backend.imgsz = 640
+        assert backend._letterbox(frames[0])[0].shape == (3, 480, 640)
+    
+    def test_select_imgsz(self):
+        """Test that the smallest input size keeping players tall enough is chosen."""
+        class PlayerBackend:
+            imgsz = 640
+            
+            def __init__(self, height):
+                self.height = height
+                self.sizes = []
+            
+            def predict(self, frames, conf):
+                self.sizes.append(self.imgsz)
+                return [np.array([[100, 100, 100 + self.height / 2.5, 100 + self.height, 0.9, 0]],
+                                 dtype=np.float32)]
+        
+        frames = [np.zeros((1080, 1920, 3), dtype=np.uint8)] * 3
+        for player_height, expected in ((400, 320), (120, 512), (109, 640)):
+            detector = BasketballDetector.__new__(BasketballDetector)
+            detector.model = PlayerBackend(player_height)
+            detector.confidence_threshold = 0.25
+            detector.inference_lock = threading.Lock()
+            
+            # Frames are sampled at the largest candidate size
+            assert detector.select_imgsz(frames) == expected
+            assert detector.model.sizes == [1280] * 3
+            assert detector.model.imgsz == expected
+        
+        # No players: keep the current size
+        detector.model = PlayerBackend(10)
+        assert detector.select_imgsz(frames) == 640
+    
+    def test_unknown_backend(self):
+        """Test that an unknown inference backend is rejected."""
+        with pytest.raises(ValueError):
+            BasketballDetector(backend='tensorrt')
+
+    def test_court_zones_shared_per_resolution(self, detector, sample_frame):
+        """Test that court zone geometry is computed once per resolution."""
+        first = detector.detect_frame(sample_frame, 0.0)
+        second = detector.detect_frame(sample_frame, 1.0)
+        
+        assert first['zone_table_id'] == '640x480'
+        assert second['court_zones'] is first['court_zones']
+        assert detector.get_zone_table('640x480') is first['court_zones']
+        assert first['court_zones']['mid_court']['pixel_coords'] == (160, 96, 480, 384)
+        
+        small_frame = np.zeros((240, 320, 3), dtype=np.uint8)
+        small_zones = detector._analyze_court_zones(small_frame)
+        assert small_zones is not first['court_zones']
+        assert small_zones['mid_court']['pixel_coords'] == (80, 48, 240, 192)
+        assert len(detector.zone_tables) == 2
+    
     def test_bbox_center_calculation(self, detector):
         """Test bounding box center calculation."""
         bbox = np.array([10, 20, 50, 80])
@@ -120,6 +293,82 @@ class TestBasketballDetector:
         }
         assert not detector._is_likely_basketball(invalid_ball)
 
+    def test_vectorized_filtering_matches_scalar_checks(self, detector):
+        """Test that array-based filtering matches the per-detection checks."""
+        rng = np.random.default_rng(0)
+        frame_shape = (480, 640, 3)
+        n = 200
+
+        x1 = rng.uniform(0, 600, n)
+        y1 = rng.uniform(0, 400, n)
+        xyxy = np.stack([
+            x1, y1, x1 + rng.uniform(0, 150, n), y1 + rng.uniform(0, 300, n)
+        ], axis=1).astype(np.float32)
+        conf = rng.uniform(0, 1, n).astype(np.float32)
+        cls = rng.choice([0, 32, 2], n).astype(np.float32)
+
+        players, ball = detector._filter_detections(xyxy, conf, cls, frame_shape)
+
+        expected_players = []
+        expected_ball = None
+        for i in range(n):
+            class_id = int(cls[i])
+            if class_id not in detector.BASKETBALL_CLASSES:
+                continue
+            info = {
+                'bbox': xyxy[i].tolist(),
+                'confidence': float(conf[i]),
+                'area': detector._get_bbox_area(xyxy[i]),
+                'center': detector._get_bbox_center(xyxy[i])
+            }
+            if class_id == 0 and detector._is_likely_player(info, frame_shape):
+                expected_players.append(info)
+            elif class_id == 32 and detector._is_likely_basketball(info):
+                expected_ball = info
+
+        assert len(players) == len(expected_players) > 0
+        for got, expected in zip(players, expected_players):
+            assert got['bbox'] == expected['bbox']
+            assert got['confidence'] == expected['confidence']
+            assert got['center'] == expected['center']
+            assert got['area'] == expected['area']
+        assert expected_ball is not None
+        assert ball['bbox'] == expected_ball['bbox']
+
+
+class TestInt8Calibration:
+    """Test INT8 calibration helpers."""
+    
+    def test_sample_calibration_frames(self, sample_video):
+        """Test that calibration frames are spread over the video."""
+        frames = sample_calibration_frames(sample_video, num_frames=3)
+        assert len(frames) == 3
+        assert all(frame.shape == (120, 160, 3) for frame in frames)
+        
+        # Asking for more frames than the video has yields each frame once
+        assert len(sample_calibration_frames(sample_video, num_frames=50)) == 6
+    
+    def test_missing_calibration_video(self, tmp_path):
+        """Test that an unreadable calibration video is rejected."""
+        with pytest.raises(ValueError):
+            sample_calibration_frames(str(tmp_path / 'missing.mp4'))
+    
+    def test_quantized_model_path(self, sample_video):
+        """Test that the INT8 model is cached next to the weights, per calibration."""
+        path = quantized_model_path('models/yolov8n.pt', sample_video)
+        assert path.parent == Path('models')
+        assert path.name.startswith('yolov8n_int8_') and path.suffix == '.onnx'
+        assert path == quantized_model_path('models/yolov8n.pt', sample_video)
+        assert path != quantized_model_path('models/yolov8n.pt', sample_video, num_frames=8)
+        assert path != quantized_model_path('models/yolov8n.pt', sample_video, imgsz=320)
+        assert path != quantized_model_path('models/yolov8n.pt', 'other.mp4')
+    
+    def test_exported_model_path(self):
+        """Test that exports are cached per input size."""
+        assert exported_model_path('models/yolov8n.pt', 'onnx') == Path('models/yolov8n_640.onnx')
+        assert exported_model_path('models/yolov8n.pt', 'openvino', 320) == \
+            Path('models/yolov8n_320_openvino_model')
+
 
 class TestBasketballTracker:
     """Test basketball tracking functionality."""
@@ -128,8 +377,8 @@ class TestBasketballTracker:
         """Test tracker initialization."""
         assert tracker.tracker is not None
         assert tracker.player_stats == {}
-        assert tracker.ball_trajectory == []
-        assert tracker.possession_history == []
+        assert len(tracker.ball_trajectory) == 0
+        assert len(tracker.possession_history) == 0
     
     def test_track_update_empty(self, tracker, sample_frame):
         """Test track update with no detections."""
@@ -159,6 +408,29 @@ class TestBasketballTracker:
         possession_player = tracker._determine_possession(ball_center, players)
         assert possession_player == 1  # Should be the closer player
     
+    def test_possession_hysteresis(self):
+        """Test that the possessor keeps the ball against a marginally closer player."""
+        tracker = BasketballTracker(backend='motion', possession_hysteresis=10)
+        ball = {'center': (100, 100)}
+        
+        def possessor(players, frame_id):
+            results = {'frame_id': frame_id, 'timestamp': frame_id / 30, 'ball_info': ball,
+                       'tracked_players': [{'track_id': track_id, 'center': center, 'bbox': [0, 0, 1, 1]}
+                                           for track_id, center in players]}
+            return tracker.replay_tracks(results)['possession']['player_id']
+        
+        assert possessor([('1', (110, 100)), ('2', (150, 100))], 0) == '1'
+        assert possessor([('1', (110, 100)), ('2', (104, 100))], 1) == '1'
+        assert possessor([('1', (130, 100)), ('2', (104, 100))], 2) == '2'
+        assert possessor([('2', (300, 100))], 3) is None
+    
+    def test_possession_options_reach_tracker(self):
+        """Test that the processor passes its possession options to the tracker."""
+        processor = BasketballVideoProcessor(tracker_backend='motion', possession_radius=50,
+                                             possession_hysteresis=5)
+        assert processor.tracker.possession_radius == 50
+        assert processor.tracker.possession_hysteresis == 5
+    
     def test_player_color_consistency(self, tracker):
         """Test that player colors are consistent."""
         color1_a = tracker._get_player_color(1)
@@ -167,6 +439,331 @@ class TestBasketballTracker:
         
         color2 = tracker._get_player_color(2)
         assert color1_a != color2  # Different players should have different colors
+    
+    def _player_detections(self, frame_id, boxes):
+        """Detection payload with players at the given (bbox, confidence) pairs."""
+        return {
+            'frame_id': frame_id,
+            'timestamp': frame_id / 30.0,
+            'players': [
+                {'bbox': bbox, 'confidence': confidence,
+                 'center': ((bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2)}
+                for bbox, confidence in boxes
+            ],
+            'ball': None,
+            'court_zones': {}
+        }
+    
+    def test_motion_backend_keeps_ids(self, sample_frame):
+        """Test that the motion backend tracks moving players with stable IDs."""
+        tracker = BasketballTracker(backend='motion')
+        
+        for frame_id in range(1, 11):
+            x = 5.0 * frame_id
+            # The second player drops to a low-confidence detection mid-way
+            second_confidence = 0.9 if frame_id < 6 else 0.35
+            results = tracker.update_tracks(self._player_detections(frame_id, [
+                ([100 + x, 100, 150 + x, 220], 0.9),
+                ([400 - x, 120, 450 - x, 240], second_confidence)
+            ]), sample_frame)
+        
+        players = results['tracked_players']
+        assert sorted(p['track_id'] for p in players) == ['1', '2']
+        for player in players:
+            assert set(player) == {'track_id', 'bbox', 'center', 'confidence',
+                                   'time_since_update', 'hit_streak'}
+            assert player['time_since_update'] == 0
+            assert player['hit_streak'] == 10
+        assert players[1]['confidence'] == 0.35
+    
+    def test_motion_backend_low_confidence_does_not_start_tracks(self, sample_frame):
+        """Test that low-confidence detections never create tracks."""
+        tracker = BasketballTracker(backend='motion', n_init=1)
+        results = tracker.update_tracks(
+            self._player_detections(1, [([100, 100, 150, 220], 0.35)]), sample_frame
+        )
+        assert results['tracked_players'] == []
+    
+    def test_motion_backend_propagates(self, sample_frame):
+        """Test that propagation moves tracks without dropping them."""
+        tracker = BasketballTracker(backend='motion', n_init=1)
+        for frame_id in range(1, 4):
+            tracker.update_tracks(self._player_detections(
+                frame_id, [([100 + 10.0 * frame_id, 100, 150 + 10.0 * frame_id, 220], 0.9)]
+            ), sample_frame)
+        
+        before = tracker.tracker.tracks[0].to_ltrb()
+        results = tracker.propagate_tracks(self._player_detections(4, []))
+        assert len(results['tracked_players']) == 1
+        assert results['tracked_players'][0]['bbox'][0] > before[0]
+    
+    def test_embedder_batches_and_reuses_crops(self, sample_frame):
+        """Test that crops of several frames share a model call and static boxes reuse embeddings."""
+        embedder = AppearanceEmbedder('small', max_reuse=2)
+        static = [[100, 100, 150, 220], 0.9]
+        moving = lambda x: [[300 + x, 100, 350 + x, 220], 0.9]
+        detections = [
+            self._player_detections(i, [static, moving(40.0 * i)]) for i in range(4)
+        ]
+        
+        embeds = embedder.embed_frames([sample_frame] * 4, detections)
+        
+        assert embedder.stats['calls'] == 1
+        assert [len(frame_embeds) for frame_embeds in embeds] == [2, 2, 2, 2]
+        assert embeds[0][0].shape == (1280,)
+        # The static player is embedded once, reused twice, then refreshed
+        assert embeds[1][0] is embeds[0][0] and embeds[2][0] is embeds[0][0]
+        assert embeds[3][0] is not embeds[0][0]
+        assert embedder.stats == {'embedded': 6, 'reused': 2, 'calls': 1}
+    
+    def test_precomputed_embeddings_are_consumed(self, sample_frame):
+        """Test that update_tracks uses and drops embeddings from embed_players."""
+        tracker = BasketballTracker(embedder_model='small')
+        detections = [self._player_detections(i, [([100, 100, 150, 220], 0.9)]) for i in range(1, 4)]
+        tracker.embed_players([sample_frame] * 3, detections)
+        calls = tracker.embedder.stats['calls']
+        
+        for frame_detections in detections:
+            assert len(frame_detections['player_embeds']) == 1
+            results = tracker.update_tracks(frame_detections, sample_frame)
+            assert 'player_embeds' not in frame_detections
+        
+        assert tracker.embedder.stats['calls'] == calls
+        assert [p['track_id'] for p in results['tracked_players']] == ['1']
+    
+    def test_histories_are_bounded(self, tracker):
+        """Test that ball, possession and position histories keep a fixed size."""
+        for frame_id in range(1, 121):
+            ball_x = 100.0 + frame_id
+            tracker.replay_tracks({
+                'frame_id': frame_id,
+                'timestamp': frame_id / 30.0,
+                'tracked_players': [
+                    {'track_id': '1', 'center': (100.0 + frame_id, 100.0), 'bbox': [0, 0, 1, 1]},
+                    {'track_id': '2', 'center': (400.0, 100.0), 'bbox': [0, 0, 1, 1]}
+                ],
+                # The ball alternates between the two players every frame
+                'ball_info': {'center': (ball_x if frame_id % 2 else 400.0, 100.0)}
+            })
+        
+        assert len(tracker.ball_trajectory) == 50
+        assert len(tracker.possession_history) == 50
+        assert len(tracker.player_stats['1']['positions']) == 100
+        
+        stats = tracker.get_all_stats()
+        assert stats['ball_trajectory'][-1] == {'timestamp': 4.0, 'position': (400.0, 100.0), 'frame_id': 120}
+        assert [p['player_id'] for p in stats['possession_history'][-2:]] == ['1', '2']
+        assert stats['players']['1']['positions'][-1] == (220.0, 100.0)
+        assert stats['players']['1']['total_distance'] == pytest.approx(119.0)
+    
+    def test_unknown_tracker_backend(self):
+        """Test that an unknown tracker backend is rejected."""
+        with pytest.raises(ValueError):
+            BasketballTracker(backend='sort')
+
+
+class TestRingBuffer:
+    """Test the fixed-capacity ring buffer."""
+    
+    def test_window_in_insertion_order(self):
+        """Test that windows are contiguous views of the latest rows."""
+        ring = RingBuffer(4)
+        assert len(ring) == 0
+        assert ring.window().shape == (0, 3)
+        
+        for i in range(6):
+            ring.append(i, 10 * i, 100 * i)
+        
+        assert len(ring) == 4
+        np.testing.assert_array_equal(ring.window()[:, 0], [2, 3, 4, 5])
+        np.testing.assert_array_equal(ring.window(2)[:, 1], [40, 50])
+        np.testing.assert_array_equal(ring.last(), [5, 50, 500])
+        assert ring.window(10).shape == (4, 3)
+        assert ring.window().base is not None
+        assert not ring.window().flags.writeable
+    
+    def test_clear(self):
+        """Test that cleared buffers are empty and reusable."""
+        ring = RingBuffer(2, columns=2)
+        ring.append(1, 2)
+        ring.clear()
+        with pytest.raises(IndexError):
+            ring.last()
+        ring.append(3, 4)
+        np.testing.assert_array_equal(ring.window(), [[3, 4]])
+
+
+class TestBallROIRedetector:
+    """Test the second-stage ball detection around the predicted position."""
+    
+    class CropBackend:
+        """Finds a ball at fixed frame coordinates, if it lies inside the crop."""
+        imgsz = 64
+        
+        def __init__(self, frame_ball, crop_origin):
+            self.frame_ball = np.array(frame_ball, dtype=np.float32)
+            self.crop_origin = crop_origin
+            self.crops = []
+        
+        def predict(self, frames, conf):
+            self.crops.append(frames[0].shape)
+            x1, y1, x2, y2 = self.frame_ball - np.tile(self.crop_origin, 2)
+            return [np.array([[x1, y1, x2, y2, 0.9, 32]], dtype=np.float32)]
+    
+    def _detector(self, backend):
+        detector = BasketballDetector.__new__(BasketballDetector)
+        detector.model = backend
+        detector.confidence_threshold = 0.25
+        detector.inference_lock = threading.Lock()
+        return detector
+    
+    def test_recovers_ball_in_predicted_window(self):
+        """Test that a missed ball is found in a crop at the extrapolated position."""
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        # Ball moved 10 px/frame to the right; frame 5 predicts x = 130
+        trajectory = np.array([[0.0, 100.0, 200.0, 2], [0.1, 110.0, 200.0, 3]])
+        backend = self.CropBackend([120, 190, 140, 210], crop_origin=(98, 168))
+        redetector = BallROIRedetector(self._detector(backend))
+        
+        detections = {'frame_id': 5, 'ball': None}
+        assert redetector.refine(frame, detections, trajectory)
+        assert backend.crops == [(64, 64, 3)]
+        assert detections['ball']['roi']
+        assert detections['ball']['bbox'] == [120.0, 190.0, 140.0, 210.0]
+        assert redetector.stats == {'roi_passes': 1, 'recovered': 1, 'skipped': 0}
+    
+    def test_falls_back_after_misses(self):
+        """Test that no ROI pass runs once the ball has been missing too long."""
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        trajectory = np.array([[0.0, 100.0, 200.0, 2]])
+        backend = self.CropBackend([90, 190, 110, 210], crop_origin=(68, 168))
+        redetector = BallROIRedetector(self._detector(backend), max_misses=3)
+        
+        assert not redetector.refine(frame, {'frame_id': 6, 'ball': None}, trajectory)
+        assert backend.crops == []
+        assert redetector.stats['skipped'] == 1
+        
+        # A ball found by the full-frame pass is left alone
+        ball = {'center': (0, 0)}
+        detections = {'frame_id': 3, 'ball': ball}
+        assert not redetector.refine(frame, detections, trajectory)
+        assert detections['ball'] is ball
+    
+    def test_window_stays_inside_frame(self):
+        """Test that crops near the border are shifted into the frame."""
+        redetector = BallROIRedetector(self._detector(self.CropBackend([0, 0, 1, 1], (0, 0))))
+        assert redetector._roi((5.0, 470.0), 640, 480) == (0, 416, 64, 480)
+
+
+class TestOverlayRenderer:
+    """Test the single-pass overlay renderer."""
+    
+    def _frame_results(self, detector, frame):
+        detections = detector.skip_frame(frame, 0.0)
+        detections['players'] = [{'bbox': [100, 100, 140, 200], 'confidence': 0.9}]
+        return {
+            'frame_id': detections['frame_id'],
+            'timestamp': 0.0,
+            'detections': detections,
+            'tracking': {
+                'tracked_players': [{'track_id': '3', 'bbox': [100, 100, 140, 200]}],
+                'ball_info': None
+            },
+            'analytics': {'events': []},
+            'processing_metadata': {'tracked_players': 1, 'events_detected': 0}
+        }
+    
+    def test_render_into_reused_buffer(self, detector):
+        """Test that frames are annotated into one buffer with a cached court layer."""
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        renderer = OverlayRenderer()
+        results = self._frame_results(detector, frame)
+        
+        first = renderer.render(frame, results)
+        assert not frame.any()
+        assert first.any()
+        # Static court layer: paint area outline at the bottom center
+        assert tuple(first[384, 300]) == (100, 100, 255)
+        # Dynamic layer: tracked player box drawn over the detection box
+        assert tuple(first[150, 100]) == player_color('3')
+        
+        second = renderer.render(frame, results)
+        assert second is first
+        assert len(renderer._static_layers) == 1
+    
+    def test_render_in_place(self, detector):
+        """Test that passing the frame as output annotates it without a copy."""
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        results = self._frame_results(detector, frame)
+        expected = OverlayRenderer().render(frame, results).copy()
+        
+        out = OverlayRenderer().render(frame, results, out=frame)
+        assert out is frame
+        np.testing.assert_array_equal(frame, expected)
+    
+    def test_player_color(self):
+        """Test that numeric and string track IDs get stable colors."""
+        assert player_color(3) == player_color('3')
+        assert player_color('a1') == player_color('a1')
+
+
+class TestGeometry:
+    """Test the shared box geometry helpers."""
+    
+    def test_iou_matrix(self):
+        """Test pairwise IoU, disjoint boxes and degenerate boxes."""
+        boxes_a = np.array([[0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float64)
+        boxes_b = np.array([[0, 0, 10, 10], [5, 0, 15, 10], [5, 5, 5, 5]], dtype=np.float64)
+        
+        iou = iou_matrix(boxes_a, boxes_b)
+        assert iou.shape == (2, 3)
+        np.testing.assert_allclose(iou[0], [1.0, 50 / 150, 0.0])
+        np.testing.assert_allclose(iou[1], [0.0, 0.0, 0.0])
+        assert iou_matrix(boxes_a, np.zeros((0, 4))).shape == (2, 0)
+
+
+class TestProximity:
+    """Test the vectorized ball-to-player proximity kernel."""
+    
+    def test_nearest_player(self):
+        """Test nearest index, radius and first-minimum tie breaking."""
+        centers = np.array([[0, 0], [3, 4], [30, 40], [3, -4]], dtype=np.float64)
+        
+        index, distances = nearest_player(centers, (0, 0), radius=80)
+        assert index == 0
+        np.testing.assert_allclose(distances, [0, 5, 50, 5])
+        
+        index, _ = nearest_player(centers[1:], (0, 0), radius=80)
+        assert index == 0
+        assert nearest_player(centers, (1000, 0), radius=80)[0] == -1
+        assert nearest_player(np.zeros((0, 2)), (0, 0))[0] == -1
+    
+    def test_hysteresis(self):
+        """Test that the current possessor wins within the margin only."""
+        centers = np.array([[10, 0], [4, 0]], dtype=np.float64)
+        assert nearest_player(centers, (0, 0), current=0)[0] == 1
+        assert nearest_player(centers, (0, 0), current=0, hysteresis=8)[0] == 0
+        assert nearest_player(centers, (0, 0), current=0, hysteresis=5)[0] == 1
+        assert nearest_player(centers, (0, 0), radius=9, current=0, hysteresis=8)[0] == 1
+    
+    def test_per_row_ball_positions(self):
+        """Test one ball position per center, with NaN for missing balls."""
+        centers = np.array([[0, 0], [1, 1]], dtype=np.float64)
+        balls = np.array([[3, 4], [np.nan, np.nan]])
+        distances = ball_distances(centers, balls)
+        assert distances[0] == 5
+        assert np.isnan(distances[1])
+    
+    def test_analytics_possession_without_tracker(self, analytics):
+        """Test that analytics derives possession when results carry none."""
+        results = {
+            'frame_id': 0, 'timestamp': 0.0, 'court_zones': {},
+            'ball_info': {'center': (100, 100), 'area': 100},
+            'tracked_players': [{'track_id': 7, 'center': (120, 100), 'bbox': [0, 0, 1, 1]},
+                                {'track_id': 8, 'center': (400, 100), 'bbox': [0, 0, 1, 1]}]
+        }
+        frame_analytics = analytics.analyze_frame(results)
+        assert frame_analytics['possession_analysis']['current_possession'] == 7
 
 
 class TestBasketballAnalytics:
@@ -244,12 +841,828 @@ class TestBasketballVideoProcessor:
         assert isinstance(results['processing_metadata']['tracked_players'], int)
         assert isinstance(results['processing_metadata']['events_detected'], int)
     
+    def test_streaming_mode_matches_in_memory_summary(self, sample_video, tmp_path):
+        """Test that streaming frame summaries keeps the same final summary."""
+        in_memory = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path))
+        expected = in_memory.process_video(
+            sample_video, output_json_path=str(tmp_path / "a.json"), visualize=False
+        )
+        
+        streamed = []
+        streaming = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path))
+        results = streaming.process_video(
+            sample_video, output_json_path=str(tmp_path / "b.json"), visualize=False,
+            frame_sink=CallbackFrameSink(streamed.append)
+        )
+        
+        assert streaming.processing_results == []
+        assert results['frame_by_frame_data'] == []
+        assert results['processing_summary'] == expected['processing_summary']
+        assert [f['frame_id'] for f in streamed] == [
+            f['frame_id'] for f in expected['frame_by_frame_data']
+        ]
+    
+    def test_progress_callback(self, sample_video, tmp_path):
+        """Test that the progress callback sees every processed frame."""
+        calls = []
+        processor = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path))
+        processor.process_video(
+            sample_video, output_json_path=str(tmp_path / "out.json"), visualize=False,
+            batch_size=4, pipelined=True,
+            progress_callback=lambda done, total: calls.append((done, total))
+        )
+        
+        assert [done for done, _ in calls] == list(range(1, 7))
+        assert all(total == 6 for _, total in calls)
+        assert processor.progress_callback is None
+    
+    def test_json_lines_sink_roundtrip(self, tmp_path):
+        """Test that the JSON Lines sink handles NumPy values."""
+        path = tmp_path / "frames.jsonl"
+        sink = JsonLinesFrameSink(str(path))
+        sink.write({'frame_id': 1, 'ball_position': (np.float32(1.5), np.float32(2.0))})
+        sink.write({'frame_id': 2, 'ball_position': None})
+        sink.close()
+        
+        frames = list(read_frame_jsonl(str(path)))
+        assert frames == [
+            {'frame_id': 1, 'ball_position': [1.5, 2.0]},
+            {'frame_id': 2, 'ball_position': None}
+        ]
+    
     def test_current_stats(self, processor):
         """Test current statistics retrieval."""
         stats = processor.get_current_stats()
         assert 'status' in stats or 'frames_processed' in stats
 
 
+class TestFrameStore:
+    """Test the columnar frame store."""
+    
+    def _frames(self):
+        """Build a few frame summaries with varying player counts."""
+        return [
+            {
+                'timestamp': i / 30.0,
+                'frame_id': i + 1,
+                'players_detected': i % 3,
+                # Frame 4 carries an interpolated ball position
+                'ball_detected': i % 2 == 0 and i != 4,
+                'tracked_players': [
+                    {
+                        'track_id': str(t + 1),
+                        'position': (np.float32(10.0 * t + i), np.float32(20.0 + i)),
+                        'bbox': [10.0 * t, 0.0, 10.0 * t + 5, 40.0]
+                    }
+                    for t in range(i % 3)
+                ],
+                'possession': {'player_id': 1 if i % 3 else None},
+                'ball_position': (100.0 + i, 50.0) if i % 2 == 0 else None
+            }
+            for i in range(7)
+        ]
+    
+    def test_roundtrip(self, tmp_path):
+        """Test that frames read back match what was written."""
+        writer = FrameStoreWriter(str(tmp_path / "store"), flush_every=2)
+        frames = self._frames()
+        for frame in frames:
+            writer.write(frame)
+        writer.close()
+        
+        store = FrameStore(str(tmp_path / "store"))
+        assert len(store) == 7
+        assert store.num_players == sum(len(f['tracked_players']) for f in frames)
+        assert isinstance(store.track_id, np.memmap)
+        
+        for original, restored in zip(frames, store.iter_frames()):
+            assert restored['frame_id'] == original['frame_id']
+            assert restored['ball_position'] == original['ball_position']
+            assert restored['ball_detected'] == original['ball_detected']
+            assert restored['possession']['player_id'] == original['possession']['player_id']
+            assert [p['track_id'] for p in restored['tracked_players']] == [
+                int(p['track_id']) for p in original['tracked_players']
+            ]
+            assert [p['bbox'] for p in restored['tracked_players']] == [
+                p['bbox'] for p in original['tracked_players']
+            ]
+    
+    def test_frame_slice(self, tmp_path):
+        """Test slicing frames and their player rows."""
+        writer = FrameStoreWriter(str(tmp_path / "store"))
+        for frame in self._frames():
+            writer.write(frame)
+        writer.close()
+        
+        store = FrameStore(str(tmp_path / "store"))
+        window = store.frame_slice(store.index_of(3), store.index_of(6))
+        
+        assert window['frame_id'].tolist() == [3, 4, 5]
+        assert window['player_offsets'].tolist() == [0, 2, 2, 3]
+        assert window['track_id'].tolist() == [1, 2, 1]
+        assert np.isnan(window['ball_position'][1]).all()
+    
+    def test_rewrite_invalidates_old_store(self, tmp_path):
+        """Test that an interrupted rewrite does not leave the old store readable."""
+        directory = str(tmp_path / "store")
+        writer = FrameStoreWriter(directory)
+        for frame in self._frames():
+            writer.write(frame)
+        writer.close()
+        assert FrameStore.exists(directory)
+        
+        # A rerun that crashes before close
+        writer = FrameStoreWriter(directory, flush_every=1)
+        writer.write(self._frames()[0])
+        assert not FrameStore.exists(directory)
+        with pytest.raises(FileNotFoundError):
+            FrameStore(directory)
+    
+    def test_empty_store(self, tmp_path):
+        """Test that an empty store can be opened."""
+        FrameStoreWriter(str(tmp_path / "empty")).close()
+        store = FrameStore(str(tmp_path / "empty"))
+        assert len(store) == 0
+        assert list(store.iter_frames()) == []
+
+
+class TestVideoIO:
+    """Test range decoding and video writers."""
+    
+    def test_range_matches_sequential_decode(self, sample_video):
+        """Test that a seeked range returns the same frames as decoding from the start."""
+        with VideoReader(sample_video) as reader:
+            frames = [frame for _, frame in reader]
+        assert len(frames) == 6
+        
+        with VideoReader(sample_video, start_frame=2, stop_frame=5, prefetch=2) as reader:
+            decoded = list(reader)
+            assert reader.timestamp(3) == pytest.approx(0.1)
+            assert reader.frame_index(0.1) == 3
+        
+        assert [index for index, _ in decoded] == [2, 3, 4]
+        for index, frame in decoded:
+            np.testing.assert_array_equal(frame, frames[index])
+    
+    def test_read_at_and_downscale(self, sample_video):
+        """Test single-frame seeks and downscaling while decoding."""
+        with VideoReader(sample_video, max_width=80, threads=1) as reader:
+            assert (reader.width, reader.height) == (80, 60)
+            frame = reader.read_at(4)
+            assert frame.shape == (60, 80, 3)
+            assert reader.read_at(10) is None
+    
+    def test_inexact_seek_decodes_from_nearby_frame(self, sample_video):
+        """Test that inexact seeks decode forward from a nearby frame, not from the start."""
+        class KeyframeCapture:
+            """Seeks land on a keyframe every 10 frames, before or after the target."""
+            
+            def __init__(self, round_up):
+                self.round_up = round_up
+                self.position = 0
+                self.grabs = 0
+            
+            def get(self, prop):
+                return self.position
+            
+            def set(self, prop, value):
+                keyframe = -(-value // 10) if self.round_up else value // 10
+                self.position = int(keyframe * 10)
+            
+            def grab(self):
+                self.position += 1
+                self.grabs += 1
+                return True
+            
+            def release(self):
+                pass
+        
+        with VideoReader(sample_video) as reader:
+            for round_up, grabs in [(False, 5), (True, 25)]:
+                reader._cap.release()
+                reader._cap = KeyframeCapture(round_up)
+                reader._seek(95)
+                assert reader._cap.position == 95
+                assert reader._cap.grabs == grabs
+    
+    def test_early_stop_joins_decoder(self, sample_video):
+        """Test that abandoning a prefetched iteration stops the decode thread."""
+        reader = VideoReader(sample_video, prefetch=1)
+        for _ in reader:
+            break
+        reader.close()
+        assert reader._decoder is None
+    
+    def test_mp4v_writer(self, sample_video, tmp_path):
+        """Test writing through the OpenCV fallback codec."""
+        output = tmp_path / "out.mp4"
+        writer = open_video_writer(str(output), 30, (160, 120), codec='mp4v')
+        with VideoReader(sample_video) as reader:
+            for _, frame in reader:
+                writer.write(frame)
+        writer.release()
+        
+        with VideoReader(str(output)) as written:
+            assert written.total_frames == 6
+        with pytest.raises(ValueError):
+            open_video_writer(str(output), 30, (160, 120), codec='vp9')
+    
+    @pytest.mark.skipif(shutil.which('ffmpeg') is None, reason="ffmpeg not installed")
+    def test_h264_writer(self, sample_video, tmp_path):
+        """Test H.264 encoding through the ffmpeg pipe."""
+        output = tmp_path / "out.mp4"
+        writer = open_video_writer(str(output), 30, (160, 120), preset='ultrafast')
+        assert isinstance(writer, FFmpegVideoWriter)
+        with VideoReader(sample_video) as reader:
+            for _, frame in reader:
+                writer.write(frame)
+        writer.release()
+        
+        with VideoReader(str(output)) as written:
+            assert written.total_frames == 6
+    
+    def test_ffmpeg_stderr_does_not_block(self, tmp_path):
+        """Test that a chatty encoder cannot stall writes, and its errors are reported."""
+        import sys
+        
+        # Stand-in for ffmpeg: floods stderr before reading any input
+        encoder = tmp_path / "fake-ffmpeg"
+        encoder.write_text(
+            f"#!{sys.executable}\n"
+            "import sys\n"
+            "sys.stderr.write('x' * (1 << 20) + 'encoder failed')\n"
+            "sys.stderr.flush()\n"
+            "sys.stdin.buffer.read()\n"
+            "sys.exit(1)\n"
+        )
+        encoder.chmod(0o755)
+        
+        writer = FFmpegVideoWriter(str(tmp_path / "out.mp4"), 30, (160, 120), binary=str(encoder))
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        for _ in range(20):
+            writer.write(frame)
+        with pytest.raises(RuntimeError, match="encoder failed"):
+            writer.release()
+
+
+class TestFrameDumpWriter:
+    """Test the background frame dump writer."""
+    
+    def _results(self, events):
+        return {'processing_metadata': {'events_detected': events}}
+    
+    def test_stride_and_event_filter(self, tmp_path):
+        """Test which frames are selected for dumping."""
+        every_other = FrameDumpWriter(str(tmp_path), stride=2)
+        assert [every_other.wants(i, self._results(0)) for i in range(4)] == [True, False, True, False]
+        
+        events_only = FrameDumpWriter(str(tmp_path), events_only=True)
+        assert not events_only.wants(0, self._results(0))
+        assert events_only.wants(1, self._results(1))
+        
+        with pytest.raises(ValueError):
+            FrameDumpWriter(str(tmp_path), image_format='gif')
+    
+    def test_backpressure_accounting(self, tmp_path, monkeypatch):
+        """Test that waiting on a full queue is counted and every frame is written."""
+        import vision.frame_dump as frame_dump
+        
+        release = threading.Event()
+        imwrite = frame_dump.cv2.imwrite
+        monkeypatch.setattr(frame_dump.cv2, 'imwrite',
+                            lambda *args: release.wait() and imwrite(*args))
+        
+        writer = FrameDumpWriter(str(tmp_path / "frames"), image_format='png', workers=1, queue_size=1)
+        image = np.zeros((8, 8, 3), dtype=np.uint8)
+        writer.submit(0, image)
+        writer.submit(1, image)
+        threading.Timer(0.05, release.set).start()
+        # The worker holds frame 0 and frame 1 fills the queue, so this blocks
+        writer.submit(2, image)
+        writer.close()
+        
+        assert writer.stats['frames_written'] == 3
+        assert writer.stats['backpressure_waits'] >= 1
+        assert writer.stats['backpressure_seconds'] > 0
+        assert sorted(p.name for p in (tmp_path / "frames").iterdir()) == [
+            'frame_000000.png', 'frame_000001.png', 'frame_000002.png'
+        ]
+    
+    def test_process_video_dumps_frames(self, sample_video, tmp_path):
+        """Test that process_video dumps strided frames and reports the stats."""
+        processor = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path))
+        frame_dump = FrameDumpWriter(str(tmp_path / "frames"), stride=2, quality=50)
+        results = processor.process_video(
+            sample_video, output_json_path=str(tmp_path / "out.json"), frame_dump=frame_dump
+        )
+        
+        assert sorted(p.name for p in (tmp_path / "frames").iterdir()) == [
+            'frame_000000.jpg', 'frame_000002.jpg', 'frame_000004.jpg'
+        ]
+        assert results['frame_dump_stats']['frames_written'] == 3
+        assert results['frame_dump_stats']['frames_skipped'] == 3
+
+
+class TestStreamingJSON:
+    """Test the streaming JSON serializer for analysis results."""
+    
+    def _results(self):
+        from collections import defaultdict
+        from vision.analytics import ShotAttempt
+        
+        heat_map = defaultdict(int)
+        heat_map[(50, 100)] += 3
+        shot = ShotAttempt(1.0, 30, 2, (np.float32(120.0), 80.0), [(1.0, 2.0)], 'paint', 0.9)
+        return {
+            'processing_summary': {'total_frames_processed': np.int64(40), 'ball_detection_rate': np.float32(0.5)},
+            'game_statistics': {'player_stats': {'2': {'heat_map': heat_map}}},
+            'frame_by_frame_data': [
+                {'frame_id': i, 'ball_position': np.array([1.0, 2.0]), 'ball_detected': np.bool_(True),
+                 'events': [{'type': 'shot_attempt', 'data': shot}] if i == 3 else []}
+                for i in range(10)
+            ]
+        }
+    
+    def test_matches_json_module(self):
+        """Test that chunked output is identical to json.dumps for plain data."""
+        import json
+        
+        data = {'a': [{'x': [1, 2], 'y': {'k': 'v'}} for _ in range(7)], 'b': {}, 'c': []}
+        for indent, separators in ((2, (',', ': ')), (None, (',', ':'))):
+            text = ''.join(StreamingJSONEncoder(indent, chunk_size=3).iterencode(data))
+            assert text == json.dumps(data, indent=indent, separators=separators)
+    
+    def test_numpy_dataclasses_and_tuple_keys(self, tmp_path):
+        """Test that pipeline values round-trip through a compact file."""
+        import json
+        
+        path = tmp_path / "results.json"
+        dump_json(self._results(), str(path), indent=None, chunk_size=4)
+        restored = json.loads(path.read_text())
+        
+        assert restored['processing_summary'] == {'total_frames_processed': 40, 'ball_detection_rate': 0.5}
+        assert restored['game_statistics']['player_stats']['2']['heat_map'] == {'50,100': 3}
+        assert [f['frame_id'] for f in restored['frame_by_frame_data']] == list(range(10))
+        assert restored['frame_by_frame_data'][0]['ball_position'] == [1.0, 2.0]
+        shot = restored['frame_by_frame_data'][3]['events'][0]['data']
+        assert shot['shot_position'] == [120.0, 80.0] and shot['made'] is None
+        assert json_key((np.int64(1), 2)) == '1,2'
+    
+    def test_save_json_results_gzip(self, processor, tmp_path):
+        """Test that a .gz results path is written compressed."""
+        import gzip
+        import json
+        
+        path = tmp_path / "results.json.gz"
+        processor.save_json_results(self._results(), str(path))
+        with gzip.open(path, 'rt') as f:
+            restored = json.load(f)
+        assert len(restored['frame_by_frame_data']) == 10
+
+
+class TestDeferredRender:
+    """Test on-demand rendering of annotated video from stored frame data."""
+    
+    def _summaries(self, count=6):
+        return [
+            {
+                'timestamp': i / 30.0,
+                'frame_id': i + 1,
+                'tracked_players': [
+                    {'track_id': 1, 'position': (35.0, 55.0), 'bbox': [20.0, 20.0, 50.0, 90.0]}
+                ],
+                'possession': {'player_id': 1},
+                'ball_position': (60.0 + 5 * i, 40.0),
+                'events': []
+            }
+            for i in range(count)
+        ]
+    
+    def test_render_time_range(self, sample_video, tmp_path):
+        """Test that a time range is rendered and summaries are matched by timestamp."""
+        import cv2
+        
+        output = tmp_path / "clip.mp4"
+        # Summaries of frames 2 and 3 only
+        stats = render_annotated_video(sample_video, self._summaries()[2:4], str(output),
+                                       start_time=1 / 30.0, end_time=5 / 30.0)
+        
+        assert stats['frames_written'] == 4
+        assert stats['frames_annotated'] == 2
+        assert output.exists()
+        assert not output.with_name("clip.part.mp4").exists()
+        
+        cap = cv2.VideoCapture(str(output))
+        assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 4
+        cap.release()
+    
+    def test_render_summary_draws(self):
+        """Test that a stored summary is drawn with its trajectory."""
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        summary = self._summaries()[3]
+        trajectory = np.array([[0.0, 60.0, 40.0, 1], [0.1, 75.0, 40.0, 4]])
+        
+        OverlayRenderer().render_summary(frame, summary, {}, ball_trajectory=trajectory, out=frame)
+        assert tuple(frame[85, 50]) == player_color(1)
+        assert tuple(frame[40, 64]) == (255, 255, 0)
+    
+    def test_cached_clip_reused(self, sample_video, tmp_path, monkeypatch):
+        """Test that a clip is rendered from the frame store once, then served from cache."""
+        monkeypatch.setenv('FRAME_STORE_DIR', str(tmp_path / "stores"))
+        writer = FrameStoreWriter(str(tmp_path / "stores" / "a1"))
+        for summary in self._summaries():
+            writer.write(summary)
+        writer.close()
+        
+        cache_root = str(tmp_path / "renders")
+        path = render_analysis_video("a1", sample_video, 2 / 30.0, None, cache_root=cache_root)
+        assert path == render_cache_path("a1", 2 / 30.0, None, cache_root)
+        assert path.exists()
+        
+        mtime = path.stat().st_mtime_ns
+        assert render_analysis_video("a1", "missing.mp4", 2 / 30.0, None, cache_root=cache_root) == path
+        assert path.stat().st_mtime_ns == mtime
+        
+        with pytest.raises(FileNotFoundError):
+            render_analysis_video("b2", sample_video, cache_root=cache_root)
+
+
+class TestDetectionCache:
+    """Test the content-addressed detection cache."""
+    
+    def _boxes(self, num_frames):
+        """Raw box arrays with a varying number of rows per frame."""
+        rng = np.random.default_rng(0)
+        return [rng.random((i % 4, 6)).astype(np.float32) for i in range(num_frames)]
+    
+    def _write(self, cache, key, boxes):
+        writer = cache.create(key)
+        writer.put(0, boxes[:3])
+        writer.put(3, boxes[3:])
+        writer.close()
+    
+    def test_roundtrip(self, tmp_path):
+        """Test that committed boxes read back unchanged."""
+        cache = DetectionCache(str(tmp_path))
+        boxes = self._boxes(7)
+        assert cache.open('video') is None
+        self._write(cache, 'video', boxes)
+        
+        entry = cache.open('video')
+        assert len(entry) == 7
+        assert entry.has(0, 7) and not entry.has(5, 3)
+        for original, restored in zip(boxes, entry.get(0, 7)):
+            np.testing.assert_array_equal(restored, original)
+    
+    def test_incomplete_run_is_discarded(self, tmp_path):
+        """Test that runs skipping frames or failing are not committed."""
+        cache = DetectionCache(str(tmp_path))
+        boxes = self._boxes(4)
+        
+        writer = cache.create('strided')
+        writer.put(0, boxes[:1])
+        writer.put(2, boxes[2:3])
+        writer.close()
+        
+        writer = cache.create('failed')
+        writer.put(0, boxes)
+        writer.abort()
+        
+        assert cache.open('strided') is None
+        assert cache.open('failed') is None
+        assert list(tmp_path.iterdir()) == []
+    
+    def test_lru_eviction(self, tmp_path):
+        """Test that least recently used entries are evicted past the size limit."""
+        import os
+        
+        cache = DetectionCache(str(tmp_path), max_bytes=10 ** 9)
+        boxes = self._boxes(50)
+        for i, key in enumerate(['a', 'b', 'c']):
+            self._write(cache, key, boxes)
+            os.utime(tmp_path / key / 'meta.json', (i, i))
+        
+        # Reading 'a' makes 'b' the least recently used entry
+        cache.open('a')
+        entry_size = cache.size_bytes() // 3
+        cache.max_bytes = 2 * entry_size
+        cache.evict()
+        
+        assert cache.open('b') is None
+        assert cache.open('a') is not None and cache.open('c') is not None
+    
+    def test_key_depends_on_content(self, tmp_path):
+        """Test that keys change with video content and model settings."""
+        video = tmp_path / 'video.mp4'
+        model = tmp_path / 'model.pt'
+        video.write_bytes(b'frames')
+        model.write_bytes(b'weights')
+        cache = DetectionCache(str(tmp_path / 'cache'))
+        
+        key = cache.key(str(video), str(model), 'torch', 640)
+        assert key == cache.key(str(video), str(model), 'torch', 640)
+        assert key != cache.key(str(video), str(model), 'onnx', 640)
+        assert key != cache.key(str(video), str(model), 'torch', 320)
+        assert key != cache.key(str(video), str(model), 'torch', 640, (320, 180))
+        
+        copy = tmp_path / 'copy.mp4'
+        copy.write_bytes(b'frames')
+        assert key == cache.key(str(copy), str(model), 'torch', 640)
+    
+    def test_reanalysis_uses_cache(self, sample_video, tmp_path):
+        """Test that a cached re-analysis matches a fresh run at a new threshold."""
+        cache = DetectionCache(str(tmp_path / 'cache'))
+        
+        first = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path))
+        first.process_video(sample_video, output_json_path=str(tmp_path / 'first.json'),
+                            visualize=False, detection_cache=cache)
+        assert len(cache.entries()) == 1
+        
+        cached = BasketballVideoProcessor(confidence_threshold=0.3, output_dir=str(tmp_path))
+        model_calls = []
+        predict = cached.detector.model.predict
+        cached.detector.model.predict = lambda *args: model_calls.append(args) or predict(*args)
+        cached_results = cached.process_video(
+            sample_video, output_json_path=str(tmp_path / 'cached.json'),
+            visualize=False, detection_cache=cache
+        )
+        assert model_calls == []
+        
+        fresh = BasketballVideoProcessor(confidence_threshold=0.3, output_dir=str(tmp_path))
+        fresh_results = fresh.process_video(
+            sample_video, output_json_path=str(tmp_path / 'fresh.json'), visualize=False
+        )
+        for cached_frame, fresh_frame in zip(cached_results['frame_by_frame_data'],
+                                             fresh_results['frame_by_frame_data']):
+            assert cached_frame['players_detected'] == fresh_frame['players_detected']
+            assert cached_frame['ball_detected'] == fresh_frame['ball_detected']
+    
+    def test_decode_width_misses_cache(self, sample_video, tmp_path):
+        """Test that decoding at another size does not reuse cached boxes."""
+        cache = DetectionCache(str(tmp_path / 'cache'))
+        
+        full = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path))
+        full.process_video(sample_video, output_json_path=str(tmp_path / 'full.json'),
+                           visualize=False, detection_cache=cache)
+        
+        downscaled = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path),
+                                              decode_width=80)
+        model_calls = []
+        predict = downscaled.detector.model.predict
+        downscaled.detector.model.predict = lambda *args: model_calls.append(args) or predict(*args)
+        downscaled.process_video(sample_video, output_json_path=str(tmp_path / 'small.json'),
+                                 visualize=False, detection_cache=cache)
+        
+        assert model_calls
+        assert len(cache.entries()) == 2
+
+
+class TestEnhancedStats:
+    """Test enhanced statistics calculation."""
+    
+    def _frames(self, processor):
+        """Two players walking; the ball sits next to player 1."""
+        frames = []
+        for i in range(4):
+            players = [
+                {'track_id': '1', 'center': [100.0 + 30 * i, 100.0], 'bbox': [0, 0, 1, 1]},
+                {'track_id': '2', 'center': [400.0, 100.0 + 40 * i], 'bbox': [0, 0, 1, 1]}
+            ][:1 if i == 3 else 2]
+            ball = {'center': [110.0 + 30 * i, 100.0], 'bbox': [0, 0, 1, 1]} if i % 2 == 0 else None
+            frames.append(processor._summarize_frame({
+                'frame_id': i + 1,
+                'timestamp': i * 0.5,
+                'detections': {'players': players, 'ball': ball},
+                'tracking': {'tracked_players': players, 'possession': {}},
+                'analytics': {'events': []}
+            }))
+        return frames
+    
+    def test_player_metrics(self, processor):
+        """Test distance, speed and touch metrics."""
+        stats = calculate_enhanced_stats({'frame_by_frame_data': self._frames(processor)})
+        player_1 = stats['player_metrics']['1']
+        player_2 = stats['player_metrics']['2']
+        
+        assert list(stats['player_metrics']) == ['1', '2']
+        assert player_1['distance_covered_m'] == 1.8
+        assert player_1['avg_speed_kmh'] == 4.32
+        assert player_1['ball_touches'] == 2
+        assert player_1['total_frames'] == 4
+        assert player_1['time_played_seconds'] == 1.5
+        assert player_2['distance_covered_m'] == 1.6
+        assert player_2['ball_touches'] == 0
+    
+    def test_legacy_summary_keys(self, processor):
+        """Test that summaries with ``center`` / ``ball_analysis`` still work."""
+        frames = []
+        for frame in self._frames(processor):
+            ball = frame.pop('ball_position')
+            frame['ball_analysis'] = {'position': ball} if ball else None
+            frame['tracked_players'] = [
+                {'track_id': int(p['track_id']), 'center': p['position']} for p in frame['tracked_players']
+            ]
+            frames.append(frame)
+        
+        legacy = calculate_enhanced_stats({'frame_by_frame_data': frames})
+        current = calculate_enhanced_stats({'frame_by_frame_data': self._frames(processor)})
+        assert legacy == current
+    
+    def test_frame_store_matches_summaries(self, processor, tmp_path):
+        """Test that stats read from a frame store match the summary path."""
+        frames = self._frames(processor)
+        writer = FrameStoreWriter(str(tmp_path / "store"))
+        for frame in frames:
+            writer.write(frame)
+        writer.close()
+        
+        from_store = calculate_enhanced_stats({}, FrameStore(str(tmp_path / "store")))
+        from_summaries = calculate_enhanced_stats({'frame_by_frame_data': frames})
+        assert from_store == from_summaries
+        assert from_store['player_metrics']['1']['distance_covered_m'] > 0
+
+
+class TestKeyframeScheduler:
+    """Test adaptive keyframe scheduling."""
+    
+    def _step(self, scheduler, ball=None, players=()):
+        """Run one frame through the scheduler and return whether it was a keyframe."""
+        keyframe = scheduler.is_keyframe()
+        detections = {'frame_shape': (480, 640, 3), 'ball': ball if keyframe else None}
+        tracking = {'tracked_players': [
+            {'track_id': track_id, 'center': center, 'confidence': 0.9, 'time_since_update': 0}
+            for track_id, center in players
+        ]}
+        scheduler.update(detections, tracking, keyframe)
+        return keyframe
+    
+    def _ball(self, x, y):
+        return {'bbox': [x - 5, y - 5, x + 5, y + 5], 'center': (x, y), 'confidence': 0.8, 'area': 100}
+    
+    def test_fixed_stride(self):
+        """Test that keyframes follow the stride when nothing happens."""
+        scheduler = KeyframeScheduler(stride=3)
+        pattern = [self._step(scheduler) for _ in range(7)]
+        
+        assert pattern == [True, False, False, True, False, False, True]
+        assert scheduler.stats['keyframes'] == 3
+    
+    def test_high_motion_forces_keyframe(self):
+        """Test that a fast-moving track forces the next frame to be a keyframe."""
+        scheduler = KeyframeScheduler(stride=4)
+        self._step(scheduler, players=[(1, (100.0, 100.0))])
+        self._step(scheduler, players=[(1, (200.0, 100.0))])
+        
+        assert scheduler.is_keyframe()
+        assert scheduler.stats['forced']['motion'] == 1
+    
+    def test_lost_ball_forces_keyframe(self):
+        """Test that losing the ball on a keyframe forces another keyframe."""
+        scheduler = KeyframeScheduler(stride=2)
+        self._step(scheduler, ball=self._ball(100.0, 100.0))
+        self._step(scheduler)
+        self._step(scheduler, ball=None)
+        
+        assert scheduler.is_keyframe()
+        assert scheduler.stats['forced']['ball_lost'] == 1
+    
+    def test_ball_extrapolation(self):
+        """Test that the ball is extrapolated from its last velocity."""
+        scheduler = KeyframeScheduler(stride=2, ball_motion_threshold=1.0)
+        self._step(scheduler, ball=self._ball(100.0, 100.0))
+        self._step(scheduler)
+        self._step(scheduler, ball=self._ball(110.0, 100.0))
+        
+        ball = scheduler.extrapolate_ball()
+        assert ball['interpolated'] is True
+        assert ball['center'] == (115.0, 100.0)
+        assert ball['bbox'] == [110.0, 95.0, 120.0, 105.0]
+    
+    def test_process_video_with_stride(self, sample_video, tmp_path):
+        """Test that strided processing still produces every frame."""
+        processor = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path))
+        results = processor.process_video(
+            sample_video, output_json_path=str(tmp_path / "out.json"), visualize=False,
+            detection_stride=3
+        )
+        
+        assert results['processing_summary']['total_frames_processed'] == 6
+        assert [f['frame_id'] for f in results['frame_by_frame_data']] == list(range(1, 7))
+        assert 2 <= results['keyframe_stats']['keyframes'] < 6
+
+
+class TestSegments:
+    """Test segmented processing helpers."""
+    
+    def test_plan_segments(self):
+        """Test that segments cover the video once with overlap."""
+        segments = plan_segments(100, 3, overlap_frames=10)
+        
+        assert [s['owned_start'] for s in segments] == [0, 33, 67]
+        assert [s['start'] for s in segments] == [0, 23, 57]
+        assert segments[-1]['stop'] == 100
+        assert all(a['stop'] == b['owned_start'] for a, b in zip(segments, segments[1:]))
+    
+    def _segment(self, index, start, owned_start, stop, tracks):
+        """Build a segment result with one box per track moving right."""
+        frames = []
+        for i in range(start, stop):
+            frames.append({
+                'frame_index': i,
+                'frame_id': i + 1,
+                'tracked_players': [
+                    {'track_id': track_id, 'bbox': [x + i, 10.0, x + i + 20, 60.0]}
+                    for track_id, x in tracks.items()
+                ]
+            })
+        return {
+            'segment': {'index': index, 'start': start, 'owned_start': owned_start, 'stop': stop},
+            'frames': frames
+        }
+    
+    def test_match_overlap_tracks(self):
+        """Test that tracks are matched by their boxes in the overlap."""
+        first = self._segment(0, 0, 0, 10, {'1': 0.0, '2': 100.0})
+        second = self._segment(1, 6, 10, 20, {'5': 100.0, '7': 0.0, '9': 300.0})
+        
+        assert match_overlap_tracks(first['frames'], second['frames']) == {'5': '2', '7': '1'}
+    
+    def test_stitch_segments(self):
+        """Test that stitched frames carry global IDs and no duplicates."""
+        first = self._segment(0, 0, 0, 10, {'1': 0.0, '2': 100.0})
+        second = self._segment(1, 6, 10, 20, {'5': 100.0, '7': 0.0, '9': 300.0})
+        third = self._segment(2, 16, 20, 30, {'1': 300.0})
+        
+        frames = list(stitch_segments([first, second, third]))
+        
+        assert [f['frame_id'] for f in frames] == list(range(1, 31))
+        assert [p['track_id'] for p in frames[0]['tracked_players']] == [1, 2]
+        assert [p['track_id'] for p in frames[15]['tracked_players']] == [2, 1, 3]
+        assert [p['track_id'] for p in frames[25]['tracked_players']] == [3]
+    
+    def test_segmented_processing_matches_frames(self, sample_video, tmp_path):
+        """Test that segmented processing covers every frame exactly once."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        sequential = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path))
+        expected = sequential.process_video(
+            sample_video, output_json_path=str(tmp_path / "a.json"), visualize=False
+        )
+        
+        segmented = BasketballVideoProcessor(confidence_threshold=0.1, output_dir=str(tmp_path))
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = segmented.process_video_segmented(
+                sample_video, output_json_path=str(tmp_path / "b.json"),
+                num_segments=2, overlap_frames=2, executor=executor
+            )
+        
+        assert [f['frame_id'] for f in results['frame_by_frame_data']] == [
+            f['frame_id'] for f in expected['frame_by_frame_data']
+        ]
+        assert [f['timestamp'] for f in results['frame_by_frame_data']] == [
+            f['timestamp'] for f in expected['frame_by_frame_data']
+        ]
+        assert results['processing_summary']['total_frames_processed'] == 6
+        assert (results['processing_summary']['frames_with_ball_detected'] ==
+                expected['processing_summary']['frames_with_ball_detected'])
+
+
+class TestStagePipeline:
+    """Test the threaded stage pipeline."""
+    
+    def test_stages_preserve_order(self):
+        """Test that items flow through stages in input order."""
+        pipeline = StagePipeline(queue_size=2)
+        source = pipeline.source('source', range(50))
+        doubled = pipeline.stage('double', lambda x: x * 2, source)
+        
+        collected = []
+        sink_queue = pipeline.new_queue()
+        pipeline.sink('collect', collected.append, sink_queue)
+        for item in pipeline.drain(doubled):
+            pipeline.put(sink_queue, item + 1)
+        pipeline.close(sink_queue)
+        pipeline.join()
+        
+        assert collected == [x * 2 + 1 for x in range(50)]
+    
+    def test_stage_error_is_raised(self):
+        """Test that a failing stage stops the pipeline and re-raises."""
+        def fail_on_three(x):
+            if x == 3:
+                raise RuntimeError("stage failed")
+            return x
+        
+        pipeline = StagePipeline(queue_size=1)
+        source = pipeline.source('source', range(100))
+        checked = pipeline.stage('check', fail_on_three, source)
+        
+        consumed = list(pipeline.drain(checked))
+        assert consumed == [0, 1, 2]
+        with pytest.raises(RuntimeError, match="stage failed"):
+            pipeline.join()
+
+
 class TestModelsIntegration:
     """Test Pydantic models work with actual data."""
     
@@ -8,7 +8,8 @@ from sqlalchemy.orm import sessionmaker
 
 from backend.app.main import app
 from backend.app.database import get_db, Base
-from backend.app import crud
+from backend.app import crud, db_models
+from backend.app.models import VideoAnalysisResult
 
 
 # Create test database
@@ -30,8 +31,11 @@ client = TestClient(app)
 
 
 @pytest.fixture(scope="function")
-def setup_database():
+def setup_database(monkeypatch):
     """Setup clean database for each test."""
+    # Other test modules install their own override when imported; make
+    # sure the API reads the database seeded here
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
     # Drop all tables and recreate
     Base.metadata.drop_all(bind=engine)
     Base.metadata.create_all(bind=engine)
@@ -105,6 +109,122 @@ class TestDatabaseIntegration:
         
         db.close()
 
+    def _results(self, num_frames=12):
+        """Build analysis results with rows for every detail table."""
+        return VideoAnalysisResult(**{
+            'video_metadata': {'video_path': '/path/to/video.mp4', 'fps': 30.0, 'width': 640,
+                               'height': 480, 'total_frames': num_frames, 'duration_seconds': num_frames / 30.0},
+            'processing_summary': {'total_frames_processed': num_frames, 'frames_with_ball_detected': 3,
+                                   'ball_detection_rate': 0.25, 'total_events_detected': 2,
+                                   'unique_players_tracked': 2},
+            'game_statistics': {'player_stats': {1: {'track_id': 1, 'time_in_zones': {'paint': 1.5}},
+                                                 2: {'track_id': 2}}},
+            'frame_by_frame_data': [{'frame_id': i + 1, 'timestamp': i / 30.0, 'events': []}
+                                    for i in range(num_frames)],
+            'shot_attempts': [{'timestamp': 0.1, 'frame_id': 3, 'shooter_id': 1, 'shot_position': (10.0, 20.0),
+                               'trajectory': [(10.0, 20.0), (12.0, 15.0)], 'shot_zone': 'paint',
+                               'confidence': 0.8, 'made': None}],
+            'possession_events': [{'timestamp': 0.2, 'frame_id': 6, 'player_id': 2, 'previous_player_id': 1,
+                                   'ball_position': (30.0, 40.0)}]
+        })
+
+    def test_update_analysis_results_bulk(self, setup_database):
+        """Test that the bulk path stores the same rows as the ORM path."""
+        db = TestingSessionLocal()
+        
+        for bulk in (True, False):
+            analysis_id = f"test-bulk-{bulk}-{uuid.uuid4()}"
+            crud.create_analysis(db, analysis_id, "/path/to/video.mp4")
+            analysis = crud.update_analysis_results(db, analysis_id, self._results(), bulk=bulk, chunk_size=5)
+            
+            assert analysis.status == "completed"
+            assert analysis.frames_processed == 12
+            assert len(analysis.frames) == 12
+            assert sorted(p.track_id for p in analysis.players) == [1, 2]
+            assert analysis.players[0].time_in_zones == {'paint': 1.5}
+            assert analysis.shots[0].trajectory == [[10.0, 20.0], [12.0, 15.0]]
+            assert analysis.shots[0].made is None
+            assert analysis.possessions[0].ball_position_y == 40.0
+        
+        db.close()
+
+    def test_update_analysis_results_bulk_rolls_back(self, setup_database):
+        """Test that a failed bulk store leaves no partial rows behind."""
+        db = TestingSessionLocal()
+        
+        analysis_id = f"test-rollback-{uuid.uuid4()}"
+        crud.create_analysis(db, analysis_id, "/path/to/video.mp4")
+        frames = [{'frame_id': 1, 'timestamp': 0.0}, {'frame_id': 2, 'timestamp': None}]
+        
+        with pytest.raises(Exception):
+            crud.update_analysis_results(db, analysis_id, self._results(), frame_data=frames, chunk_size=1)
+        
+        assert db.query(db_models.FrameData).count() == 0
+        assert db.query(db_models.Player).count() == 0
+        assert crud.get_analysis(db, analysis_id).status == "processing"
+        
+        db.close()
+
+    def test_copy_rows_keeps_null_distinct(self):
+        """Test that COPY data only encodes None as NULL, never a string value."""
+        copied = []
+
+        class FakeCursor:
+            def copy_expert(self, sql, buffer):
+                copied.append((sql, buffer.read()))
+
+            def close(self):
+                pass
+
+        class FakeSession:
+            def connection(self):
+                connection = type("Connection", (), {})()
+                connection.connection = type("DBAPIConnection", (), {"cursor": lambda self: FakeCursor()})()
+                return connection
+
+        row = {'analysis_id': '\\N', 'frame_id': 1, 'timestamp': None,
+               'detections': None, 'events': ['hi'], 'ball_analysis': None}
+        assert crud._copy_rows(FakeSession(), db_models.FrameData.__table__, [row])
+
+        sql, data = copied[0]
+        assert "NULL" not in sql
+        assert data == '"\\N","1",,,"[""hi""]",\n'
+
+    def test_throttled_progress_updater(self, setup_database):
+        """Test that progress is published at most once per interval."""
+        from workers.video_processor import ThrottledProgressUpdater
+        
+        class FakeJob:
+            def __init__(self):
+                self.meta = {}
+                self.saves = 0
+            
+            def save_meta(self):
+                self.saves += 1
+        
+        db = TestingSessionLocal()
+        analysis_id = f"test-progress-{uuid.uuid4()}"
+        crud.create_analysis(db, analysis_id, "/path/to/video.mp4")
+        
+        job = FakeJob()
+        updater = ThrottledProgressUpdater(db, analysis_id, job=job, min_interval=60.0)
+        for frame in range(1, 11):
+            updater(frame, 40)
+        
+        # Only the first call is published inside the interval
+        assert job.saves == 1
+        assert crud.get_analysis(db, analysis_id).frames_processed == 1
+        
+        updater.flush()
+        db.expire_all()
+        analysis = crud.get_analysis(db, analysis_id)
+        assert job.saves == 2
+        assert job.meta == {'progress': 0.25, 'frames_processed': 10, 'total_frames': 40}
+        assert analysis.frames_processed == 10
+        assert analysis.total_frames == 40
+        
+        db.close()
+
 
 class TestAPIEndpoints:
     """Test API endpoints."""
@@ -146,6 +266,137 @@ class TestAPIEndpoints:
         response = client.delete("/analyze/does-not-exist")
         assert response.status_code == 404
 
+    def test_delete_analysis_removes_files(self, setup_database, tmp_path, monkeypatch):
+        """Test that deleting an analysis removes its frame store and rendered clips."""
+        monkeypatch.setenv("FRAME_STORE_DIR", str(tmp_path / "frame_stores"))
+        monkeypatch.setenv("RENDER_CACHE_DIR", str(tmp_path / "renders"))
+        analysis_id = f"test-delete-{uuid.uuid4()}"
+        db = TestingSessionLocal()
+        crud.create_analysis(db, analysis_id, "/path/to/video.mp4")
+        db.close()
+        
+        store = tmp_path / "frame_stores" / analysis_id
+        clip = tmp_path / "renders" / analysis_id / "start-end.mp4"
+        store.mkdir(parents=True)
+        clip.parent.mkdir(parents=True)
+        clip.write_bytes(b"video")
+        
+        response = client.delete(f"/analyze/{analysis_id}")
+        assert response.status_code == 200
+        assert not store.exists()
+        assert not clip.parent.exists()
+
+    def test_video_render_job_is_reused(self, setup_database, tmp_path, monkeypatch):
+        """Test that repeated clip requests return the queued render job."""
+        from rq.exceptions import NoSuchJobError
+        from rq.job import JobStatus
+        from backend.app import main
+
+        monkeypatch.setenv("FRAME_STORE_DIR", str(tmp_path / "frame_stores"))
+        monkeypatch.setenv("RENDER_CACHE_DIR", str(tmp_path / "renders"))
+        analysis_id = f"test-video-{uuid.uuid4()}"
+        db = TestingSessionLocal()
+        crud.create_analysis(db, analysis_id, "/path/to/video.mp4")
+        db.close()
+        store = tmp_path / "frame_stores" / analysis_id
+        store.mkdir(parents=True)
+        (store / "meta.json").write_text("{}")
+
+        jobs = {}
+
+        class FakeJob:
+            def __init__(self, job_id):
+                self.id = job_id
+
+            def get_status(self):
+                return JobStatus.QUEUED
+
+        class FakeQueue:
+            def enqueue(self, func, *args, job_id=None, **kwargs):
+                jobs[job_id] = FakeJob(job_id)
+                return jobs[job_id]
+
+        def fetch(job_id, connection=None):
+            if job_id not in jobs:
+                raise NoSuchJobError(job_id)
+            return jobs[job_id]
+
+        monkeypatch.setattr(main, "job_queue", FakeQueue())
+        monkeypatch.setattr(main.Job, "fetch", fetch)
+
+        first = client.get(f"/analyze/{analysis_id}/video", params={"start": 1.5, "end": 3})
+        second = client.get(f"/analyze/{analysis_id}/video", params={"start": 1.5, "end": 3})
+        other = client.get(f"/analyze/{analysis_id}/video")
+        assert first.json()["job_id"] == second.json()["job_id"]
+        assert other.json()["job_id"] != first.json()["job_id"]
+        assert len(jobs) == 2
+
+    def test_processor_cached_per_backend(self, monkeypatch):
+        """Test that one processor per backend is created with the configured model."""
+        from backend.app import main
+
+        created = []
+
+        class FakeProcessor:
+            def __init__(self, **kwargs):
+                created.append(kwargs)
+
+        monkeypatch.setattr(main, "BasketballVideoProcessor", FakeProcessor)
+        monkeypatch.setattr(main, "processors", {})
+        monkeypatch.setattr(main, "processor_locks", {})
+        monkeypatch.setattr(main, "processor", None)
+        monkeypatch.setattr(main, "MODEL_PATH", "models/custom.pt")
+        monkeypatch.setattr(main, "CALIBRATION_VIDEO", "calibration.mp4")
+
+        onnx = main.get_processor("onnx-int8")
+        assert main.get_processor("onnx-int8") is onnx
+        assert main.get_processor("torch") is not onnx
+        assert [kwargs["backend"] for kwargs in created] == ["onnx-int8", "torch"]
+        assert created[0]["model_path"] == "models/custom.pt"
+        assert created[0]["calibration_video"] == "calibration.mp4"
+
+    def test_shared_processor_runs_one_analysis_at_a_time(self, monkeypatch):
+        """Test that concurrent analyses on one backend do not overlap."""
+        import threading
+        import time
+        from backend.app import main
+        from backend.app.models import AnalysisRequest
+
+        running = []
+        overlaps = []
+        seen = {}
+
+        class FakeProcessor:
+            def __init__(self, **kwargs):
+                self.detector = type("Detector", (), {"confidence_threshold": 0.25})()
+
+            def process_video(self, video_path, **kwargs):
+                running.append(video_path)
+                overlaps.append(len(running))
+                threshold = self.detector.confidence_threshold
+                time.sleep(0.05)
+                seen[video_path] = (threshold, self.detector.confidence_threshold)
+                running.remove(video_path)
+                return {}
+
+        monkeypatch.setattr(main, "BasketballVideoProcessor", FakeProcessor)
+        monkeypatch.setattr(main, "processors", {})
+        monkeypatch.setattr(main, "processor_locks", {})
+        monkeypatch.setattr(main, "processor", None)
+
+        threads = [
+            threading.Thread(target=main.analyze_with_processor,
+                             args=(AnalysisRequest(video_path=f"{i}.mp4", confidence_threshold=0.1 * (i + 1)),))
+            for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert max(overlaps) == 1
+        assert seen == {f"{i}.mp4": (0.1 * (i + 1), 0.1 * (i + 1)) for i in range(3)}
+
 
 class TestFrontend:
     """Test frontend accessibility."""
@@ -6,6 +6,8 @@ from typing import List, Dict, Tuple, Optional
 from dataclasses import dataclass
 from collections import defaultdict
 
+from .proximity import nearest_player
+
 
 @dataclass
 class ShotAttempt:
@@ -264,7 +266,9 @@ class BasketballAnalytics:
     
     def _analyze_possession(self, tracking_results: Dict) -> Dict:
         """Analyze possession changes and duration."""
-        possession_info = tracking_results.get('possession', {})
+        possession_info = tracking_results.get('possession')
+        if possession_info is None:
+            possession_info = self._nearest_possession(tracking_results)
         current_player = possession_info.get('player_id')
         timestamp = tracking_results['timestamp']
         
@@ -314,6 +318,20 @@ class BasketballAnalytics:
         
         return analysis
     
+    def _nearest_possession(self, tracking_results: Dict) -> Dict:
+        """Possession from the player closest to the ball, for results without one."""
+        ball = tracking_results.get('ball_info')
+        players = tracking_results.get('tracked_players', [])
+        if not ball or not players:
+            return {}
+        
+        centers = np.array([player['center'] for player in players], dtype=np.float64)
+        index, _ = nearest_player(centers, ball['center'])
+        return {
+            'player_id': players[index]['track_id'] if index >= 0 else None,
+            'ball_position': ball['center']
+        }
+    
     def get_game_statistics(self) -> Dict:
         """Get comprehensive game statistics."""
         return {
@@ -0,0 +1,117 @@
+"""Second-stage ball detection on a crop around the ball's predicted position."""
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class BallROIRedetector:
+    """
+    Look for a missed ball in a small window around where it should be.
+    
+    When the full-frame pass finds no ball, the ball's position is
+    extrapolated from the tracker's trajectory and the detector runs again
+    on a crop around it. The crop is as large as the model input, so it is
+    seen at native resolution instead of being downscaled with the whole
+    frame, which is what makes the tiny ball hard to find. Once the ball
+    has not been seen for ``max_misses`` frames the prediction is no longer
+    trusted and only the full-frame pass is used until it finds the ball.
+    """
+    
+    def __init__(self, detector, roi_size: Optional[int] = None, max_misses: int = 15):
+        """
+        Initialize the re-detector.
+        
+        Args:
+            detector: ``BasketballDetector`` whose model and ball filters are used
+            roi_size: Side of the square crop in pixels (defaults to the
+                model input size, following later changes to it)
+            max_misses: Frames without a ball after which the ROI pass stops
+        """
+        self.detector = detector
+        self._roi_size = roi_size
+        self.max_misses = max_misses
+        
+        self.stats = {'roi_passes': 0, 'recovered': 0, 'skipped': 0}
+    
+    @property
+    def roi_size(self) -> int:
+        return self._roi_size or self.detector.model.imgsz
+    
+    def refine(self, frame: np.ndarray, detections: Dict, trajectory: np.ndarray) -> bool:
+        """
+        Fill in ``detections['ball']`` from an ROI pass if the full frame missed it.
+        
+        Args:
+            frame: Video frame the detections belong to
+            detections: Detection results for the frame (updated in place)
+            trajectory: Recent ball trajectory rows ``(timestamp, x, y,
+                frame_id)``, oldest first (see ``BasketballTracker``)
+        
+        Returns:
+            True if a ball was recovered
+        """
+        if detections['ball'] is not None or not len(trajectory):
+            return False
+        
+        height, width = frame.shape[:2]
+        if self.roi_size >= max(height, width):
+            # The full-frame pass already saw the frame at native resolution
+            return False
+        
+        center = self.predict_center(trajectory, detections['frame_id'])
+        if center is None:
+            self.stats['skipped'] += 1
+            return False
+        
+        x1, y1, x2, y2 = self._roi(center, width, height)
+        self.stats['roi_passes'] += 1
+        boxes = self.detector.predict_raw([frame[y1:y2, x1:x2]], self.detector.confidence_threshold)[0]
+        if not len(boxes):
+            return False
+        
+        boxes = boxes.copy()
+        boxes[:, [0, 2]] += x1
+        boxes[:, [1, 3]] += y1
+        _, ball = self.detector._filter_detections(boxes[:, :4], boxes[:, 4], boxes[:, 5], frame.shape)
+        if ball is None:
+            return False
+        
+        ball['roi'] = True
+        detections['ball'] = ball
+        self.stats['recovered'] += 1
+        return True
+    
+    def predict_center(self, trajectory: np.ndarray, frame_id: int) -> Optional[Tuple[float, float]]:
+        """
+        Extrapolate the ball center to a frame with constant velocity.
+        
+        Args:
+            trajectory: Recent ball trajectory rows, oldest first
+            frame_id: Frame to predict
+        
+        Returns:
+            Predicted (x, y), or None if the last sighting is more than
+            ``max_misses`` frames old
+        """
+        _, x, y, last_frame = trajectory[-1]
+        gap = frame_id - last_frame
+        if gap > self.max_misses:
+            return None
+        
+        if len(trajectory) > 1:
+            _, previous_x, previous_y, previous_frame = trajectory[-2]
+            steps = last_frame - previous_frame
+            if steps > 0:
+                x += (x - previous_x) / steps * gap
+                y += (y - previous_y) / steps * gap
+        
+        return float(x), float(y)
+    
+    def _roi(self, center: Tuple[float, float], width: int, height: int) -> Tuple[int, int, int, int]:
+        """Crop window of ``roi_size`` around a center, shifted to lie inside the frame."""
+        width_roi = min(self.roi_size, width)
+        height_roi = min(self.roi_size, height)
+        x1 = int(round(min(max(center[0] - width_roi / 2, 0), width - width_roi)))
+        y1 = int(round(min(max(center[1] - height_roi / 2, 0), height - height_roi)))
+        return x1, y1, x1 + width_roi, y1 + height_roi
@@ -0,0 +1,310 @@
+"""Persistent, content-addressed cache of raw per-frame detections."""
+
+import functools
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# Boxes are cached below any threshold used in practice, so a re-analysis
+# with a different confidence_threshold only re-filters them
+CACHE_CONFIDENCE = 0.05
+
+# Raw box rows: (x1, y1, x2, y2, confidence, class_id)
+BOX_DTYPE = '<f4'
+BOX_COLUMNS = 6
+
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+CACHE_VERSION = 1
+
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+@functools.lru_cache(maxsize=64)
+def _file_digest(path: str, size: int, mtime_ns: int) -> str:
+    """SHA-256 of a file; memoized on (path, size, mtime) within a process."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    """
+    Content hash of a file.
+    
+    Args:
+        path: File path
+    
+    Returns:
+        Hex SHA-256 digest
+    """
+    stat = os.stat(path)
+    return _file_digest(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+class CachedDetections:
+    """
+    Memory-mapped raw boxes of a complete cache entry.
+    
+    Frame ``i`` owns box rows ``offsets[i]:offsets[i + 1]``.
+    """
+    
+    def __init__(self, directory: str):
+        """
+        Open a cache entry.
+        
+        Args:
+            directory: Entry directory
+        
+        Raises:
+            FileNotFoundError: If the entry has no metadata
+        """
+        self.directory = Path(directory)
+        with open(self.directory / 'meta.json') as f:
+            self.meta = json.load(f)
+        
+        self.confidence = self.meta['confidence']
+        self.num_frames = self.meta['num_frames']
+        num_boxes = self.meta['num_boxes']
+        
+        self.offsets = np.memmap(self.directory / 'offsets.bin', dtype='<i8', mode='r',
+                                 shape=(self.num_frames + 1,))
+        if num_boxes:
+            self.boxes = np.memmap(self.directory / 'boxes.bin', dtype=BOX_DTYPE, mode='r',
+                                   shape=(num_boxes, BOX_COLUMNS))
+        else:
+            self.boxes = np.empty((0, BOX_COLUMNS), dtype=BOX_DTYPE)
+    
+    def __len__(self) -> int:
+        return self.num_frames
+    
+    def has(self, start: int, count: int) -> bool:
+        """Whether frames ``start:start + count`` are all cached."""
+        return start >= 0 and start + count <= self.num_frames
+    
+    def get(self, start: int, count: int) -> List[np.ndarray]:
+        """Raw (N, 6) box arrays of frames ``start:start + count``."""
+        return [
+            np.asarray(self.boxes[self.offsets[index]:self.offsets[index + 1]])
+            for index in range(start, start + count)
+        ]
+    
+    def put(self, start: int, boxes: List[np.ndarray]) -> None:
+        """Complete entries are read-only; frames past their end are not cached."""
+    
+    def close(self) -> None:
+        """Nothing to commit for a read-only entry."""
+    
+    def abort(self) -> None:
+        """Nothing to discard for a read-only entry."""
+
+
+class DetectionCacheWriter:
+    """
+    Record raw boxes of a processing run into a new cache entry.
+    
+    Frames must arrive in order starting at frame 0. If a frame is skipped
+    (e.g. keyframe-only detection), the entry could not serve a full run and
+    is discarded on ``close``.
+    """
+    
+    def __init__(self, cache: 'DetectionCache', key: str, confidence: float):
+        """
+        Start an entry in a temporary directory.
+        
+        Args:
+            cache: Owning cache
+            key: Entry key
+            confidence: Confidence threshold the boxes were predicted with
+        """
+        self.cache = cache
+        self.key = key
+        self.confidence = confidence
+        self.directory = cache.root / f"{key}.tmp-{os.getpid()}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        
+        self._boxes = open(self.directory / 'boxes.bin', 'wb')
+        self._offsets = open(self.directory / 'offsets.bin', 'wb')
+        self._offsets.write(np.zeros(1, dtype='<i8').tobytes())
+        
+        self.num_frames = 0
+        self.num_boxes = 0
+        self.complete = True
+        self._closed = False
+    
+    def has(self, start: int, count: int) -> bool:
+        """Nothing can be read back before the entry is committed."""
+        return False
+    
+    def get(self, start: int, count: int) -> List[np.ndarray]:
+        raise KeyError(f"Frames {start}:{start + count} are not cached yet")
+    
+    def put(self, start: int, boxes: List[np.ndarray]) -> None:
+        """
+        Append the raw boxes of frames ``start:start + len(boxes)``.
+        
+        Args:
+            start: Index of the first frame
+            boxes: One (N, 6) array per frame
+        """
+        if start != self.num_frames:
+            self.complete = False
+        if not self.complete:
+            return
+        
+        offsets = []
+        for frame_boxes in boxes:
+            rows = np.asarray(frame_boxes, dtype=BOX_DTYPE).reshape(-1, BOX_COLUMNS)
+            self._boxes.write(rows.tobytes())
+            self.num_boxes += len(rows)
+            offsets.append(self.num_boxes)
+        self._offsets.write(np.asarray(offsets, dtype='<i8').tobytes())
+        self.num_frames += len(boxes)
+    
+    def close(self) -> None:
+        """Commit the entry (if every frame was recorded) and enforce the size limit."""
+        if self._closed:
+            return
+        self._closed = True
+        self._boxes.close()
+        self._offsets.close()
+        
+        if not self.complete or self.num_frames == 0:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return
+        
+        meta = {
+            'version': CACHE_VERSION,
+            'confidence': self.confidence,
+            'num_frames': self.num_frames,
+            'num_boxes': self.num_boxes
+        }
+        with open(self.directory / 'meta.json', 'w') as f:
+            json.dump(meta, f, indent=2)
+        
+        target = self.cache.root / self.key
+        try:
+            os.replace(self.directory, target)
+        except OSError:
+            # Another run committed the same entry first
+            shutil.rmtree(self.directory, ignore_errors=True)
+            return
+        self.cache.evict(keep=self.key)
+    
+    def abort(self) -> None:
+        """Discard the entry, e.g. when processing failed part-way."""
+        self.complete = False
+        self.close()
+
+
+class DetectionCache:
+    """
+    On-disk cache of raw detections, keyed by video content, model and input size.
+    
+    Each entry holds every frame's NMS-filtered boxes at ``confidence``, so
+    later runs with a threshold at or above it skip inference and only
+    re-apply filtering, tracking and analytics. The cache is bounded to
+    ``max_bytes``; least recently used entries are evicted first.
+    """
+    
+    def __init__(self, root: Optional[str] = None, max_bytes: Optional[int] = None,
+                 confidence: float = CACHE_CONFIDENCE):
+        """
+        Initialize the cache.
+        
+        Args:
+            root: Cache directory (defaults to ``DETECTION_CACHE_DIR`` or
+                ``detection_cache``)
+            max_bytes: Size limit (defaults to ``DETECTION_CACHE_MAX_BYTES``
+                or 10 GiB)
+            confidence: Confidence threshold boxes are cached at
+        """
+        self.root = Path(root or os.getenv('DETECTION_CACHE_DIR', 'detection_cache'))
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes or os.getenv('DETECTION_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        self.confidence = confidence
+    
+    def key(self, video_path: str, model_path: str, backend: str, imgsz: int,
+            frame_size: Optional[Tuple[int, int]] = None) -> str:
+        """
+        Cache key of a video analysed with a model.
+        
+        Args:
+            video_path: Path to the video
+            model_path: Path to the model weights
+            backend: Inference backend name (backends differ slightly in output)
+            imgsz: Model input size
+            frame_size: Decoded (width, height) of the frames, which differs
+                from the source size when frames are downscaled on decode
+        
+        Returns:
+            Hex key
+        """
+        parts = [
+            file_digest(video_path),
+            file_digest(model_path),
+            backend,
+            str(imgsz),
+            f"{self.confidence:g}"
+        ]
+        if frame_size is not None:
+            parts.append('x'.join(str(int(side)) for side in frame_size))
+        return hashlib.sha256('|'.join(parts).encode()).hexdigest()
+    
+    def open(self, key: str) -> Optional[CachedDetections]:
+        """
+        Open a complete entry and mark it as recently used.
+        
+        Returns:
+            The entry, or None on a cache miss
+        """
+        directory = self.root / key
+        meta = directory / 'meta.json'
+        if not meta.exists():
+            return None
+        os.utime(meta)
+        return CachedDetections(str(directory))
+    
+    def create(self, key: str) -> DetectionCacheWriter:
+        """Start recording a new entry."""
+        return DetectionCacheWriter(self, key, self.confidence)
+    
+    def entries(self) -> List[Path]:
+        """Complete entries, least recently used first."""
+        entries = [path for path in self.root.iterdir() if (path / 'meta.json').exists()]
+        return sorted(entries, key=lambda path: (path / 'meta.json').stat().st_mtime)
+    
+    def size_bytes(self) -> int:
+        """Total size of the complete entries."""
+        return sum(_dir_size(entry) for entry in self.entries())
+    
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Delete least recently used entries until the cache fits ``max_bytes``.
+        
+        Args:
+            keep: Key of an entry that must not be evicted
+        """
+        entries = [(entry, _dir_size(entry)) for entry in self.entries()]
+        total = sum(size for _, size in entries)
+        
+        for entry, size in entries:
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+
+def _dir_size(directory: Path) -> int:
+    """Total size of the files in a directory."""
+    return sum(path.stat().st_size for path in directory.iterdir() if path.is_file())
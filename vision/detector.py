@@ -2,10 +2,12 @@
 
 import cv2
 import numpy as np
-from ultralytics import YOLO
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
+import threading
 import time
 
+from .backends import DEFAULT_IMGSZ, MODEL_STRIDE, create_backend
+
 
 class BasketballDetector:
     """YOLO-based detector optimized for basketball scenarios."""
@@ -27,17 +29,54 @@ class BasketballDetector:
         'free_throw_right': (0.81, 0.4, 1.0, 0.6),
     }
     
-    def __init__(self, model_path: str = 'yolov8n.pt', confidence_threshold: float = 0.25):
+    # Player filter criteria
+    PLAYER_MIN_HEIGHT_RATIO = 0.1   # At least 10% of frame height
+    PLAYER_MAX_HEIGHT_RATIO = 0.8   # At most 80% of frame height
+    PLAYER_MIN_ASPECT_RATIO = 1.2   # Players are typically taller than wide
+    PLAYER_MAX_ASPECT_RATIO = 4.0   # Not too thin
+    PLAYER_MIN_CONFIDENCE = 0.3
+    
+    # Basketball filter criteria
+    BALL_MIN_CONFIDENCE = 0.4
+    BALL_MIN_AREA = 100     # Minimum size (pixels^2)
+    BALL_MAX_AREA = 10000   # Maximum size (pixels^2)
+    
+    # Automatic input size selection
+    IMGSZ_CANDIDATES = (320, 416, 512, 640, 800, 960, 1280)
+    AUTO_IMGSZ_MIN_PLAYER_HEIGHT = 32   # Player height at model input (pixels)
+    AUTO_IMGSZ_PLAYER_PERCENTILE = 10   # Percentile of player heights that must reach it
+    
+    def __init__(self, model_path: str = 'yolov8n.pt', confidence_threshold: float = 0.25,
+                 backend: str = 'torch', threads: Optional[int] = None,
+                 calibration_video: Optional[str] = None, imgsz: Optional[int] = None):
         """
         Initialize the basketball detector.
         
         Args:
             model_path: Path to YOLO model weights
             confidence_threshold: Minimum confidence for detections
+            backend: Inference backend (``torch``, ``onnx``, ``openvino`` or
+                ``onnx-int8``); exported backends convert the weights once and
+                cache the artifact next to them
+            threads: Intra-op threads for the inference runtime
+            calibration_video: Video sampled to calibrate ``onnx-int8``
+            imgsz: Model input size, longest side (defaults to 640); see
+                ``select_imgsz`` to pick it per video
         """
-        self.model = YOLO(model_path)
+        self.model = create_backend(backend, model_path, threads, calibration_video,
+                                    imgsz or DEFAULT_IMGSZ)
+        self.model_path = model_path
+        self.backend = backend
         self.confidence_threshold = confidence_threshold
         self.frame_count = 0
+        self.zone_tables = {}  # Court zone geometry per frame resolution
+        # Raw box cache for the current video (see vision.detection_cache);
+        # frames are addressed by their index, frame_count - box_cache_offset
+        self.box_cache = None
+        self.box_cache_offset = 0
+        # Model calls can come from the detect stage and, for ball ROI
+        # re-detection, from the tracking thread
+        self.inference_lock = threading.Lock()
         
     def detect_frame(self, frame: np.ndarray, timestamp: float = None) -> Dict:
         """
@@ -52,11 +91,172 @@ class BasketballDetector:
         """
         if timestamp is None:
             timestamp = time.time()
-            
-        self.frame_count += 1
         
         # Run YOLO detection
-        results = self.model(frame, conf=self.confidence_threshold, verbose=False)
+        boxes = self._predict([frame])[0]
+        
+        return self._build_detections(frame, timestamp, boxes)
+    
+    def detect_batch(self, frames: List[np.ndarray],
+                     timestamps: Optional[List[float]] = None) -> List[Dict]:
+        """
+        Detect basketball-relevant objects in several frames with one model call.
+        
+        Batching lets the YOLO backbone amortize per-call overhead across
+        frames, which matters most on CPU-only workers. Each returned dict is
+        identical to what ``detect_frame`` would produce for that frame.
+        
+        Args:
+            frames: Input video frames, in presentation order
+            timestamps: Frame timestamps (defaults to the current time)
+        
+        Returns:
+            Detection results, one per input frame
+        """
+        if not frames:
+            return []
+        
+        if timestamps is None:
+            now = time.time()
+            timestamps = [now] * len(frames)
+        elif len(timestamps) != len(frames):
+            raise ValueError(
+                f"Got {len(timestamps)} timestamps for {len(frames)} frames"
+            )
+        
+        # Run YOLO detection on the whole batch; one box array per frame
+        boxes = self._predict(list(frames))
+        
+        return [
+            self._build_detections(frame, timestamp, frame_boxes)
+            for frame, timestamp, frame_boxes in zip(frames, timestamps, boxes)
+        ]
+    
+    def _predict(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+        """
+        Get raw boxes for the next frames, from the box cache when possible.
+        
+        With a cache attached, the model runs at the cache's lower
+        confidence so its output can be stored, and boxes are then filtered
+        to ``confidence_threshold``. NMS only lets a box be suppressed by a
+        higher-scoring one, so this matches predicting at the threshold.
+        
+        Args:
+            frames: Input video frames, in presentation order
+        
+        Returns:
+            One (N, 6) array of (x1, y1, x2, y2, conf, cls) per frame
+        """
+        cache = self.box_cache
+        if cache is None:
+            return self.predict_raw(frames, self.confidence_threshold)
+        
+        start = self.frame_count - self.box_cache_offset
+        if cache.has(start, len(frames)):
+            raw = cache.get(start, len(frames))
+        else:
+            raw = self.predict_raw(frames, cache.confidence)
+            cache.put(start, raw)
+        
+        return [boxes[boxes[:, 4] > self.confidence_threshold] for boxes in raw]
+    
+    def select_imgsz(self, frames: List[np.ndarray]) -> int:
+        """
+        Pick the smallest model input size at which players stay detectable.
+        
+        The sample frames are detected once at the largest useful size (no
+        larger than the frames themselves), and the smallest candidate size
+        that keeps the ``AUTO_IMGSZ_PLAYER_PERCENTILE``-th percentile of
+        player heights at ``AUTO_IMGSZ_MIN_PLAYER_HEIGHT`` pixels or more is
+        applied to the model. High-resolution uploads then stop paying for
+        pixels the model would downsample away anyway. Without any player in
+        the samples the current size is kept.
+        
+        Args:
+            frames: Frames sampled from the video (all of the same shape)
+        
+        Returns:
+            The selected input size
+        """
+        if not frames:
+            return self.model.imgsz
+        
+        longest_side = max(frames[0].shape[:2])
+        native = -(-longest_side // MODEL_STRIDE) * MODEL_STRIDE
+        candidates = [size for size in self.IMGSZ_CANDIDATES if size < native] + [native]
+        candidates = [size for size in candidates if size <= self.IMGSZ_CANDIDATES[-1]] or [native]
+        
+        current = self.model.imgsz
+        self.model.imgsz = candidates[-1]
+        try:
+            heights = []
+            for frame in frames:
+                boxes = self.predict_raw([frame], self.confidence_threshold)[0]
+                players = (boxes[:, 5].astype(np.int64) == 0) & self._player_mask(
+                    boxes[:, :4], boxes[:, 4].astype(np.float64), frame.shape
+                )
+                heights.extend(boxes[players, 3] - boxes[players, 1])
+        finally:
+            self.model.imgsz = current
+        
+        if not heights:
+            return current
+        
+        player_height = np.percentile(heights, self.AUTO_IMGSZ_PLAYER_PERCENTILE) / longest_side
+        self.model.imgsz = next(
+            (size for size in candidates if player_height * size >= self.AUTO_IMGSZ_MIN_PLAYER_HEIGHT),
+            candidates[-1]
+        )
+        return self.model.imgsz
+    
+    def predict_raw(self, frames: List[np.ndarray], conf: float) -> List[np.ndarray]:
+        """
+        Run the inference backend, one call at a time.
+        
+        Args:
+            frames: Input images
+            conf: Confidence threshold
+        
+        Returns:
+            One (N, 6) array of (x1, y1, x2, y2, conf, cls) per image
+        """
+        with self.inference_lock:
+            return self.model.predict(frames, conf)
+    
+    def skip_frame(self, frame: np.ndarray, timestamp: float = None) -> Dict:
+        """
+        Build an empty detection payload for a frame that is not run through YOLO.
+        
+        Frame IDs and court zones advance exactly as for ``detect_frame``, so
+        skipped frames fit between detected ones.
+        
+        Args:
+            frame: Input video frame
+            timestamp: Frame timestamp
+        
+        Returns:
+            Detection results with no players and no ball
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        
+        return self._build_detections(frame, timestamp, None)
+    
+    def _build_detections(self, frame: np.ndarray, timestamp: float,
+                          boxes: Optional[np.ndarray]) -> Dict:
+        """
+        Convert raw boxes for one frame into the detection payload.
+        
+        Args:
+            frame: Input video frame the boxes belong to
+            timestamp: Frame timestamp
+            boxes: Backend output for this frame, rows are
+                (x1, y1, x2, y2, conf, cls), or None when not detected
+        
+        Returns:
+            Detection results with bounding boxes and classifications
+        """
+        self.frame_count += 1
         
         detections = {
             'frame_id': self.frame_count,
@@ -65,38 +265,90 @@ class BasketballDetector:
             'players': [],
             'ball': None,
             'court_objects': [],
-            'court_zones': self._analyze_court_zones(frame)
+            'court_zones': self._analyze_court_zones(frame),
+            'zone_table_id': self._zone_table_id(frame.shape)
         }
         
         # Process detections
-        for result in results:
-            boxes = result.boxes
-            if boxes is not None:
-                for box in boxes:
-                    class_id = int(box.cls[0])
-                    confidence = float(box.conf[0])
-                    
-                    if class_id in self.BASKETBALL_CLASSES:
-                        bbox = box.xyxy[0].cpu().numpy()
-                        detection_info = {
-                            'bbox': bbox.tolist(),
-                            'confidence': confidence,
-                            'class_id': class_id,
-                            'class_name': self.BASKETBALL_CLASSES[class_id],
-                            'center': self._get_bbox_center(bbox),
-                            'area': self._get_bbox_area(bbox)
-                        }
-                        
-                        # Classify as player or ball
-                        if class_id == 0:  # person
-                            if self._is_likely_player(detection_info, frame.shape):
-                                detections['players'].append(detection_info)
-                        elif class_id == 32:  # sports ball
-                            if self._is_likely_basketball(detection_info):
-                                detections['ball'] = detection_info
+        if boxes is not None and len(boxes):
+            players, ball = self._filter_detections(
+                boxes[:, :4], boxes[:, 4], boxes[:, 5], frame.shape
+            )
+            detections['players'] = players
+            detections['ball'] = ball
         
         return detections
     
+    def _filter_detections(self, xyxy: np.ndarray, conf: np.ndarray, cls: np.ndarray,
+                           frame_shape: Tuple) -> Tuple[List[Dict], Optional[Dict]]:
+        """
+        Apply basketball class and geometry filters to a frame's raw boxes.
+        
+        All gates are evaluated as whole-array operations; Python dicts are
+        only built for boxes that survive. The result matches running
+        ``_is_likely_player``/``_is_likely_basketball`` on every box.
+        
+        Args:
+            xyxy: Box corners, shape (N, 4)
+            conf: Detection confidences, shape (N,)
+            cls: Class ids, shape (N,)
+            frame_shape: Shape of the input frame
+        
+        Returns:
+            Tuple of (player detections in box order, last qualifying ball or None)
+        """
+        class_ids = cls.astype(np.int64)
+        # Gates compare in float64, like the scalar checks on Python floats
+        conf64 = conf.astype(np.float64)
+        
+        centers = (xyxy[:, :2] + xyxy[:, 2:]) / 2
+        areas = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+        
+        player_mask = (class_ids == 0) & self._player_mask(xyxy, conf64, frame_shape)
+        ball_mask = (class_ids == 32) & self._basketball_mask(areas, conf64)
+        
+        def build(i: int) -> Dict:
+            class_id = int(class_ids[i])
+            return {
+                'bbox': xyxy[i].tolist(),
+                'confidence': float(conf[i]),
+                'class_id': class_id,
+                'class_name': self.BASKETBALL_CLASSES[class_id],
+                'center': (centers[i, 0], centers[i, 1]),
+                'area': areas[i]
+            }
+        
+        players = [build(i) for i in np.flatnonzero(player_mask)]
+        
+        # Later boxes overwrite earlier ones, so keep the last qualifying ball
+        ball_indices = np.flatnonzero(ball_mask)
+        ball = build(ball_indices[-1]) if len(ball_indices) else None
+        
+        return players, ball
+    
+    def _player_mask(self, xyxy: np.ndarray, conf: np.ndarray, frame_shape: Tuple) -> np.ndarray:
+        """Vectorized form of ``_is_likely_player`` over an (N, 4) box array."""
+        boxes = xyxy.astype(np.float64)
+        height = boxes[:, 3] - boxes[:, 1]
+        width = boxes[:, 2] - boxes[:, 0]
+        
+        aspect_ratio = np.zeros_like(height)
+        np.divide(height, width, out=aspect_ratio, where=width > 0)
+        
+        min_height = frame_shape[0] * self.PLAYER_MIN_HEIGHT_RATIO
+        max_height = frame_shape[0] * self.PLAYER_MAX_HEIGHT_RATIO
+        
+        return ((min_height <= height) & (height <= max_height) &
+                (self.PLAYER_MIN_ASPECT_RATIO <= aspect_ratio) &
+                (aspect_ratio <= self.PLAYER_MAX_ASPECT_RATIO) &
+                (conf > self.PLAYER_MIN_CONFIDENCE))
+    
+    def _basketball_mask(self, areas: np.ndarray, conf: np.ndarray) -> np.ndarray:
+        """Vectorized form of ``_is_likely_basketball`` over box areas."""
+        return ((conf > self.BALL_MIN_CONFIDENCE) &
+                (areas > self.BALL_MIN_AREA) &
+                (areas < self.BALL_MAX_AREA))
+    
     def _get_bbox_center(self, bbox: np.ndarray) -> Tuple[float, float]:
         """Calculate the center point of a bounding box."""
         x1, y1, x2, y2 = bbox
@@ -127,14 +379,12 @@ class BasketballDetector:
         aspect_ratio = height / width if width > 0 else 0
         
         # Filter criteria
-        min_height = frame_shape[0] * 0.1  # At least 10% of frame height
-        max_height = frame_shape[0] * 0.8  # At most 80% of frame height
-        min_aspect_ratio = 1.2  # Players are typically taller than wide
-        max_aspect_ratio = 4.0  # Not too thin
+        min_height = frame_shape[0] * self.PLAYER_MIN_HEIGHT_RATIO
+        max_height = frame_shape[0] * self.PLAYER_MAX_HEIGHT_RATIO
         
         return (min_height <= height <= max_height and 
-                min_aspect_ratio <= aspect_ratio <= max_aspect_ratio and
-                detection['confidence'] > 0.3)
+                self.PLAYER_MIN_ASPECT_RATIO <= aspect_ratio <= self.PLAYER_MAX_ASPECT_RATIO and
+                detection['confidence'] > self.PLAYER_MIN_CONFIDENCE)
     
     def _is_likely_basketball(self, detection: Dict) -> bool:
         """
@@ -147,24 +397,58 @@ class BasketballDetector:
             True if likely a basketball
         """
         # Basketball should have high confidence and reasonable size
-        return (detection['confidence'] > 0.4 and 
-                detection['area'] > 100 and  # Minimum size
-                detection['area'] < 10000)   # Maximum size
+        return (detection['confidence'] > self.BALL_MIN_CONFIDENCE and 
+                detection['area'] > self.BALL_MIN_AREA and
+                detection['area'] < self.BALL_MAX_AREA)
     
     def _analyze_court_zones(self, frame: np.ndarray) -> Dict:
         """
         Analyze court zones based on frame content.
         
+        Zone geometry only depends on the frame resolution, so it is computed
+        once per resolution and the same table is shared by every frame.
+        Callers must treat the returned dict as read-only.
+        
         Args:
             frame: Input video frame
             
         Returns:
             Court zone information
         """
-        h, w = frame.shape[:2]
+        zone_table_id = self._zone_table_id(frame.shape)
+        zones = self.zone_tables.get(zone_table_id)
+        if zones is None:
+            h, w = frame.shape[:2]
+            zones = self._build_zone_table(h, w)
+            self.zone_tables[zone_table_id] = zones
+        
+        return zones
+    
+    def get_zone_table(self, zone_table_id: str) -> Optional[Dict]:
+        """Get the shared court zone table referenced by a frame's ``zone_table_id``."""
+        return self.zone_tables.get(zone_table_id)
+    
+    @staticmethod
+    def _zone_table_id(frame_shape: Tuple) -> str:
+        """Identifier of the zone table for a frame resolution (``WxH``)."""
+        h, w = frame_shape[:2]
+        return f"{w}x{h}"
+    
+    @classmethod
+    def _build_zone_table(cls, h: int, w: int) -> Dict:
+        """
+        Convert the normalized court zones to pixel coordinates.
+        
+        Args:
+            h: Frame height in pixels
+            w: Frame width in pixels
+        
+        Returns:
+            Court zone information
+        """
         zones = {}
         
-        for zone_name, (x1, y1, x2, y2) in self.COURT_ZONES.items():
+        for zone_name, (x1, y1, x2, y2) in cls.COURT_ZONES.items():
             # Convert normalized coordinates to pixel coordinates
             pixel_coords = (
                 int(x1 * w), int(y1 * h),
@@ -0,0 +1,186 @@
+"""Batched appearance embedding of player crops for DeepSORT."""
+
+from typing import Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from .geometry import iou_matrix
+
+
+# Embedder input as (height, width). "default" matches deep_sort_realtime's
+# built-in MobileNetV2 embedder; "small" uses the same weights on a
+# player-shaped input with ~6x fewer pixels, which is plenty for jersey colors
+EMBEDDER_INPUT_SIZES = {
+    'default': (224, 224),
+    'small': (128, 64),
+}
+
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+class AppearanceEmbedder:
+    """
+    Embed all player crops of one or more frames with a single model call.
+    
+    An embedding is reused, without running the model, for a player whose
+    box barely moved since the previous frame (IoU >= ``reuse_iou``). Reused
+    embeddings are refreshed after ``max_reuse`` frames so appearance
+    changes are eventually picked up.
+    """
+    
+    def __init__(self, model: str = 'default', reuse_iou: float = 0.9, max_reuse: int = 10,
+                 max_batch_size: int = 64, threads: Optional[int] = None):
+        """
+        Load the MobileNetV2 embedder bundled with deep_sort_realtime.
+        
+        Args:
+            model: Input size preset, ``default`` or ``small``
+            reuse_iou: Minimum IoU with a previous box to reuse its embedding
+                (values above 1 disable reuse)
+            max_reuse: Maximum consecutive frames an embedding is reused
+            max_batch_size: Maximum crops per forward pass
+            threads: Torch intra-op threads (defaults to torch's own setting)
+        """
+        import torch
+        from deep_sort_realtime.embedder.embedder_pytorch import MOBILENETV2_BOTTLENECK_WTS
+        from deep_sort_realtime.embedder.mobilenetv2_bottle import MobileNetV2_bottle
+        
+        if model not in EMBEDDER_INPUT_SIZES:
+            raise ValueError(f"Unknown embedder model '{model}', expected one of "
+                             f"{tuple(EMBEDDER_INPUT_SIZES)}")
+        if threads:
+            torch.set_num_threads(threads)
+        
+        self.torch = torch
+        self.input_size = EMBEDDER_INPUT_SIZES[model]
+        self.model = MobileNetV2_bottle(input_size=224, width_mult=1.0)
+        self.model.load_state_dict(torch.load(MOBILENETV2_BOTTLENECK_WTS, map_location='cpu'))
+        self.model.eval()
+        
+        self.reuse_iou = reuse_iou
+        self.max_reuse = max_reuse
+        self.max_batch_size = max_batch_size
+        
+        # Boxes and embeddings of the last embedded frame, for reuse
+        self._previous_boxes = np.zeros((0, 4))
+        self._previous_embeds: List[np.ndarray] = []
+        self._previous_reuse = np.zeros(0, dtype=np.int64)
+        
+        self.stats = {'embedded': 0, 'reused': 0, 'calls': 0}
+    
+    def embed_frames(self, frames: Sequence[np.ndarray],
+                     detections: Sequence[Dict]) -> List[List[np.ndarray]]:
+        """
+        Embed the players of consecutive frames.
+        
+        Frames must be passed in presentation order, since reuse compares
+        each frame with the one embedded before it.
+        
+        Args:
+            frames: BGR frames
+            detections: Detection payloads of the frames
+        
+        Returns:
+            Per frame, one embedding per player (in ``players`` order)
+        """
+        crops = []
+        plans = []
+        
+        # Decide reuse from boxes alone, so every new crop of the whole
+        # batch goes through the model together
+        for frame, frame_detections in zip(frames, detections):
+            boxes = np.array([player['bbox'] for player in frame_detections['players']],
+                             dtype=np.float64).reshape(-1, 4)
+            sources, reuse_counts = self._plan_reuse(boxes)
+            
+            plan = []
+            for box, source in zip(boxes, sources):
+                if source is None:
+                    plan.append(('embed', len(crops)))
+                    crops.append(self._crop(frame, box))
+                else:
+                    plan.append(('reuse', source))
+            plans.append(plan)
+            
+            # The next frame compares with these boxes; embeddings are filled in below
+            self._previous_boxes = boxes
+            self._previous_reuse = reuse_counts
+        
+        features = self._embed(crops)
+        
+        results = []
+        previous_embeds = self._previous_embeds
+        for plan in plans:
+            embeds = [features[index] if kind == 'embed' else previous_embeds[index]
+                      for kind, index in plan]
+            results.append(embeds)
+            previous_embeds = embeds
+        self._previous_embeds = previous_embeds
+        
+        self.stats['embedded'] += len(crops)
+        self.stats['reused'] += sum(len(plan) for plan in plans) - len(crops)
+        return results
+    
+    def reset(self):
+        """Forget the previous frame (e.g. after seeking)."""
+        self._previous_boxes = np.zeros((0, 4))
+        self._previous_embeds = []
+        self._previous_reuse = np.zeros(0, dtype=np.int64)
+    
+    def _plan_reuse(self, boxes: np.ndarray):
+        """
+        Match boxes to the previous frame's to decide which embeddings to reuse.
+        
+        Returns:
+            Per box, None (embed) or the index of the previous box whose
+            embedding is reused, and the number of consecutive reuses per box
+        """
+        sources = [None] * len(boxes)
+        reuse_counts = np.zeros(len(boxes), dtype=np.int64)
+        if not len(boxes) or not len(self._previous_boxes):
+            return sources, reuse_counts
+        
+        iou = iou_matrix(boxes, self._previous_boxes)
+        best = iou.argmax(axis=1)
+        taken = set()
+        for i in np.argsort(-iou.max(axis=1)):
+            j = int(best[i])
+            if (iou[i, j] >= self.reuse_iou and j not in taken
+                    and self._previous_reuse[j] < self.max_reuse):
+                sources[i] = j
+                reuse_counts[i] = self._previous_reuse[j] + 1
+                taken.add(j)
+        return sources, reuse_counts
+    
+    def _crop(self, frame: np.ndarray, box: np.ndarray) -> np.ndarray:
+        """Crop a box from a frame (clipped to the frame, at least 1x1)."""
+        height, width = frame.shape[:2]
+        x1 = min(max(int(box[0]), 0), width - 1)
+        y1 = min(max(int(box[1]), 0), height - 1)
+        x2 = max(min(int(box[2]), width), x1 + 1)
+        y2 = max(min(int(box[3]), height), y1 + 1)
+        return frame[y1:y2, x1:x2]
+    
+    def _embed(self, crops: List[np.ndarray]) -> List[np.ndarray]:
+        """Run the model on crops, preprocessed as one NumPy batch."""
+        if not crops:
+            return []
+        
+        input_height, input_width = self.input_size
+        batch = np.stack([
+            cv2.resize(crop, (input_width, input_height), interpolation=cv2.INTER_LINEAR)
+            for crop in crops
+        ])
+        # BGR uint8 -> normalized RGB float, NCHW
+        batch = (batch[..., ::-1].astype(np.float32) / 255.0 - IMAGENET_MEAN) / IMAGENET_STD
+        batch = np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+        
+        features = []
+        with self.torch.inference_mode():
+            for start in range(0, len(batch), self.max_batch_size):
+                chunk = self.torch.from_numpy(batch[start:start + self.max_batch_size])
+                features.extend(self.model(chunk).numpy())
+                self.stats['calls'] += 1
+        return features
@@ -0,0 +1,181 @@
+"""Background writer for annotated frame images (``save_frames``)."""
+
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import cv2
+import numpy as np
+
+
+IMAGE_FORMATS = ('jpg', 'png', 'webp')
+DEFAULT_QUALITY = 90
+
+# Marker telling a worker thread to exit
+_STOP = object()
+
+
+class FrameDumpWriter:
+    """
+    Encode and save annotated frames on a pool of worker threads.
+    
+    Frames are handed over through a bounded queue, so the analysis loop
+    only pays for image encoding and disk I/O when the pool falls behind
+    and the queue is full. Time spent waiting for a free slot is recorded
+    in ``stats`` as back-pressure. ``stride`` and ``events_only`` pick
+    which frames are dumped at all; frames that are not dumped do not
+    need to be annotated.
+    """
+    
+    def __init__(self, output_dir: str, stride: int = 1, events_only: bool = False,
+                 image_format: str = 'jpg', quality: int = DEFAULT_QUALITY,
+                 workers: int = 2, queue_size: int = 16):
+        """
+        Initialize the writer.
+        
+        Args:
+            output_dir: Directory the images are written to (created if needed)
+            stride: Dump every n-th frame
+            events_only: Only dump frames with a detected event (shot,
+                possession change); combined with ``stride``, frames must
+                match both
+            image_format: ``jpg``, ``png`` or ``webp``
+            quality: JPEG/WebP quality (0-100); PNG uses its default compression
+            workers: Encoder threads (OpenCV encodes without holding the GIL)
+            queue_size: Maximum number of frames waiting to be written
+        
+        Raises:
+            ValueError: If the image format is unknown
+        """
+        if image_format not in IMAGE_FORMATS:
+            raise ValueError(f"Unknown image format: {image_format}. Choose from {', '.join(IMAGE_FORMATS)}")
+        
+        self.output_dir = Path(output_dir)
+        self.stride = max(1, int(stride))
+        self.events_only = events_only
+        self.image_format = image_format
+        self.quality = quality
+        self.workers = max(1, int(workers))
+        self.queue_size = max(1, int(queue_size))
+        
+        self.stats = {
+            'frames_written': 0,
+            'frames_skipped': 0,
+            'backpressure_waits': 0,
+            'backpressure_seconds': 0.0
+        }
+        self._queue = None
+        self._threads: List[threading.Thread] = []
+        self._errors: List[BaseException] = []
+        self._lock = threading.Lock()
+    
+    def wants(self, frame_index: int, frame_results: Dict) -> bool:
+        """
+        Whether a frame is to be dumped.
+        
+        Args:
+            frame_index: Zero-based index of the frame in the video
+            frame_results: Complete frame analysis
+        
+        Returns:
+            True if the frame passes the stride and event filters
+        """
+        if frame_index % self.stride:
+            return False
+        if self.events_only and not frame_results['processing_metadata']['events_detected']:
+            return False
+        return True
+    
+    def skip(self) -> None:
+        """Count a frame that was not dumped."""
+        with self._lock:
+            self.stats['frames_skipped'] += 1
+    
+    def submit(self, frame_index: int, image: np.ndarray) -> None:
+        """
+        Queue an annotated frame for writing.
+        
+        The image must not be modified afterwards; it is encoded later on a
+        worker thread. Blocks while the queue is full.
+        
+        Args:
+            frame_index: Zero-based index of the frame in the video
+            image: Annotated frame
+        
+        Raises:
+            Exception: The first error raised while writing an earlier frame
+        """
+        if self._errors:
+            raise self._errors[0]
+        if self._queue is None:
+            self._start()
+        
+        item = (frame_index, image)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            waited = time.perf_counter()
+            self._queue.put(item)
+            with self._lock:
+                self.stats['backpressure_waits'] += 1
+                self.stats['backpressure_seconds'] += time.perf_counter() - waited
+    
+    def close(self) -> None:
+        """
+        Write the queued frames and stop the worker threads.
+        
+        Raises:
+            Exception: The first error raised while writing a frame
+        """
+        if self._queue is not None:
+            for _ in self._threads:
+                self._queue.put(_STOP)
+            for thread in self._threads:
+                thread.join()
+            self._queue = None
+            self._threads = []
+        if self._errors:
+            raise self._errors[0]
+    
+    def frame_path(self, frame_index: int) -> Path:
+        """Where a frame is written."""
+        return self.output_dir / f"frame_{frame_index:06d}.{self.image_format}"
+    
+    def _start(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._queue = queue.Queue(maxsize=self.queue_size)
+        self._threads = [
+            threading.Thread(target=self._run, args=(self._queue,), name=f'frame-dump-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def _run(self, items: queue.Queue) -> None:
+        params = self._encode_params()
+        while True:
+            item = items.get()
+            if item is _STOP:
+                return
+            if self._errors:
+                # Keep draining so producers never block on a dead pool
+                continue
+            
+            frame_index, image = item
+            try:
+                path = self.frame_path(frame_index)
+                if not cv2.imwrite(str(path), image, params):
+                    raise OSError(f"Could not write frame image: {path}")
+                with self._lock:
+                    self.stats['frames_written'] += 1
+            except BaseException as e:
+                self._errors.append(e)
+    
+    def _encode_params(self) -> List[int]:
+        if self.image_format == 'jpg':
+            return [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+        if self.image_format == 'webp':
+            return [cv2.IMWRITE_WEBP_QUALITY, int(self.quality)]
+        return []
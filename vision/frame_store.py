@@ -0,0 +1,297 @@
+"""Columnar, memory-mappable on-disk store for per-frame tracking data."""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .sinks import FrameSink
+
+
+# Per-frame columns: name -> (dtype, per-row shape)
+FRAME_COLUMNS = {
+    'frame_id': ('<i8', ()),
+    'timestamp': ('<f8', ()),
+    'ball_position': ('<f4', (2,)),     # NaN when no ball was detected
+    'ball_detected': ('|u1', ()),       # 0 when the ball position is interpolated
+    'possession_id': ('<i8', ()),       # -1 when nobody has the ball
+    'players_detected': ('<i4', ()),
+}
+
+# Per-observation columns, one row per tracked player per frame
+PLAYER_COLUMNS = {
+    'track_id': ('<i8', ()),
+    'position': ('<f4', (2,)),
+    'bbox': ('<f4', (4,)),
+}
+
+# Frame i owns player rows player_offsets[i]:player_offsets[i + 1]
+OFFSETS_COLUMN = 'player_offsets'
+
+STORE_VERSION = 2
+
+
+def frame_store_dir(analysis_id: str, root: Optional[str] = None) -> Path:
+    """
+    Directory of the frame store for an analysis.
+    
+    Args:
+        analysis_id: Analysis ID
+        root: Base directory (defaults to ``FRAME_STORE_DIR`` or ``frame_stores``)
+    
+    Returns:
+        Frame store directory path
+    """
+    return Path(root or os.getenv('FRAME_STORE_DIR', 'frame_stores')) / analysis_id
+
+
+class FrameStoreWriter(FrameSink):
+    """
+    Append frame summaries to a columnar store.
+    
+    Each column is a raw little-endian binary file that grows as frames are
+    written, so the writer can be used as the ``frame_sink`` of
+    ``BasketballVideoProcessor.process_video``. Track IDs are stored as
+    integers.
+    """
+    
+    def __init__(self, directory: str, flush_every: int = 256):
+        """
+        Initialize the writer.
+        
+        Args:
+            directory: Store directory (created if needed, contents overwritten)
+            flush_every: Number of frames buffered in memory between writes
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_every = max(1, flush_every)
+        
+        # The store is incomplete until ``close`` writes new metadata; stale
+        # metadata would describe the old columns over the new partial ones
+        (self.directory / 'meta.json').unlink(missing_ok=True)
+        
+        columns = list(FRAME_COLUMNS) + list(PLAYER_COLUMNS) + [OFFSETS_COLUMN]
+        self._files = {name: open(self.directory / f"{name}.bin", 'wb') for name in columns}
+        self._frame_buffer = {name: [] for name in FRAME_COLUMNS}
+        self._player_buffer = {name: [] for name in PLAYER_COLUMNS}
+        self._offset_buffer = []
+        
+        self.num_frames = 0
+        self.num_players = 0
+        self._closed = False
+    
+    def write(self, frame_summary: Dict) -> None:
+        """
+        Append one frame summary (as produced for ``frame_by_frame_data``).
+        
+        Args:
+            frame_summary: Frame summary
+        """
+        players = frame_summary.get('tracked_players', [])
+        ball_position = frame_summary.get('ball_position')
+        possession = frame_summary.get('possession') or {}
+        possession_id = possession.get('player_id')
+        
+        self._offset_buffer.append(self.num_players)
+        self._frame_buffer['frame_id'].append(frame_summary.get('frame_id', 0))
+        self._frame_buffer['timestamp'].append(frame_summary.get('timestamp', 0.0))
+        self._frame_buffer['ball_position'].append(
+            ball_position if ball_position is not None else (np.nan, np.nan)
+        )
+        self._frame_buffer['ball_detected'].append(
+            frame_summary.get('ball_detected', ball_position is not None)
+        )
+        self._frame_buffer['possession_id'].append(
+            int(possession_id) if possession_id is not None else -1
+        )
+        self._frame_buffer['players_detected'].append(
+            frame_summary.get('players_detected', len(players))
+        )
+        
+        for player in players:
+            self._player_buffer['track_id'].append(int(player['track_id']))
+            self._player_buffer['position'].append(player.get('position', player.get('center')))
+            self._player_buffer['bbox'].append(player['bbox'])
+        
+        self.num_frames += 1
+        self.num_players += len(players)
+        
+        if len(self._offset_buffer) >= self.flush_every:
+            self._flush()
+    
+    def close(self) -> None:
+        """Flush buffered frames, terminate the offsets index and write metadata."""
+        if self._closed:
+            return
+        
+        self._offset_buffer.append(self.num_players)
+        self._flush()
+        for f in self._files.values():
+            f.close()
+        
+        meta = {
+            'version': STORE_VERSION,
+            'num_frames': self.num_frames,
+            'num_players': self.num_players,
+            'frame_columns': {name: list(spec) for name, spec in FRAME_COLUMNS.items()},
+            'player_columns': {name: list(spec) for name, spec in PLAYER_COLUMNS.items()},
+        }
+        with open(self.directory / 'meta.json', 'w') as f:
+            json.dump(meta, f, indent=2)
+        
+        self._closed = True
+    
+    def _flush(self) -> None:
+        """Write buffered rows to the column files."""
+        for columns, buffer in ((FRAME_COLUMNS, self._frame_buffer),
+                                (PLAYER_COLUMNS, self._player_buffer)):
+            for name, (dtype, shape) in columns.items():
+                if buffer[name]:
+                    rows = np.asarray(buffer[name], dtype=dtype).reshape((-1,) + shape)
+                    self._files[name].write(rows.tobytes())
+                    buffer[name].clear()
+        
+        if self._offset_buffer:
+            self._files[OFFSETS_COLUMN].write(np.asarray(self._offset_buffer, dtype='<i8').tobytes())
+            self._offset_buffer.clear()
+
+
+class FrameStore:
+    """
+    Read-only, memory-mapped view of a store written by ``FrameStoreWriter``.
+    
+    Column attributes (``frame_id``, ``timestamp``, ``ball_position``,
+    ``ball_detected``, ``possession_id``, ``players_detected``, ``player_offsets``,
+    ``track_id``, ``position``, ``bbox``) are ``np.memmap`` arrays, so
+    slicing them does not read or copy the rest of the file.
+    """
+    
+    def __init__(self, directory: str):
+        """
+        Open a frame store.
+        
+        Args:
+            directory: Store directory
+        
+        Raises:
+            FileNotFoundError: If the store has no metadata (missing or not closed)
+        """
+        self.directory = Path(directory)
+        with open(self.directory / 'meta.json') as f:
+            self.meta = json.load(f)
+        
+        self.num_frames = self.meta['num_frames']
+        self.num_players = self.meta['num_players']
+        
+        for name, (dtype, shape) in self.meta['frame_columns'].items():
+            setattr(self, name, self._map(name, dtype, (self.num_frames,) + tuple(shape)))
+        for name, (dtype, shape) in self.meta['player_columns'].items():
+            setattr(self, name, self._map(name, dtype, (self.num_players,) + tuple(shape)))
+        self.player_offsets = self._map(OFFSETS_COLUMN, '<i8', (self.num_frames + 1,))
+    
+    def __len__(self) -> int:
+        return self.num_frames
+    
+    @classmethod
+    def exists(cls, directory: str) -> bool:
+        """Whether a complete store exists at ``directory``."""
+        return (Path(directory) / 'meta.json').exists()
+    
+    def _map(self, name: str, dtype: str, shape: tuple) -> np.ndarray:
+        """Memory-map one column file (empty columns cannot be mapped)."""
+        if shape[0] == 0:
+            return np.empty(shape, dtype=dtype)
+        return np.memmap(self.directory / f"{name}.bin", dtype=dtype, mode='r', shape=shape)
+    
+    def index_of(self, frame_id: int) -> int:
+        """
+        Row index of the first frame with ``frame_id`` >= the given id.
+        
+        Frame IDs are written in increasing order, so this is a binary search.
+        """
+        return int(np.searchsorted(self.frame_id, frame_id, side='left'))
+    
+    def frame_slice(self, start: int, stop: int) -> Dict[str, np.ndarray]:
+        """
+        Zero-copy views of frames ``start:stop`` and their player rows.
+        
+        Args:
+            start: First frame row
+            stop: End frame row (exclusive)
+        
+        Returns:
+            Dict of column views; ``player_offsets`` is rebased so that
+            frame ``i`` of the slice owns player rows
+            ``player_offsets[i]:player_offsets[i + 1]``
+        """
+        start = max(0, min(start, self.num_frames))
+        stop = max(start, min(stop, self.num_frames))
+        first, last = int(self.player_offsets[start]), int(self.player_offsets[stop])
+        
+        columns = {name: getattr(self, name)[start:stop] for name in self.meta['frame_columns']}
+        columns.update({name: getattr(self, name)[first:last] for name in self.meta['player_columns']})
+        columns[OFFSETS_COLUMN] = self.player_offsets[start:stop + 1] - first
+        return columns
+    
+    def frame_players(self, index: int) -> Dict[str, np.ndarray]:
+        """Zero-copy views of the player rows of a single frame."""
+        first, last = int(self.player_offsets[index]), int(self.player_offsets[index + 1])
+        return {name: getattr(self, name)[first:last] for name in self.meta['player_columns']}
+    
+    def frame_rows(self) -> np.ndarray:
+        """Frame row index of every player row (for grouping observations)."""
+        counts = np.diff(self.player_offsets)
+        return np.repeat(np.arange(self.num_frames), counts)
+    
+    def iter_frames(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Rebuild ``frame_by_frame_data``-style summaries for replay tooling.
+        
+        Events are not part of the store; they are available from the shot
+        and possession tables.
+        
+        Args:
+            start: First frame row
+            stop: End frame row (exclusive, defaults to the end)
+        
+        Yields:
+            Frame summaries
+        """
+        stop = self.num_frames if stop is None else stop
+        for index in range(max(0, start), min(stop, self.num_frames)):
+            players = self.frame_players(index)
+            ball = self.ball_position[index]
+            possession_id = int(self.possession_id[index])
+            ball_position = None if np.isnan(ball[0]) else (float(ball[0]), float(ball[1]))
+            tracked_players: List[Dict] = [
+                {
+                    'track_id': int(track_id),
+                    'position': (float(position[0]), float(position[1])),
+                    'bbox': bbox.tolist()
+                }
+                for track_id, position, bbox in zip(
+                    players['track_id'], players['position'], players['bbox']
+                )
+            ]
+            yield {
+                'timestamp': float(self.timestamp[index]),
+                'frame_id': int(self.frame_id[index]),
+                'players_detected': int(self.players_detected[index]),
+                'ball_detected': self._ball_detected(index, ball_position),
+                'tracked_players': tracked_players,
+                'possession': {
+                    'player_id': possession_id if possession_id >= 0 else None,
+                    'ball_position': ball_position
+                },
+                'ball_position': ball_position
+            }
+    
+    def _ball_detected(self, index: int, ball_position: Optional[tuple]) -> bool:
+        """Whether the ball was detected (not interpolated) in a frame."""
+        if 'ball_detected' not in self.meta['frame_columns']:
+            # Version 1 stores: any ball position counted as detected
+            return ball_position is not None
+        return bool(self.ball_detected[index])
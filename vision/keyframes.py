@@ -0,0 +1,161 @@
+"""Adaptive keyframe scheduling for detection with tracker-only propagation."""
+
+import math
+from typing import Dict, Optional
+
+
+class KeyframeScheduler:
+    """
+    Decide which frames get full detection when running with a detection stride.
+    
+    Every ``stride``-th frame is a keyframe. In between, tracks are only
+    propagated by the tracker's motion model and the ball is extrapolated
+    from its last observed velocity. A keyframe is forced on the next frame
+    when players or the ball move fast, when the ball is lost, or when
+    track confidence drops.
+    """
+    
+    def __init__(self, stride: int = 1, motion_threshold: float = 0.02,
+                 ball_motion_threshold: float = 0.05, min_track_confidence: float = 0.4):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            stride: Maximum number of frames between keyframes (1 = detect every frame)
+            motion_threshold: Player displacement per frame, as a fraction of
+                the frame diagonal, above which a keyframe is forced
+            ball_motion_threshold: Ball displacement per frame, as a fraction
+                of the frame diagonal, above which a keyframe is forced
+            min_track_confidence: Detection confidence below which a matched
+                track forces a keyframe
+        """
+        self.stride = max(1, int(stride))
+        self.motion_threshold = motion_threshold
+        self.ball_motion_threshold = ball_motion_threshold
+        self.min_track_confidence = min_track_confidence
+        
+        self.frames_since_keyframe = 0
+        self.force_next = True
+        self.last_positions = {}        # {track_id: center} from the previous frame
+        self.matched_tracks = set()     # Tracks matched at the last keyframe
+        self.last_ball = None           # Last observed ball detection
+        self.ball_velocity = (0.0, 0.0)  # Pixels per frame
+        self.frames_since_ball = 0
+        self.previous_keyframe_had_ball = False
+        
+        self.stats = {
+            'frames': 0,
+            'keyframes': 0,
+            'forced': {'motion': 0, 'ball_lost': 0, 'low_confidence': 0}
+        }
+    
+    def is_keyframe(self) -> bool:
+        """Whether the next frame should be run through the detector."""
+        return (self.stride == 1 or self.force_next
+                or self.frames_since_keyframe + 1 >= self.stride)
+    
+    def extrapolate_ball(self) -> Optional[Dict]:
+        """
+        Predict the ball on a non-keyframe from its last observed velocity.
+        
+        Returns:
+            Ball detection marked ``interpolated``, or None if the ball has not
+            been seen since the previous keyframe
+        """
+        if self.last_ball is None or self.frames_since_ball + 1 > self.stride:
+            return None
+        
+        steps = self.frames_since_ball + 1
+        dx = self.ball_velocity[0] * steps
+        dy = self.ball_velocity[1] * steps
+        x1, y1, x2, y2 = self.last_ball['bbox']
+        cx, cy = self.last_ball['center']
+        
+        ball = dict(self.last_ball)
+        ball['bbox'] = [x1 + dx, y1 + dy, x2 + dx, y2 + dy]
+        ball['center'] = (cx + dx, cy + dy)
+        ball['interpolated'] = True
+        return ball
+    
+    def update(self, detections: Dict, tracking_results: Dict, keyframe: bool):
+        """
+        Record the outcome of a frame and decide whether to force a keyframe.
+        
+        Args:
+            detections: Detection results for the frame
+            tracking_results: Tracking results for the frame
+            keyframe: Whether the frame was run through the detector
+        """
+        self.stats['frames'] += 1
+        self.force_next = False
+        
+        height, width = detections['frame_shape'][:2]
+        diagonal = math.hypot(width, height)
+        
+        # High motion: any track moved further than the threshold since the last frame
+        positions = {p['track_id']: p['center'] for p in tracking_results['tracked_players']}
+        max_motion = 0.0
+        for track_id, center in positions.items():
+            last = self.last_positions.get(track_id)
+            if last is not None:
+                max_motion = max(max_motion, math.hypot(center[0] - last[0], center[1] - last[1]))
+        self.last_positions = positions
+        
+        if max_motion > self.motion_threshold * diagonal:
+            self._force('motion')
+        
+        if keyframe:
+            self.stats['keyframes'] += 1
+            self.frames_since_keyframe = 0
+            self._update_ball(detections.get('ball'), diagonal)
+            self._update_confidence(tracking_results)
+        else:
+            self.frames_since_keyframe += 1
+            self.frames_since_ball += 1
+    
+    def _update_ball(self, ball: Optional[Dict], diagonal: float):
+        """Update the ball motion model from a keyframe detection."""
+        if ball is None:
+            # Ball lost since the previous keyframe: look again on the next frame
+            if self.previous_keyframe_had_ball:
+                self._force('ball_lost')
+            self.previous_keyframe_had_ball = False
+            self.last_ball = None
+            return
+        
+        if self.last_ball is not None:
+            steps = self.frames_since_ball + 1
+            self.ball_velocity = (
+                (ball['center'][0] - self.last_ball['center'][0]) / steps,
+                (ball['center'][1] - self.last_ball['center'][1]) / steps
+            )
+            if math.hypot(*self.ball_velocity) > self.ball_motion_threshold * diagonal:
+                self._force('motion')
+        else:
+            self.ball_velocity = (0.0, 0.0)
+        
+        self.last_ball = ball
+        self.frames_since_ball = 0
+        self.previous_keyframe_had_ball = True
+    
+    def _update_confidence(self, tracking_results: Dict):
+        """Force a keyframe when a matched track is weak or a track was just lost."""
+        matched = set()
+        low_confidence = False
+        
+        for player in tracking_results['tracked_players']:
+            confidence = player.get('confidence')
+            if player.get('time_since_update', 0) == 0 and confidence is not None:
+                matched.add(player['track_id'])
+                if confidence < self.min_track_confidence:
+                    low_confidence = True
+        
+        if low_confidence or (self.matched_tracks - matched):
+            self._force('low_confidence')
+        self.matched_tracks = matched
+    
+    def _force(self, reason: str):
+        """Force the next frame to be a keyframe."""
+        if not self.force_next:
+            self.stats['forced'][reason] += 1
+        self.force_next = True
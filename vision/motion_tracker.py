@@ -0,0 +1,216 @@
+"""Motion-only, ByteTrack-style multi-object tracker (no appearance embedder)."""
+
+from typing import List, Optional, Tuple
+
+import numpy as np
+from deep_sort_realtime.deep_sort.kalman_filter import KalmanFilter
+
+from .geometry import iou_matrix
+
+
+class MotionTrack:
+    """
+    A single track, exposing the same attributes as a DeepSORT track.
+    
+    The box state is a constant-velocity Kalman filter over
+    (center x, center y, aspect ratio, height), as in DeepSORT.
+    """
+    
+    TENTATIVE = 1
+    CONFIRMED = 2
+    DELETED = 3
+    
+    def __init__(self, mean: np.ndarray, covariance: np.ndarray, track_id: str,
+                 n_init: int, max_age: int, det_conf: float):
+        self.mean = mean
+        self.covariance = covariance
+        self.track_id = track_id
+        self.hits = 1
+        self.hit_streak = 1
+        self.age = 1
+        self.time_since_update = 0
+        self.det_conf = det_conf
+        self.state = self.CONFIRMED if n_init <= 1 else self.TENTATIVE
+        
+        self._n_init = n_init
+        self._max_age = max_age
+    
+    def predict(self, kf: KalmanFilter):
+        """Advance the state one frame with the motion model."""
+        self.mean, self.covariance = kf.predict(self.mean, self.covariance)
+        self.age += 1
+        self.time_since_update += 1
+        self.det_conf = None
+    
+    def update(self, kf: KalmanFilter, measurement: np.ndarray, det_conf: float):
+        """Correct the state with a matched detection."""
+        self.mean, self.covariance = kf.update(self.mean, self.covariance, measurement)
+        self.hit_streak = self.hit_streak + 1 if self.time_since_update <= 1 else 1
+        self.hits += 1
+        self.time_since_update = 0
+        self.det_conf = det_conf
+        if self.state == self.TENTATIVE and self.hits >= self._n_init:
+            self.state = self.CONFIRMED
+    
+    def mark_missed(self):
+        """Delete tentative tracks at once and confirmed ones after ``max_age`` frames."""
+        self.hit_streak = 0
+        if self.state == self.TENTATIVE or self.time_since_update > self._max_age:
+            self.state = self.DELETED
+    
+    def is_confirmed(self) -> bool:
+        return self.state == self.CONFIRMED
+    
+    def is_deleted(self) -> bool:
+        return self.state == self.DELETED
+    
+    def get_det_conf(self) -> Optional[float]:
+        """Confidence of the detection matched this frame (None if unmatched)."""
+        return self.det_conf
+    
+    def to_ltrb(self) -> np.ndarray:
+        """Filtered box as (left, top, right, bottom)."""
+        x, y, aspect_ratio, height = self.mean[:4]
+        width = aspect_ratio * height
+        return np.array([x - width / 2, y - height / 2, x + width / 2, y + height / 2])
+
+
+class MotionTracker:
+    """
+    IoU + Kalman tracker with ByteTrack-style two-tier association.
+    
+    High-confidence detections are matched to every live track first; the
+    remaining low-confidence detections can then only extend tracks that
+    are still unmatched, so partially occluded players keep their ID
+    without low-confidence boxes spawning new tracks. No appearance model
+    is run, which makes it much cheaper than DeepSORT on CPU.
+    """
+    
+    def __init__(self, max_age: int = 30, n_init: int = 3, high_confidence: float = 0.5,
+                 match_iou: float = 0.2, low_match_iou: float = 0.5):
+        """
+        Initialize the tracker.
+        
+        Args:
+            max_age: Maximum frames to keep a track alive without detection
+            n_init: Number of detections before a track is confirmed
+            high_confidence: Detections at or above this start the first
+                association round and may create tracks
+            match_iou: Minimum IoU for high-confidence matches
+            low_match_iou: Minimum IoU for low-confidence matches
+        """
+        self.max_age = max_age
+        self.n_init = n_init
+        self.high_confidence = high_confidence
+        self.match_iou = match_iou
+        self.low_match_iou = low_match_iou
+        
+        self.kf = KalmanFilter()
+        self.tracks: List[MotionTrack] = []
+        self._next_id = 1
+    
+    def predict(self):
+        """Advance every track one frame with the motion model."""
+        for track in self.tracks:
+            track.predict(self.kf)
+    
+    def update_tracks(self, raw_detections: List[Tuple[List[float], float, str]],
+                      frame: Optional[np.ndarray] = None) -> List[MotionTrack]:
+        """
+        Associate one frame's detections and update the tracks.
+        
+        Args:
+            raw_detections: ``([left, top, width, height], confidence, class)``
+                tuples, as passed to DeepSORT
+            frame: Unused; accepted for interface compatibility with DeepSORT
+        
+        Returns:
+            All live tracks (check ``is_confirmed()`` before reporting)
+        """
+        self.predict()
+        
+        if raw_detections:
+            ltwh = np.array([det[0] for det in raw_detections], dtype=np.float64)
+            confidences = np.array([det[1] for det in raw_detections], dtype=np.float64)
+        else:
+            ltwh = np.zeros((0, 4))
+            confidences = np.zeros(0)
+        boxes = ltwh.copy()
+        boxes[:, 2:] += boxes[:, :2]
+        
+        high = np.flatnonzero(confidences >= self.high_confidence)
+        low = np.flatnonzero(confidences < self.high_confidence)
+        
+        # First round: confident detections against every track
+        all_tracks = np.arange(len(self.tracks))
+        matches, unmatched_tracks, unmatched_high = self._associate(
+            all_tracks, high, boxes, self.match_iou
+        )
+        
+        # Second round: weak detections can only extend confirmed tracks
+        # left unmatched (not tentative ones, which would be fragile)
+        recent = np.array([i for i in unmatched_tracks if self.tracks[i].is_confirmed()], dtype=np.int64)
+        low_matches, _, _ = self._associate(recent, low, boxes, self.low_match_iou)
+        matches.extend(low_matches)
+        
+        for track_index, det_index in matches:
+            self.tracks[track_index].update(
+                self.kf, self._to_xyah(ltwh[det_index]), float(confidences[det_index])
+            )
+        
+        matched_tracks = {track_index for track_index, _ in matches}
+        for track_index in range(len(self.tracks)):
+            if track_index not in matched_tracks:
+                self.tracks[track_index].mark_missed()
+        
+        # Only confident, unexplained detections start new tracks
+        for det_index in unmatched_high:
+            mean, covariance = self.kf.initiate(self._to_xyah(ltwh[det_index]))
+            self.tracks.append(MotionTrack(
+                mean, covariance, str(self._next_id), self.n_init, self.max_age,
+                float(confidences[det_index])
+            ))
+            self._next_id += 1
+        
+        self.tracks = [track for track in self.tracks if not track.is_deleted()]
+        return self.tracks
+    
+    def _associate(self, track_indices: np.ndarray, det_indices: np.ndarray, boxes: np.ndarray,
+                   min_iou: float) -> Tuple[List[Tuple[int, int]], List[int], List[int]]:
+        """
+        Optimal IoU assignment between tracks and detections.
+        
+        Returns:
+            (matched (track, detection) index pairs, unmatched track indices,
+            unmatched detection indices)
+        """
+        if len(track_indices) == 0 or len(det_indices) == 0:
+            return [], list(track_indices), list(det_indices)
+        
+        try:
+            from scipy.optimize import linear_sum_assignment
+        except ImportError:
+            raise ImportError("The motion tracker requires scipy (pip install 'project_basket[motion]')")
+        
+        track_boxes = np.array([self.tracks[i].to_ltrb() for i in track_indices])
+        iou = iou_matrix(track_boxes, boxes[det_indices])
+        rows, cols = linear_sum_assignment(-iou)
+        
+        matches = []
+        matched_rows, matched_cols = set(), set()
+        for row, col in zip(rows, cols):
+            if iou[row, col] >= min_iou:
+                matches.append((int(track_indices[row]), int(det_indices[col])))
+                matched_rows.add(row)
+                matched_cols.add(col)
+        
+        unmatched_tracks = [int(t) for row, t in enumerate(track_indices) if row not in matched_rows]
+        unmatched_dets = [int(d) for col, d in enumerate(det_indices) if col not in matched_cols]
+        return matches, unmatched_tracks, unmatched_dets
+    
+    @staticmethod
+    def _to_xyah(ltwh: np.ndarray) -> np.ndarray:
+        """Convert (left, top, width, height) to the filter's (x, y, a, h)."""
+        left, top, width, height = ltwh
+        return np.array([left + width / 2, top + height / 2, width / max(height, 1e-6), height])
+
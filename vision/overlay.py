@@ -0,0 +1,269 @@
+"""Single-pass overlay renderer for annotated frames."""
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+PLAYER_COLORS = [
+    (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0),
+    (255, 0, 255), (0, 255, 255), (128, 0, 128), (255, 165, 0),
+    (0, 128, 128), (128, 128, 0)
+]
+
+
+def player_color(track_id) -> Tuple[int, int, int]:
+    """
+    Consistent color for a track ID.
+    
+    Numeric IDs (including DeepSORT's numeric strings) cycle through the
+    palette; other strings are hashed stably.
+    """
+    try:
+        index = int(track_id)
+    except (TypeError, ValueError):
+        index = zlib.crc32(str(track_id).encode())
+    return PLAYER_COLORS[index % len(PLAYER_COLORS)]
+
+
+class OverlayRenderer:
+    """
+    Draw detections, tracks and analytics onto a frame in one pass.
+    
+    Court zones and the court sketch (paint, three-point arc, free throw
+    line) only depend on the resolution, so they are rasterized once per
+    resolution into a layer plus a mask of the pixels they cover. Each frame
+    then gets a single copy into a reused output buffer (or none when
+    drawing in place), one masked blend of the static layer, and the
+    per-frame boxes and labels drawn on top.
+    """
+    
+    def __init__(self):
+        self._static_layers = {}  # {(height, width, zone_table_id): (pixel indices, pixel values)}
+        self._buffer = None
+    
+    def render(self, frame: np.ndarray, frame_results: Dict,
+               ball_trajectory: Optional[np.ndarray] = None,
+               out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Annotate a frame.
+        
+        Args:
+            frame: Original frame
+            frame_results: Complete frame analysis (``detections``,
+                ``tracking``, ``analytics`` and ``processing_metadata``)
+            ball_trajectory: Ball trajectory rows ``(timestamp, x, y,
+                frame_id)`` to draw
+            out: Array to draw into; pass ``frame`` itself to annotate in
+                place. Defaults to a buffer owned by the renderer, which is
+                overwritten by the next call.
+        
+        Returns:
+            The annotated image (``out``)
+        """
+        out = self._output(frame, out)
+        
+        detections = frame_results['detections']
+        self._blend_static(out, detections.get('court_zones', {}), detections.get('zone_table_id'))
+        
+        self._draw_detections(out, detections)
+        self._draw_tracking(out, frame_results['tracking'], ball_trajectory)
+        self._draw_analytics(out, frame_results['analytics'])
+        self._draw_info(out, frame_results['frame_id'], frame_results['timestamp'],
+                        frame_results['processing_metadata']['tracked_players'],
+                        frame_results['processing_metadata']['events_detected'])
+        return out
+    
+    def render_summary(self, frame: np.ndarray, frame_summary: Dict, court_zones: Dict,
+                       zone_table_id: Optional[str] = None,
+                       ball_trajectory: Optional[np.ndarray] = None,
+                       out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Annotate a frame from its stored summary (``frame_by_frame_data`` row).
+        
+        Summaries keep tracks, the ball position, possession and events but
+        not raw detections, so only those are drawn; the ball is marked at
+        its center.
+        
+        Args:
+            frame: Original frame
+            frame_summary: Frame summary
+            court_zones: Court zone table for the frame's resolution
+            zone_table_id: Identifier of ``court_zones``
+            ball_trajectory: Ball trajectory rows ``(timestamp, x, y,
+                frame_id)`` to draw
+            out: Array to draw into, as in ``render``
+        
+        Returns:
+            The annotated image (``out``)
+        """
+        out = self._output(frame, out)
+        self._blend_static(out, court_zones, zone_table_id)
+        
+        players = frame_summary.get('tracked_players', [])
+        self._draw_players(out, players)
+        
+        ball_position = frame_summary.get('ball_position')
+        if ball_position is not None:
+            cv2.circle(out, (int(ball_position[0]), int(ball_position[1])), 8, (0, 255, 255), 2)
+            self._draw_possession(out, (frame_summary.get('possession') or {}).get('player_id'))
+        self._draw_trajectory(out, ball_trajectory)
+        
+        events = frame_summary.get('events', [])
+        for event in events:
+            if event['type'] == 'shot_attempt':
+                shot = event['data']
+                self._draw_shot(out, shot['shot_position'] if isinstance(shot, dict) else shot.shot_position)
+        
+        self._draw_info(out, frame_summary['frame_id'], frame_summary['timestamp'],
+                        len(players), len(events))
+        return out
+    
+    def _output(self, frame: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+        """The image to draw into, holding a copy of ``frame``."""
+        if out is None:
+            if self._buffer is None or self._buffer.shape != frame.shape:
+                self._buffer = np.empty_like(frame)
+            out = self._buffer
+        if out is not frame:
+            np.copyto(out, frame)
+        return out
+    
+    def _blend_static(self, out: np.ndarray, court_zones: Dict, zone_table_id: Optional[str]):
+        """Copy the pre-rendered static layer onto the covered pixels."""
+        height, width = out.shape[:2]
+        key = (height, width, zone_table_id)
+        layer = self._static_layers.get(key)
+        if layer is None:
+            layer = self._static_layers[key] = self._render_static(out.shape, court_zones)
+        
+        indices, pixels = layer
+        out.reshape(-1, out.shape[2])[indices] = pixels
+    
+    def _render_static(self, shape: Tuple[int, ...], court_zones: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rasterize the resolution-dependent layers once.
+        
+        Returns:
+            Flat indices of the covered pixels and their colors
+        """
+        layer = np.zeros(shape, dtype=np.uint8)
+        mask = np.zeros(shape[:2], dtype=np.uint8)
+        self._draw_static(layer, court_zones)
+        self._draw_static(mask, court_zones, mask_value=255)
+        
+        indices = np.flatnonzero(mask)
+        return indices, layer.reshape(-1, shape[2])[indices]
+    
+    def _draw_static(self, image: np.ndarray, court_zones: Dict, mask_value: Optional[int] = None):
+        """
+        Draw court zones and the simplified court.
+        
+        Args:
+            image: Color image, or single-channel mask
+            court_zones: Court zone table of the resolution
+            mask_value: Draw every primitive with this value instead of its color
+        """
+        def color(bgr):
+            return bgr if mask_value is None else mask_value
+        
+        h, w = image.shape[:2]
+        
+        for zone_name, zone_info in court_zones.items():
+            if zone_info['active']:
+                x1, y1, x2, y2 = zone_info['pixel_coords']
+                cv2.rectangle(image, (x1, y1), (x2, y2), color((255, 0, 0)), 1)
+                cv2.putText(image, zone_name, (x1, y1 - 5),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.3, color((255, 0, 0)), 1)
+        
+        # Paint area, three-point line (simplified arc) and free throw line
+        cv2.rectangle(image, (int(w * 0.35), int(h * 0.8)), (int(w * 0.65), h), color((100, 100, 255)), 2)
+        cv2.ellipse(image, (int(w * 0.5), h), (int(w * 0.25), int(h * 0.25)), 0, 180, 360,
+                    color((255, 100, 100)), 2)
+        cv2.line(image, (int(w * 0.35), int(h * 0.85)), (int(w * 0.65), int(h * 0.85)),
+                 color((255, 255, 100)), 2)
+    
+    def _draw_detections(self, out: np.ndarray, detections: Dict):
+        """Raw player and ball detections."""
+        for player in detections['players']:
+            x1, y1, x2, y2 = map(int, player['bbox'])
+            cv2.rectangle(out, (x1, y1), (x2, y2), (0, 255, 0), 2)
+            cv2.putText(out, f"Player {player['confidence']:.2f}",
+                        (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 255, 0), 1)
+        
+        ball = detections['ball']
+        if ball:
+            x1, y1, x2, y2 = map(int, ball['bbox'])
+            cv2.rectangle(out, (x1, y1), (x2, y2), (0, 0, 255), 2)
+            cv2.putText(out, f"Ball {ball['confidence']:.2f}",
+                        (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+    
+    def _draw_tracking(self, out: np.ndarray, tracking_results: Dict,
+                       ball_trajectory: Optional[np.ndarray]):
+        """Tracked players, the tracked ball, possession and the ball trajectory."""
+        self._draw_players(out, tracking_results['tracked_players'])
+        
+        ball = tracking_results['ball_info']
+        if ball:
+            x1, y1, x2, y2 = map(int, ball['bbox'])
+            cv2.rectangle(out, (x1, y1), (x2, y2), (0, 255, 255), 2)
+            self._draw_possession(out, tracking_results.get('possession', {}).get('player_id'))
+        
+        self._draw_trajectory(out, ball_trajectory)
+    
+    def _draw_players(self, out: np.ndarray, players: List[Dict]):
+        """Tracked player boxes and IDs."""
+        for player in players:
+            track_id = player['track_id']
+            x1, y1, x2, y2 = map(int, player['bbox'])
+            color = player_color(track_id)
+            cv2.rectangle(out, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(out, f"Player {track_id}", (x1, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+    
+    def _draw_possession(self, out: np.ndarray, player_id):
+        """Possessing player in the top-left corner."""
+        if player_id:
+            cv2.putText(out, f"Possession: Player {player_id}",
+                        (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+    
+    def _draw_trajectory(self, out: np.ndarray, ball_trajectory: Optional[np.ndarray]):
+        """Last ten ball positions as a polyline."""
+        if ball_trajectory is not None and len(ball_trajectory) > 1:
+            points = ball_trajectory[-10:, 1:3].astype(np.int32)
+            cv2.polylines(out, [points], False, (255, 255, 0), 2)
+    
+    def _draw_analytics(self, out: np.ndarray, frame_analytics: Dict):
+        """Possession duration and highlighted events."""
+        possession = frame_analytics.get('possession_analysis', {})
+        if possession.get('current_possession'):
+            cv2.putText(out,
+                        f"Possession: Player {possession['current_possession']} "
+                        f"({possession.get('possession_duration', 0):.1f}s)",
+                        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        
+        for event in frame_analytics.get('events', []):
+            if event['type'] == 'shot_attempt':
+                self._draw_shot(out, event['data'].shot_position)
+    
+    def _draw_shot(self, out: np.ndarray, position):
+        """Highlight a shot attempt."""
+        x, y = int(position[0]), int(position[1])
+        cv2.circle(out, (x, y), 20, (0, 255, 0), 3)
+        cv2.putText(out, "SHOT!", (x, y - 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+    
+    def _draw_info(self, out: np.ndarray, frame_id: int, timestamp: float,
+                   tracked_players: int, events: int):
+        """Frame, time and count summary in the bottom-left corner."""
+        info_text = [
+            f"Frame: {frame_id}",
+            f"Time: {timestamp:.1f}s",
+            f"Players: {tracked_players}",
+            f"Events: {events}"
+        ]
+        
+        for i, text in enumerate(info_text):
+            cv2.putText(out, text, (10, out.shape[0] - 100 + i * 20),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
@@ -0,0 +1,172 @@
+"""Threaded stage pipeline used to overlap video decode, inference and encode."""
+
+import queue
+import threading
+from typing import Any, Callable, Iterable, Iterator, List
+
+
+# Marker passed down a queue once its producer has finished
+_END = object()
+
+
+class StagePipeline:
+    """
+    Chain of worker threads connected by bounded FIFO queues.
+    
+    Every stage has exactly one thread, so items leave a stage in the same
+    order they entered it. Bounded queues provide back-pressure: a fast
+    decoder blocks instead of buffering the whole video in memory. The first
+    exception raised by any stage stops the pipeline and is re-raised from
+    ``join``.
+    """
+    
+    def __init__(self, queue_size: int = 8):
+        """
+        Initialize the pipeline.
+        
+        Args:
+            queue_size: Maximum number of items buffered between two stages
+        """
+        self.queue_size = max(1, queue_size)
+        self._threads: List[threading.Thread] = []
+        self._errors: List[BaseException] = []
+        self._stop = threading.Event()
+    
+    def source(self, name: str, items: Iterable[Any]) -> queue.Queue:
+        """
+        Start a thread that feeds ``items`` into a new queue.
+        
+        Args:
+            name: Thread name (for debugging)
+            items: Iterable consumed on the stage thread
+        
+        Returns:
+            Queue receiving the produced items
+        """
+        out_q = queue.Queue(maxsize=self.queue_size)
+        
+        def run():
+            try:
+                for item in items:
+                    if not self._put(out_q, item):
+                        return
+            finally:
+                self._put(out_q, _END)
+        
+        self._start(name, run)
+        return out_q
+    
+    def stage(self, name: str, fn: Callable[[Any], Any], in_q: queue.Queue) -> queue.Queue:
+        """
+        Start a thread that applies ``fn`` to every item of ``in_q``.
+        
+        Args:
+            name: Thread name (for debugging)
+            fn: Function applied to each item
+            in_q: Input queue
+        
+        Returns:
+            Queue receiving ``fn`` results in input order
+        """
+        out_q = queue.Queue(maxsize=self.queue_size)
+        
+        def run():
+            try:
+                for item in self.drain(in_q):
+                    if not self._put(out_q, fn(item)):
+                        return
+            finally:
+                self._put(out_q, _END)
+        
+        self._start(name, run)
+        return out_q
+    
+    def sink(self, name: str, fn: Callable[[Any], None], in_q: queue.Queue) -> None:
+        """
+        Start a thread that calls ``fn`` on every item of ``in_q``.
+        
+        Args:
+            name: Thread name (for debugging)
+            fn: Function applied to each item
+            in_q: Input queue
+        """
+        def run():
+            for item in self.drain(in_q):
+                fn(item)
+        
+        self._start(name, run)
+    
+    def new_queue(self) -> queue.Queue:
+        """Create a bounded queue for a stage driven by the calling thread."""
+        return queue.Queue(maxsize=self.queue_size)
+    
+    def put(self, out_q: queue.Queue, item: Any) -> bool:
+        """
+        Put an item on a queue from the calling thread.
+        
+        Returns:
+            False if the pipeline was stopped by an error
+        """
+        return self._put(out_q, item)
+    
+    def close(self, out_q: queue.Queue) -> None:
+        """Signal consumers of a caller-driven queue that no items follow."""
+        self._put(out_q, _END)
+    
+    def drain(self, in_q: queue.Queue) -> Iterator[Any]:
+        """
+        Iterate over a queue until its producer finishes or the pipeline stops.
+        
+        Args:
+            in_q: Queue to consume
+        
+        Yields:
+            Items in the order they were produced
+        """
+        while not self._stop.is_set():
+            try:
+                item = in_q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END:
+                return
+            yield item
+    
+    def stop(self) -> None:
+        """Ask every stage to stop as soon as possible."""
+        self._stop.set()
+    
+    def join(self) -> None:
+        """
+        Wait for all stage threads and re-raise the first stage error.
+        
+        Raises:
+            Exception: The first exception raised by any stage
+        """
+        for thread in self._threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+    
+    def _start(self, name: str, target: Callable[[], None]) -> None:
+        """Start a daemon stage thread that records its failure."""
+        def run():
+            try:
+                target()
+            except BaseException as e:
+                self._errors.append(e)
+                self._stop.set()
+        
+        thread = threading.Thread(target=run, name=name, daemon=True)
+        self._threads.append(thread)
+        thread.start()
+    
+    def _put(self, out_q: queue.Queue, item: Any) -> bool:
+        """Blocking put that gives up once the pipeline has been stopped."""
+        while not self._stop.is_set():
+            try:
+                out_q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
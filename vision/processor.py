@@ -2,14 +2,27 @@
 
 import cv2
 import numpy as np
-import json
 import time
-from typing import Dict, Optional
+from concurrent.futures import Executor, ProcessPoolExecutor
+import multiprocessing
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 from pathlib import Path
 
 from .detector import BasketballDetector
 from .tracker import BasketballTracker
+from .proximity import POSSESSION_RADIUS_PIXELS
 from .analytics import BasketballAnalytics
+from .pipeline import StagePipeline
+from .sinks import FrameSink
+from .keyframes import KeyframeScheduler
+from .detection_cache import DetectionCache
+from .backends import sample_calibration_frames
+from .ball_roi import BallROIRedetector
+from .overlay import OverlayRenderer
+from .frame_dump import FrameDumpWriter
+from .serialization import dump_json
+from .video_io import DEFAULT_PRESET, VideoReader, VideoWriter, open_video_writer
+from .segments import default_segment_workers, plan_segments, process_segment, stitch_segments
 
 
 class BasketballVideoProcessor:
@@ -21,7 +34,21 @@ class BasketballVideoProcessor:
     def __init__(self, 
                  model_path: str = 'yolov8n.pt',
                  confidence_threshold: float = 0.25,
-                 output_dir: str = 'output'):
+                 output_dir: str = 'output',
+                 backend: str = 'torch',
+                 threads: Optional[int] = None,
+                 calibration_video: Optional[str] = None,
+                 tracker_backend: str = 'deepsort',
+                 embedder_model: str = 'default',
+                 ball_roi: bool = False,
+                 imgsz: Union[int, str, None] = None,
+                 decode_threads: Optional[int] = None,
+                 decode_width: Optional[int] = None,
+                 video_codec: str = 'h264',
+                 encoder_preset: str = DEFAULT_PRESET,
+                 json_indent: Optional[int] = 2,
+                 possession_radius: float = POSSESSION_RADIUS_PIXELS,
+                 possession_hysteresis: float = 0.0):
         """
         Initialize the basketball video processor.
         
@@ -29,23 +56,85 @@ class BasketballVideoProcessor:
             model_path: Path to YOLO model weights
             confidence_threshold: Detection confidence threshold
             output_dir: Directory for output files
+            backend: Detector inference backend (``torch``, ``onnx``,
+                ``openvino`` or ``onnx-int8``)
+            threads: Intra-op threads for the inference runtime
+            calibration_video: Video sampled to calibrate ``onnx-int8``
+            tracker_backend: Player tracker (``deepsort`` or the cheaper
+                embedder-free ``motion``)
+            embedder_model: DeepSORT appearance embedder (``default`` or ``small``)
+            ball_roi: When the full-frame pass misses the ball, run the
+                detector again on a crop around its predicted position
+                (see ``BallROIRedetector``)
+            imgsz: Detector input size (longest side, defaults to 640), or
+                ``auto`` to pick the smallest size that keeps players
+                detectable from a few frames sampled at the start of each video
+            decode_threads: Video decoder threads (defaults to the backend's choice)
+            decode_width: Downscale wider videos to this width while decoding;
+                all positions in the results are then in the downscaled frame
+            video_codec: Codec of the annotated output video (``h264``
+                through ffmpeg, or OpenCV's ``mp4v``)
+            encoder_preset: libx264 preset for ``h264`` output
+            json_indent: Indentation of the saved JSON results, or None for
+                compact output
+            possession_radius: Maximum ball distance (pixels) for possession
+            possession_hysteresis: Margin (pixels) another player must be
+                closer by to take possession from the current possessor
         """
-        self.detector = BasketballDetector(model_path, confidence_threshold)
-        self.tracker = BasketballTracker()
+        self.model_path = model_path
+        self.backend = backend
+        self.calibration_video = calibration_video
+        self.auto_imgsz = imgsz == 'auto'
+        self.detector = BasketballDetector(
+            model_path, confidence_threshold, backend, threads, calibration_video,
+            None if self.auto_imgsz else imgsz
+        )
+        self.tracker = BasketballTracker(backend=tracker_backend, embedder_model=embedder_model,
+                                         possession_radius=possession_radius,
+                                         possession_hysteresis=possession_hysteresis)
+        self.embedder_model = embedder_model
+        self.ball_redetector = BallROIRedetector(self.detector) if ball_roi else None
         self.analytics = BasketballAnalytics()
+        self.renderer = OverlayRenderer()
+        
+        self.decode_threads = decode_threads
+        self.decode_width = decode_width
+        self.video_codec = video_codec
+        self.encoder_preset = encoder_preset
+        self.json_indent = json_indent
         
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
         
         self.processing_results = []
         self.video_metadata = {}
+        
+        # Streaming mode: frame summaries go to a sink and only running
+        # aggregates are kept in memory
+        self.frame_sink = None
+        self.progress_callback = None
+        self.keyframe_stats = None
+        self.frame_dump_stats = None
+        self.frame_totals = {
+            'frames': 0,
+            'frames_with_ball': 0,
+            'events': 0
+        }
     
     def process_video(self, 
                      video_path: str,
                      output_video_path: Optional[str] = None,
                      output_json_path: Optional[str] = None,
                      visualize: bool = True,
-                     save_frames: bool = False) -> Dict:
+                     save_frames: bool = False,
+                     batch_size: int = 1,
+                     pipelined: bool = False,
+                     queue_size: int = 8,
+                     frame_sink: Optional[FrameSink] = None,
+                     progress_callback: Optional[Callable[[int, int], None]] = None,
+                     detection_stride: int = 1,
+                     detection_cache: Optional[DetectionCache] = None,
+                     frame_dump: Optional[FrameDumpWriter] = None) -> Dict:
         """
         Process a basketball video with complete analysis pipeline.
         
@@ -54,84 +143,383 @@ class BasketballVideoProcessor:
             output_video_path: Path for output video (optional)
             output_json_path: Path for JSON output (optional)
             visualize: Whether to create visualized output video
-            save_frames: Whether to save individual analyzed frames
+            save_frames: Whether to save individual analyzed frames (every
+                frame as JPEG into ``output_dir``, unless ``frame_dump`` is given)
+            batch_size: Number of decoded frames sent to the detector in a
+                single model call (1 keeps per-frame inference)
+            pipelined: Run decode, inference and annotation/encoding on
+                separate threads connected by bounded queues so they overlap
+                with tracking instead of adding to wall-clock time
+            queue_size: Maximum number of items buffered between pipeline
+                stages when ``pipelined`` is set
+            frame_sink: Streaming mode. Each frame summary is written to this
+                sink as soon as the frame is processed instead of being kept
+                in ``processing_results``; the returned results then have an
+                empty ``frame_by_frame_data``. The sink is closed when
+                processing ends.
+            progress_callback: Called as ``progress_callback(frames_processed,
+                total_frames)`` after every processed frame. It runs on the
+                tracking thread and should be cheap (throttle any I/O).
+            detection_stride: Run the detector on at most every n-th frame
+                and propagate tracks with the tracker's motion model in
+                between; keyframes are forced on high motion, a lost ball or
+                low track confidence (see ``KeyframeScheduler``). Frames are
+                then processed one at a time, so ``batch_size`` and
+                ``pipelined`` are ignored.
+            detection_cache: Reuse raw detections of an earlier run on the
+                same video and model, and record them on a miss. Frames are
+                still decoded for tracking, but inference is skipped.
+            frame_dump: Writer that saves annotated frames in the background,
+                with its own stride, event filter and image options (implies
+                ``save_frames``). Its ``stats`` are reported as
+                ``frame_dump_stats``.
             
         Returns:
             Complete processing results
         """
-        # Open video
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            raise ValueError(f"Could not open video: {video_path}")
-        
+        # Open video; the pipelined loop already decodes on its own thread
+        reader = self._open_reader(video_path, prefetch=0 if pipelined else queue_size)
         # Get video properties
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        
-        self.video_metadata = {
-            'video_path': video_path,
-            'fps': fps,
-            'width': width,
-            'height': height,
-            'total_frames': total_frames,
-            'duration_seconds': total_frames / fps if fps > 0 else 0
-        }
+        self.video_metadata = self._read_video_metadata(reader, video_path)
+        fps = self.video_metadata['fps']
+        width = self.video_metadata['width']
+        height = self.video_metadata['height']
+        total_frames = self.video_metadata['total_frames']
+        self._select_imgsz(video_path)
         
         # Setup output video if requested
         writer = None
         if output_video_path and visualize:
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            writer = cv2.VideoWriter(output_video_path, fourcc, fps, (width, height))
+            writer = open_video_writer(output_video_path, fps, (width, height),
+                                       self.video_codec, self.encoder_preset)
+        # Drawing with nowhere to send the result is wasted work; annotated
+        # video can be rendered later from the stored frame data instead
+        if save_frames and frame_dump is None:
+            frame_dump = FrameDumpWriter(str(self.output_dir))
+        visualize = visualize and (writer is not None or frame_dump is not None)
         
         print(f"Processing video: {video_path}")
-        print(f"Resolution: {width}x{height}, FPS: {fps}, Total frames: {total_frames}")
+        print(f"Resolution: {width}x{height}, FPS: {fps}, Total frames: {total_frames}, "
+              f"inference size: {self.detector.model.imgsz}")
         
-        frame_count = 0
         start_time = time.time()
+        batch_size = max(1, int(batch_size))
+        batches = self._read_batches(reader, batch_size)
+        self.frame_sink = frame_sink
+        self.keyframe_stats = None
+        self.frame_dump_stats = frame_dump.stats if frame_dump is not None else None
+        self.progress_callback = progress_callback
+        box_cache = self._open_detection_cache(detection_cache, video_path)
+        finished = False
         
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            # Calculate timestamp
-            timestamp = frame_count / fps if fps > 0 else frame_count
-            
-            # Process frame through pipeline
-            frame_results = self.process_frame(frame, timestamp)
-            self.processing_results.append(frame_results)
-            
-            # Visualization and output
-            if visualize:
-                annotated_frame = self.visualize_frame(frame, frame_results)
-                
-                if writer:
-                    writer.write(annotated_frame)
-                
-                if save_frames:
-                    frame_path = self.output_dir / f"frame_{frame_count:06d}.jpg"
-                    cv2.imwrite(str(frame_path), annotated_frame)
-            
-            frame_count += 1
-            
-            # Progress update
-            if frame_count % 100 == 0:
-                progress = (frame_count / total_frames) * 100
-                elapsed = time.time() - start_time
-                eta = (elapsed / frame_count) * (total_frames - frame_count)
-                print(f"Progress: {progress:.1f}% ({frame_count}/{total_frames}), "
-                      f"ETA: {eta:.1f}s")
-        
-        # Cleanup
-        cap.release()
-        if writer:
-            writer.release()
+        try:
+            if detection_stride > 1:
+                scheduler = KeyframeScheduler(detection_stride)
+                self.keyframe_stats = scheduler.stats
+                self._run_keyframes(self._read_batches(reader, 1), scheduler, writer,
+                                    visualize, frame_dump, total_frames, start_time)
+            elif pipelined:
+                self._run_pipelined(batches, writer, visualize, frame_dump,
+                                    total_frames, start_time, queue_size)
+            else:
+                frame_index = 0
+                for batch in batches:
+                    for frame, detections in self._detect_batch(batch):
+                        # Tracking and analytics stay strictly sequential
+                        frame_results = self._process_detections(frame, detections)
+                        self._record_frame(frame_results)
+                        
+                        # Visualization and output
+                        if visualize:
+                            self._write_annotated_frame(
+                                frame, frame_results, frame_index, writer, frame_dump
+                            )
+                        
+                        frame_index += 1
+                        self._report_progress(frame_index, total_frames, start_time)
+            finished = True
+        finally:
+            # Cleanup
+            reader.close()
+            if box_cache is not None:
+                # Only a run that reached the end of the video is worth caching
+                if finished:
+                    box_cache.close()
+                else:
+                    box_cache.abort()
+                self.detector.box_cache = None
+            if writer:
+                writer.release()
+            if frame_dump is not None:
+                frame_dump.close()
+            if frame_sink is not None:
+                frame_sink.close()
+                self.frame_sink = None
+            self.progress_callback = None
         
         processing_time = time.time() - start_time
         print(f"Processing completed in {processing_time:.1f}s")
         
+        return self._finalize_results(output_json_path)
+    
+    def process_video_segmented(self,
+                                video_path: str,
+                                output_json_path: Optional[str] = None,
+                                num_segments: Optional[int] = None,
+                                overlap_frames: int = 30,
+                                batch_size: int = 1,
+                                executor: Optional[Executor] = None,
+                                torch_threads: Optional[int] = None,
+                                iou_threshold: float = 0.3,
+                                frame_sink: Optional[FrameSink] = None,
+                                progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """
+        Process a long video as parallel, overlapping segments.
+        
+        Detection and tracking, the expensive stages, run independently per
+        segment in worker processes. Track IDs are then stitched across
+        segment boundaries using the overlap window, and analytics run once
+        over the stitched stream on this processor, so game statistics and
+        the results format are the same as for ``process_video``. No
+        annotated video is produced in this mode.
+        
+        Args:
+            video_path: Path to input video
+            output_json_path: Path for JSON output (optional)
+            num_segments: Number of segments (defaults to the CPU count)
+            overlap_frames: Frames each segment re-processes from the end of
+                the previous one, used to warm up tracking and match IDs
+            batch_size: Detection batch size inside each segment
+            executor: Executor to run segments on (defaults to a process pool
+                with one worker per segment)
+            torch_threads: Torch and inference runtime threads per segment
+                worker (defaults to an even share of the CPU cores)
+            iou_threshold: Minimum mean IoU for matching tracks across a boundary
+            frame_sink: Streaming mode, as in ``process_video``
+            progress_callback: Called with ``(frames_processed, total_frames)``
+                as segments complete
+        
+        Returns:
+            Complete processing results
+        """
+        with self._open_reader(video_path) as reader:
+            self.video_metadata = self._read_video_metadata(reader, video_path)
+        self._select_imgsz(video_path)
+        
+        total_frames = self.video_metadata['total_frames']
+        segments = plan_segments(total_frames, num_segments or default_segment_workers(), overlap_frames)
+        config = {
+            'model_path': self.model_path,
+            'confidence_threshold': self.detector.confidence_threshold,
+            'output_dir': str(self.output_dir),
+            'backend': self.backend,
+            'calibration_video': self.calibration_video,
+            'tracker_backend': self.tracker.backend,
+            'embedder_model': self.embedder_model,
+            'ball_roi': self.ball_redetector is not None,
+            'imgsz': self.detector.model.imgsz,
+            'decode_threads': self.decode_threads,
+            'decode_width': self.decode_width,
+            'possession_radius': self.tracker.possession_radius,
+            'possession_hysteresis': self.tracker.possession_hysteresis,
+            'batch_size': batch_size,
+            'torch_threads': torch_threads or max(1, default_segment_workers() // len(segments))
+        }
+        
+        print(f"Processing video: {video_path} in {len(segments)} segments "
+              f"({overlap_frames} frames overlap)")
+        start_time = time.time()
+        
+        own_executor = executor is None
+        if own_executor:
+            executor = ProcessPoolExecutor(
+                max_workers=len(segments), mp_context=multiprocessing.get_context('spawn')
+            )
+        
+        try:
+            futures = [executor.submit(process_segment, video_path, segment, config) for segment in segments]
+            segment_results = []
+            frames_done = 0
+            for segment, future in zip(segments, futures):
+                segment_results.append(future.result())
+                frames_done += segment['stop'] - segment['owned_start']
+                if progress_callback is not None:
+                    progress_callback(frames_done, total_frames)
+        finally:
+            if own_executor:
+                executor.shutdown(cancel_futures=True)
+        
+        zone_tables = {}
+        for result in segment_results:
+            zone_tables.update(result['zone_tables'])
+        
+        # Analytics are cheap next to detection and tracking, so they run
+        # once, in order, over the stitched stream
+        self.frame_sink = frame_sink
+        try:
+            for frame in stitch_segments(segment_results, iou_threshold):
+                court_zones = zone_tables.get(frame['zone_table_id'], {})
+                detections = {
+                    'frame_id': frame['frame_id'],
+                    'timestamp': frame['timestamp'],
+                    'frame_shape': frame['frame_shape'],
+                    'players': frame['players'],
+                    'ball': frame['ball'],
+                    'court_objects': [],
+                    'court_zones': court_zones,
+                    'zone_table_id': frame['zone_table_id']
+                }
+                tracking_results = self.tracker.replay_tracks({
+                    'frame_id': frame['frame_id'],
+                    'timestamp': frame['timestamp'],
+                    'tracked_players': frame['tracked_players'],
+                    'ball_info': frame['ball'],
+                    'court_zones': court_zones,
+                    'zone_table_id': frame['zone_table_id']
+                })
+                analytics_results = self.analytics.analyze_frame(tracking_results)
+                self._record_frame(self._combine_results(detections, tracking_results, analytics_results))
+        finally:
+            if frame_sink is not None:
+                frame_sink.close()
+                self.frame_sink = None
+        
+        processing_time = time.time() - start_time
+        print(f"Processing completed in {processing_time:.1f}s")
+        
+        return self._finalize_results(output_json_path)
+    
+    def track_range(self, video_path: str, start_frame: int = 0,
+                    stop_frame: Optional[int] = None, batch_size: int = 1) -> Dict:
+        """
+        Run detection and tracking only, over a range of frames.
+        
+        Frame IDs and timestamps are the ones the frames have in the full
+        video, so ranges processed separately line up.
+        
+        Args:
+            video_path: Path to input video
+            start_frame: First frame index to process
+            stop_frame: End frame index (exclusive, defaults to end of video)
+            batch_size: Number of frames per detection call
+        
+        Returns:
+            Dict with ``frames`` (per-frame detections and confirmed tracks)
+            and the ``zone_tables`` they reference
+        """
+        reader = self._open_reader(video_path, start_frame, stop_frame, prefetch=max(1, int(batch_size)))
+        self.detector.frame_count = start_frame
+        
+        frames = []
+        frame_index = start_frame
+        try:
+            for batch in self._read_batches(reader, max(1, int(batch_size))):
+                for frame, detections in self._detect_batch(batch):
+                    self._redetect_ball(frame, detections)
+                    tracking_results = self.tracker.update_tracks(detections, frame)
+                    frames.append({
+                        'frame_index': frame_index,
+                        'frame_id': detections['frame_id'],
+                        'timestamp': detections['timestamp'],
+                        'frame_shape': detections['frame_shape'],
+                        'players': detections['players'],
+                        'ball': detections['ball'],
+                        'zone_table_id': detections['zone_table_id'],
+                        'tracked_players': tracking_results['tracked_players']
+                    })
+                    frame_index += 1
+        finally:
+            reader.close()
+        
+        return {
+            'frames': frames,
+            'zone_tables': dict(self.detector.zone_tables)
+        }
+    
+    def _open_detection_cache(self, detection_cache: Optional[DetectionCache], video_path: str):
+        """
+        Attach the cache entry for a video to the detector.
+        
+        Args:
+            detection_cache: Detection cache (optional)
+            video_path: Path to input video
+        
+        Returns:
+            The attached entry (read-only on a hit, a writer on a miss), or
+            None when caching does not apply
+        """
+        if detection_cache is None:
+            return None
+        
+        # Boxes below the cache confidence are not stored
+        if self.detector.confidence_threshold < detection_cache.confidence:
+            return None
+        
+        # Boxes are in decoded-frame pixels, so the decode size is part of the key
+        frame_size = (self.video_metadata['width'], self.video_metadata['height'])
+        key = detection_cache.key(video_path, self.detector.model_path, self.detector.backend,
+                                  self.detector.model.imgsz, frame_size)
+        box_cache = detection_cache.open(key)
+        if box_cache is not None:
+            print(f"Detection cache hit: {len(box_cache)} frames")
+        else:
+            box_cache = detection_cache.create(key)
+        
+        self.detector.box_cache = box_cache
+        self.detector.box_cache_offset = self.detector.frame_count
+        return box_cache
+    
+    def _select_imgsz(self, video_path: str, num_frames: int = 8):
+        """
+        Choose the detector input size for a video when ``imgsz='auto'``.
+        
+        Args:
+            video_path: Path to input video
+            num_frames: Frames sampled evenly over the video
+        """
+        if not self.auto_imgsz:
+            return
+        
+        try:
+            frames = sample_calibration_frames(video_path, num_frames, self.decode_width)
+        except ValueError:
+            return
+        imgsz = self.detector.select_imgsz(frames)
+        print(f"Selected inference size {imgsz} from {len(frames)} sample frames")
+    
+    def _open_reader(self, video_path: str, start_frame: int = 0,
+                     stop_frame: Optional[int] = None, prefetch: int = 0) -> VideoReader:
+        """
+        Open a video with the processor's decode options.
+        
+        Args:
+            video_path: Path to input video
+            start_frame: First frame index to decode
+            stop_frame: End frame index (exclusive, defaults to end of video)
+            prefetch: Frames decoded ahead on a background thread
+        
+        Returns:
+            Video reader
+        """
+        return VideoReader(video_path, start_frame, stop_frame, max_width=self.decode_width,
+                           threads=self.decode_threads, prefetch=prefetch)
+    
+    def _read_video_metadata(self, reader: VideoReader, video_path: str) -> Dict:
+        """Read frame rate, decoded resolution and length of an opened video."""
+        fps = reader.fps
+        total_frames = reader.total_frames
+        
+        return {
+            'video_path': video_path,
+            'fps': fps,
+            'width': reader.width,
+            'height': reader.height,
+            'total_frames': total_frames,
+            'duration_seconds': total_frames / fps if fps > 0 else 0
+        }
+    
+    def _finalize_results(self, output_json_path: Optional[str]) -> Dict:
+        """Generate the final results and save them as JSON."""
         # Generate final results
         final_results = self.generate_final_results()
         
@@ -145,6 +533,219 @@ class BasketballVideoProcessor:
         
         return final_results
     
+    def _read_batches(self, reader: VideoReader,
+                      batch_size: int) -> Iterator[List[Tuple[np.ndarray, float]]]:
+        """
+        Decode the reader's frame range and group it into detection batches.
+        
+        Args:
+            reader: Opened video reader
+            batch_size: Maximum number of frames per batch
+        
+        Yields:
+            Lists of (frame, timestamp) pairs in presentation order
+        """
+        batch = []
+        
+        for frame_index, frame in reader:
+            batch.append((frame, reader.timestamp(frame_index)))
+            
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        
+        # Flush the remainder at end of stream
+        if batch:
+            yield batch
+    
+    def _detect_batch(self, batch: List[Tuple[np.ndarray, float]]) -> List[Tuple[np.ndarray, Dict]]:
+        """
+        Run the detector on a batch of decoded frames.
+        
+        Args:
+            batch: List of (frame, timestamp) pairs
+        
+        Returns:
+            List of (frame, detections) pairs in the same order
+        """
+        frames = [frame for frame, _ in batch]
+        
+        if len(batch) == 1:
+            detections = [self.detector.detect_frame(frames[0], batch[0][1])]
+        else:
+            detections = self.detector.detect_batch(frames, [ts for _, ts in batch])
+        
+        # All player crops of the batch go through the embedder together
+        self.tracker.embed_players(frames, detections)
+        
+        return list(zip(frames, detections))
+    
+    def _run_pipelined(self, batches: Iterator[List[Tuple[np.ndarray, float]]],
+                       writer: Optional[VideoWriter], visualize: bool,
+                       frame_dump: Optional[FrameDumpWriter], total_frames: int, start_time: float,
+                       queue_size: int):
+        """
+        Run the analysis loop as a staged, multi-threaded pipeline.
+        
+        Decoding, detection and annotation/encoding each run on their own
+        thread. Tracking and analytics run on the calling thread, one frame
+        at a time and in presentation order, so results are identical to the
+        sequential loop.
+        
+        Args:
+            batches: Iterator of decoded (frame, timestamp) batches
+            writer: Output video writer (optional)
+            visualize: Whether to annotate frames
+            frame_dump: Annotated frame image writer (optional)
+            total_frames: Total frame count, used for progress reporting
+            start_time: Processing start time
+            queue_size: Maximum number of items buffered between stages
+        """
+        pipeline = StagePipeline(queue_size)
+        decoded = pipeline.source('decode', batches)
+        detected = pipeline.stage('detect', self._detect_batch, decoded)
+        
+        annotate_queue = None
+        if visualize:
+            annotate_queue = pipeline.new_queue()
+            pipeline.sink(
+                'annotate',
+                lambda item: self._write_annotated_frame(*item),
+                annotate_queue
+            )
+        
+        try:
+            frame_index = 0
+            for batch in pipeline.drain(detected):
+                for frame, detections in batch:
+                    frame_results = self._process_detections(frame, detections)
+                    self._record_frame(frame_results)
+                    
+                    if annotate_queue is not None:
+                        # Snapshot the trajectory so the overlay matches this frame
+                        # even if tracking has moved on by the time it is drawn
+                        trajectory = self.tracker.ball_trajectory.window(10).copy()
+                        pipeline.put(annotate_queue, (
+                            frame, frame_results, frame_index, writer, frame_dump, trajectory
+                        ))
+                    
+                    frame_index += 1
+                    self._report_progress(frame_index, total_frames, start_time)
+        except BaseException:
+            pipeline.stop()
+            raise
+        finally:
+            if annotate_queue is not None:
+                pipeline.close(annotate_queue)
+            pipeline.join()
+    
+    def _run_keyframes(self, frames: Iterator[List[Tuple[np.ndarray, float]]],
+                       scheduler: KeyframeScheduler, writer: Optional[VideoWriter],
+                       visualize: bool, frame_dump: Optional[FrameDumpWriter],
+                       total_frames: int, start_time: float):
+        """
+        Run the analysis loop, detecting on keyframes only.
+        
+        Non-keyframes get an empty detection payload with an extrapolated
+        ball, and the tracker advances its tracks with the motion model, so
+        analytics still see players and the ball on every frame.
+        
+        Args:
+            frames: Iterator of single-frame (frame, timestamp) batches
+            scheduler: Keyframe scheduler
+            writer: Output video writer (optional)
+            visualize: Whether to annotate frames
+            frame_dump: Annotated frame image writer (optional)
+            total_frames: Total frame count, used for progress reporting
+            start_time: Processing start time
+        """
+        frame_index = 0
+        for batch in frames:
+            for frame, timestamp in batch:
+                keyframe = scheduler.is_keyframe()
+                if keyframe:
+                    detections = self.detector.detect_frame(frame, timestamp)
+                    self._redetect_ball(frame, detections)
+                    tracking_results = self.tracker.update_tracks(detections, frame)
+                else:
+                    detections = self.detector.skip_frame(frame, timestamp)
+                    detections['ball'] = scheduler.extrapolate_ball()
+                    tracking_results = self.tracker.propagate_tracks(detections)
+                detections['keyframe'] = keyframe
+                scheduler.update(detections, tracking_results, keyframe)
+                
+                analytics_results = self.analytics.analyze_frame(tracking_results)
+                frame_results = self._combine_results(detections, tracking_results, analytics_results)
+                self._record_frame(frame_results)
+                
+                if visualize:
+                    self._write_annotated_frame(frame, frame_results, frame_index, writer, frame_dump)
+                
+                frame_index += 1
+                self._report_progress(frame_index, total_frames, start_time)
+    
+    def _write_annotated_frame(self, frame: np.ndarray, frame_results: Dict,
+                               frame_index: int, writer: Optional[VideoWriter],
+                               frame_dump: Optional[FrameDumpWriter],
+                               ball_trajectory: Optional[np.ndarray] = None):
+        """
+        Annotate a frame and send it to the configured outputs.
+        
+        Args:
+            frame: Original frame
+            frame_results: Complete frame analysis
+            frame_index: Zero-based index of the frame in the video
+            writer: Output video writer (optional)
+            frame_dump: Annotated frame image writer (optional)
+            ball_trajectory: Ball trajectory snapshot to draw (defaults to
+                the tracker's current trajectory)
+        """
+        dump = frame_dump is not None and frame_dump.wants(frame_index, frame_results)
+        if frame_dump is not None and not dump:
+            frame_dump.skip()
+        if writer is None and not dump:
+            return
+        
+        # The decoded frame is not used after this, so it is annotated in
+        # place and handed to the frame dump without a copy
+        annotated_frame = self.visualize_frame(frame, frame_results, ball_trajectory, out=frame)
+        
+        if writer:
+            writer.write(annotated_frame)
+        
+        if dump:
+            frame_dump.submit(frame_index, annotated_frame)
+    
+    def _record_frame(self, frame_results: Dict):
+        """
+        Update running aggregates and keep or stream a frame's results.
+        
+        Args:
+            frame_results: Complete frame analysis
+        """
+        self.frame_totals['frames'] += 1
+        ball = frame_results['detections']['ball']
+        if ball is not None and not ball.get('interpolated'):
+            self.frame_totals['frames_with_ball'] += 1
+        self.frame_totals['events'] += len(frame_results['analytics'].get('events', []))
+        
+        if self.frame_sink is not None:
+            self.frame_sink.write(self._summarize_frame(frame_results))
+        else:
+            self.processing_results.append(frame_results)
+    
+    def _report_progress(self, frame_count: int, total_frames: int, start_time: float):
+        """Notify the progress callback and print a progress update every 100 frames."""
+        if self.progress_callback is not None:
+            self.progress_callback(frame_count, total_frames)
+        
+        if frame_count % 100 == 0:
+            progress = (frame_count / total_frames) * 100
+            elapsed = time.time() - start_time
+            eta = (elapsed / frame_count) * (total_frames - frame_count)
+            print(f"Progress: {progress:.1f}% ({frame_count}/{total_frames}), "
+                  f"ETA: {eta:.1f}s")
+    
     def process_frame(self, frame: np.ndarray, timestamp: float) -> Dict:
         """
         Process a single frame through the complete pipeline.
@@ -159,15 +760,57 @@ class BasketballVideoProcessor:
         # 1. Detection
         detections = self.detector.detect_frame(frame, timestamp)
         
+        return self._process_detections(frame, detections)
+    
+    def _process_detections(self, frame: np.ndarray, detections: Dict) -> Dict:
+        """
+        Run tracking and analytics on detections for a single frame.
+        
+        Args:
+            frame: Video frame the detections belong to
+            detections: Detection results from the detector
+        
+        Returns:
+            Complete frame analysis results
+        """
         # 2. Tracking
+        self._redetect_ball(frame, detections)
         tracking_results = self.tracker.update_tracks(detections, frame)
         
         # 3. Analytics
         analytics_results = self.analytics.analyze_frame(tracking_results)
         
-        # Combine all results
+        return self._combine_results(detections, tracking_results, analytics_results)
+    
+    def _redetect_ball(self, frame: np.ndarray, detections: Dict):
+        """
+        Look for a missed ball around its predicted position, if enabled.
+        
+        Runs on the tracking thread, right before the tracker update, so the
+        prediction uses the trajectory up to the previous frame.
+        
+        Args:
+            frame: Video frame the detections belong to
+            detections: Detection results (``ball`` is filled in place)
+        """
+        if self.ball_redetector is not None:
+            self.ball_redetector.refine(frame, detections, self.tracker.ball_trajectory.window(2))
+    
+    def _combine_results(self, detections: Dict, tracking_results: Dict,
+                         analytics_results: Dict) -> Dict:
+        """
+        Combine the outputs of each stage into the per-frame result.
+        
+        Args:
+            detections: Detection results
+            tracking_results: Tracking results
+            analytics_results: Analytics results
+        
+        Returns:
+            Complete frame analysis results
+        """
         frame_results = {
-            'timestamp': timestamp,
+            'timestamp': detections['timestamp'],
             'frame_id': detections['frame_id'],
             'detections': detections,
             'tracking': tracking_results,
@@ -181,45 +824,31 @@ class BasketballVideoProcessor:
         
         return frame_results
     
-    def visualize_frame(self, frame: np.ndarray, frame_results: Dict) -> np.ndarray:
+    def visualize_frame(self, frame: np.ndarray, frame_results: Dict,
+                        ball_trajectory: Optional[np.ndarray] = None,
+                        out: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Create a comprehensive visualization of frame analysis.
         
+        Detections, tracks, analytics and the info panel are drawn in one
+        pass by ``OverlayRenderer``, over court layers pre-rendered once per
+        resolution.
+        
         Args:
             frame: Original frame
             frame_results: Complete frame analysis
+            ball_trajectory: Ball trajectory snapshot to draw (defaults to
+                the tracker's current trajectory)
+            out: Array to draw into (``frame`` to annotate in place); by
+                default a buffer reused by the next call
             
         Returns:
             Annotated frame with all visualizations
         """
-        # Start with detector visualization
-        annotated_frame = self.detector.visualize_detections(
-            frame, frame_results['detections']
-        )
-        
-        # Add tracking visualization
-        annotated_frame = self.tracker.visualize_tracks(
-            annotated_frame, frame_results['tracking']
-        )
-        
-        # Add analytics visualization
-        annotated_frame = self.analytics.visualize_analytics(
-            annotated_frame, frame_results['analytics']
-        )
-        
-        # Add general info overlay
-        info_text = [
-            f"Frame: {frame_results['frame_id']}",
-            f"Time: {frame_results['timestamp']:.1f}s",
-            f"Players: {frame_results['processing_metadata']['tracked_players']}",
-            f"Events: {frame_results['processing_metadata']['events_detected']}"
-        ]
+        if ball_trajectory is None:
+            ball_trajectory = self.tracker.ball_trajectory.window(10)
         
-        for i, text in enumerate(info_text):
-            cv2.putText(annotated_frame, text, (10, frame.shape[0] - 100 + i*20), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
-        
-        return annotated_frame
+        return self.renderer.render(frame, frame_results, ball_trajectory, out)
     
     def generate_final_results(self) -> Dict:
         """
@@ -234,35 +863,17 @@ class BasketballVideoProcessor:
         # Get tracking statistics
         tracking_stats = self.tracker.get_all_stats()
         
-        # Compile frame-by-frame data
-        frame_data = []
-        for frame_result in self.processing_results:
-            frame_summary = {
-                'timestamp': frame_result['timestamp'],
-                'frame_id': frame_result['frame_id'],
-                'players_detected': len(frame_result['detections']['players']),
-                'ball_detected': frame_result['detections']['ball'] is not None,
-                'tracked_players': [
-                    {
-                        'track_id': p['track_id'],
-                        'position': p['center'],
-                        'bbox': p['bbox']
-                    }
-                    for p in frame_result['tracking']['tracked_players']
-                ],
-                'events': frame_result['analytics'].get('events', []),
-                'possession': frame_result['tracking'].get('possession', {}),
-                'ball_position': (
-                    frame_result['detections']['ball']['center'] 
-                    if frame_result['detections']['ball'] else None
-                )
-            }
-            frame_data.append(frame_summary)
+        # Compile frame-by-frame data (empty in streaming mode, where it was
+        # already written to the frame sink)
+        frame_data = [
+            self._summarize_frame(frame_result)
+            for frame_result in self.processing_results
+        ]
         
-        # Summary statistics
-        total_frames = len(self.processing_results)
-        frames_with_ball = sum(1 for f in frame_data if f['ball_detected'])
-        total_events = sum(len(f['events']) for f in frame_data)
+        # Summary statistics from running aggregates
+        total_frames = self.frame_totals['frames']
+        frames_with_ball = self.frame_totals['frames_with_ball']
+        total_events = self.frame_totals['events']
         
         final_results = {
             'video_metadata': self.video_metadata,
@@ -271,7 +882,8 @@ class BasketballVideoProcessor:
                 'frames_with_ball_detected': frames_with_ball,
                 'ball_detection_rate': frames_with_ball / total_frames if total_frames > 0 else 0,
                 'total_events_detected': total_events,
-                'unique_players_tracked': len(tracking_stats['players'])
+                'unique_players_tracked': len(tracking_stats['players']),
+                'inference_imgsz': self.detector.model.imgsz
             },
             'game_statistics': game_stats,
             'tracking_statistics': tracking_stats,
@@ -292,36 +904,70 @@ class BasketballVideoProcessor:
             }
         }
         
+        if self.keyframe_stats is not None:
+            final_results['keyframe_stats'] = self.keyframe_stats
+        
+        if self.ball_redetector is not None:
+            final_results['ball_roi_stats'] = dict(self.ball_redetector.stats)
+        
+        if self.frame_dump_stats is not None:
+            final_results['frame_dump_stats'] = dict(self.frame_dump_stats)
+        
         return final_results
     
-    def save_json_results(self, results: Dict, output_path: str):
+    def _summarize_frame(self, frame_result: Dict) -> Dict:
         """
-        Save analysis results to JSON file with proper formatting.
+        Build the compact per-frame summary stored in ``frame_by_frame_data``.
         
         Args:
-            results: Analysis results to save
-            output_path: Output JSON file path
-        """
-        # Convert numpy types to Python native types for JSON serialization
-        def convert_numpy(obj):
-            if isinstance(obj, np.ndarray):
-                return obj.tolist()
-            elif isinstance(obj, np.floating):
-                return float(obj)
-            elif isinstance(obj, np.integer):
-                return int(obj)
-            elif isinstance(obj, dict):
-                return {key: convert_numpy(value) for key, value in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_numpy(item) for item in obj]
-            else:
-                return obj
+            frame_result: Complete frame analysis
         
-        # Convert and save
-        json_safe_results = convert_numpy(results)
+        Returns:
+            Frame summary
+        """
+        return {
+            'timestamp': frame_result['timestamp'],
+            'frame_id': frame_result['frame_id'],
+            'players_detected': len(frame_result['detections']['players']),
+            'ball_detected': (
+                frame_result['detections']['ball'] is not None
+                and not frame_result['detections']['ball'].get('interpolated')
+            ),
+            'tracked_players': [
+                {
+                    'track_id': p['track_id'],
+                    'position': p['center'],
+                    'bbox': p['bbox']
+                }
+                for p in frame_result['tracking']['tracked_players']
+            ],
+            'events': frame_result['analytics'].get('events', []),
+            'possession': frame_result['tracking'].get('possession', {}),
+            'ball_position': (
+                frame_result['detections']['ball']['center'] 
+                if frame_result['detections']['ball'] else None
+            )
+        }
+    
+    def save_json_results(self, results: Dict, output_path: str,
+                          compression: Optional[str] = 'auto'):
+        """
+        Save analysis results to a JSON file.
+        
+        The results are streamed to disk (``frame_by_frame_data`` chunk by
+        chunk) without building a converted copy first; NumPy values,
+        analytics dataclasses and ``heat_map`` tuple keys are encoded on
+        the way (see ``StreamingJSONEncoder``). Indentation follows
+        ``json_indent``.
         
-        with open(output_path, 'w') as f:
-            json.dump(json_safe_results, f, indent=2, default=str)
+        Args:
+            results: Analysis results to save
+            output_path: Output JSON file path; a ``.gz`` or ``.zst``
+                extension compresses the output
+            compression: ``gzip``, ``zstd``, None, or ``auto`` to pick from
+                the file extension
+        """
+        dump_json(results, output_path, self.json_indent, compression)
         
         print(f"Analysis results saved to: {output_path}")
     
@@ -371,11 +1017,11 @@ class BasketballVideoProcessor:
     
     def get_current_stats(self) -> Dict:
         """Get current processing statistics."""
-        if not self.processing_results:
+        if not self.frame_totals['frames']:
             return {"status": "No frames processed yet"}
         
         return {
-            "frames_processed": len(self.processing_results),
+            "frames_processed": self.frame_totals['frames'],
             "current_game_stats": self.analytics.get_game_statistics(),
             "current_tracking_stats": self.tracker.get_all_stats()
         }
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""Vectorized ball-to-player proximity, shared by possession and touch counting."""
+
+from typing import Sequence, Tuple
+
+import numpy as np
+
+
+# A player within this distance of the ball (center to center) can have possession
+POSSESSION_RADIUS_PIXELS = 80.0
+
+
+def ball_distances(centers: np.ndarray, ball) -> np.ndarray:
+    """
+    Euclidean distance of every player center to the ball.
+    
+    Args:
+        centers: Player centers, shape (N, 2)
+        ball: Ball position, shape (2,), or one ball position per center,
+            shape (N, 2); NaN positions give NaN distances
+    
+    Returns:
+        Distances, shape (N,)
+    """
+    offsets = np.asarray(ball, dtype=np.float64) - np.asarray(centers, dtype=np.float64).reshape(-1, 2)
+    return np.sqrt(np.einsum('ij,ij->i', offsets, offsets))
+
+
+def nearest_player(centers: np.ndarray, ball: Sequence[float],
+                   radius: float = POSSESSION_RADIUS_PIXELS, current: int = -1,
+                   hysteresis: float = 0.0) -> Tuple[int, np.ndarray]:
+    """
+    Index of the player closest to the ball, if within ``radius``.
+    
+    With ``hysteresis`` > 0 the current possessor keeps the ball while it
+    is within ``radius`` and no other player is more than ``hysteresis``
+    pixels closer, so possession does not flicker between two players at
+    almost the same distance.
+    
+    Args:
+        centers: Player centers, shape (N, 2)
+        ball: Ball position
+        radius: Maximum distance for possession (exclusive)
+        current: Index of the current possessor in ``centers`` (-1 if
+            nobody or not tracked this frame)
+        hysteresis: Margin in pixels a challenger must beat the current
+            possessor by (0 disables hysteresis)
+    
+    Returns:
+        (index of the possessing player or -1, distances of all players)
+    """
+    distances = ball_distances(centers, ball)
+    if not len(distances):
+        return -1, distances
+    
+    # argmin keeps the first of equally close players
+    nearest = int(np.argmin(distances))
+    if (hysteresis > 0 and 0 <= current < len(distances) and distances[current] < radius
+            and distances[current] <= distances[nearest] + hysteresis):
+        return current, distances
+    if distances[nearest] < radius:
+        return nearest, distances
+    return -1, distances
@@ -0,0 +1,182 @@
+"""Deferred rendering of annotated videos from stored per-frame data."""
+
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+
+from .detector import BasketballDetector
+from .frame_store import FrameStore, frame_store_dir
+from .overlay import OverlayRenderer
+from .ring_buffer import RingBuffer
+from .sinks import read_frame_jsonl
+from .video_io import DEFAULT_PRESET, VideoReader, open_video_writer
+
+
+TRAJECTORY_LENGTH = 10
+
+
+def render_cache_dir(analysis_id: str, root: Optional[str] = None) -> Path:
+    """
+    Directory of the rendered clips of an analysis.
+    
+    Args:
+        analysis_id: Analysis ID
+        root: Base directory (defaults to ``RENDER_CACHE_DIR`` or ``renders``)
+    
+    Returns:
+        Render cache directory path
+    """
+    return Path(root or os.getenv('RENDER_CACHE_DIR', 'renders')) / analysis_id
+
+
+def render_cache_path(analysis_id: str, start_time: Optional[float] = None,
+                      end_time: Optional[float] = None, root: Optional[str] = None) -> Path:
+    """
+    Where the rendered clip of an analysis and time range is cached.
+    
+    Args:
+        analysis_id: Analysis ID
+        start_time: Clip start in seconds (None = start of the video)
+        end_time: Clip end in seconds (None = end of the video)
+        root: Base directory (defaults to ``RENDER_CACHE_DIR`` or ``renders``)
+    
+    Returns:
+        ``<root>/<analysis_id>/<start>-<end>.mp4``
+    """
+    start = 'start' if start_time is None else f"{start_time:.3f}"
+    end = 'end' if end_time is None else f"{end_time:.3f}"
+    return render_cache_dir(analysis_id, root) / f"{start}-{end}.mp4"
+
+
+def render_annotated_video(video_path: str, frames: Iterable[Dict], output_path: str,
+                           start_time: Optional[float] = None, end_time: Optional[float] = None,
+                           renderer: Optional[OverlayRenderer] = None,
+                           max_width: Optional[int] = None, codec: str = 'h264',
+                           preset: str = DEFAULT_PRESET) -> Dict:
+    """
+    Re-decode a source video and draw overlays from its stored frame summaries.
+    
+    Summaries are matched to decoded frames by timestamp, so ``frames`` may
+    start anywhere before the requested range and may have gaps; frames
+    without a summary are written unannotated. The clip is written to a
+    temporary file and moved into place once complete.
+    
+    Args:
+        video_path: Source video that was analyzed
+        frames: Frame summaries in frame order (``frame_by_frame_data``, a
+            ``FrameStore`` or a JSON Lines frame file)
+        output_path: Path of the rendered clip
+        start_time: Clip start in seconds (defaults to the start of the video)
+        end_time: Clip end in seconds, exclusive (defaults to the end of the video)
+        renderer: Overlay renderer to use
+        max_width: Width the video was analyzed at, if it was downscaled
+            while decoding (see ``VideoReader``)
+        codec: Output codec (see ``open_video_writer``)
+        preset: libx264 preset for ``h264`` output
+    
+    Returns:
+        Dict with ``output_path``, ``frames_written`` and ``frames_annotated``
+    
+    Raises:
+        ValueError: If the video cannot be opened
+    """
+    # Opened once to map times to frames, then positioned on the range
+    reader = VideoReader(video_path, max_width=max_width, prefetch=8)
+    frame_index = reader.frame_index
+    reader.start_frame = frame_index(start_time) if start_time else 0
+    reader.stop_frame = frame_index(end_time) if end_time is not None else None
+    width, height = reader.width, reader.height
+    
+    renderer = renderer or OverlayRenderer()
+    court_zones = BasketballDetector._build_zone_table(height, width)
+    zone_table_id = BasketballDetector._zone_table_id((height, width))
+    trajectory = RingBuffer(TRAJECTORY_LENGTH, 4)
+    
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = output_path.with_name(f"{output_path.stem}.part{output_path.suffix}")
+    writer = open_video_writer(str(partial_path), reader.fps, (width, height), codec, preset)
+    
+    summaries = iter(frames)
+    summary = next(summaries, None)
+    frames_written = frames_annotated = 0
+    
+    try:
+        for index, frame in reader:
+            # Skip summaries of earlier frames; recent ones still feed the trajectory
+            while summary is not None and frame_index(summary['timestamp']) < index:
+                if frame_index(summary['timestamp']) >= index - TRAJECTORY_LENGTH:
+                    _append_ball(trajectory, summary)
+                summary = next(summaries, None)
+            
+            if summary is not None and frame_index(summary['timestamp']) == index:
+                _append_ball(trajectory, summary)
+                renderer.render_summary(frame, summary, court_zones, zone_table_id,
+                                        trajectory.window(), out=frame)
+                frames_annotated += 1
+                summary = next(summaries, None)
+            
+            writer.write(frame)
+            frames_written += 1
+    finally:
+        reader.close()
+        writer.release()
+    
+    os.replace(partial_path, output_path)
+    return {
+        'output_path': str(output_path),
+        'frames_written': frames_written,
+        'frames_annotated': frames_annotated
+    }
+
+
+def _append_ball(trajectory: RingBuffer, summary: Dict) -> None:
+    """Add a summary's ball position, if any, to the trajectory."""
+    position = summary.get('ball_position')
+    if position is not None:
+        trajectory.append(summary['timestamp'], position[0], position[1], summary['frame_id'])
+
+
+def render_analysis_video(analysis_id: str, video_path: str, start_time: Optional[float] = None,
+                          end_time: Optional[float] = None, frame_data_path: Optional[str] = None,
+                          cache_root: Optional[str] = None, max_width: Optional[int] = None) -> Path:
+    """
+    Get the annotated clip of an analysis, rendering it on first request.
+    
+    Frame data is read from the analysis frame store, or from a JSON Lines
+    frame file when there is no store.
+    
+    Args:
+        analysis_id: Analysis ID
+        video_path: Source video that was analyzed
+        start_time: Clip start in seconds
+        end_time: Clip end in seconds
+        frame_data_path: JSON Lines frame file, used without a frame store
+        cache_root: Render cache directory (see ``render_cache_path``)
+        max_width: Width the video was analyzed at, if it was downscaled
+    
+    Returns:
+        Path of the cached clip
+    
+    Raises:
+        FileNotFoundError: If the analysis has no stored frame data
+    """
+    target = render_cache_path(analysis_id, start_time, end_time, cache_root)
+    if target.exists():
+        return target
+    
+    store_path = frame_store_dir(analysis_id)
+    if FrameStore.exists(str(store_path)):
+        store = FrameStore(str(store_path))
+        # Start a trajectory's length early so the first frames show it
+        start_row = int(np.searchsorted(store.timestamp, start_time or 0.0)) - TRAJECTORY_LENGTH
+        frames = store.iter_frames(max(0, start_row))
+    elif frame_data_path and os.path.exists(frame_data_path):
+        frames = read_frame_jsonl(frame_data_path)
+    else:
+        raise FileNotFoundError(f"No stored frame data for analysis {analysis_id}")
+    
+    render_annotated_video(video_path, frames, str(target), start_time, end_time, max_width=max_width)
+    return target
@@ -0,0 +1,74 @@
+"""Fixed-capacity, NumPy-backed ring buffers for per-frame histories."""
+
+from typing import Optional
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Preallocated ring buffer of fixed-width float rows (e.g. ``(t, x, y)``).
+    
+    Every row is written twice, at ``i`` and ``i + capacity``, so the most
+    recent ``n`` rows are always one contiguous slice: ``append`` is O(1)
+    and ``window`` returns a zero-copy, read-only view in insertion order.
+    """
+    
+    def __init__(self, capacity: int, columns: int = 3, dtype=np.float64):
+        """
+        Allocate the buffer.
+        
+        Args:
+            capacity: Maximum number of rows kept (older rows are overwritten)
+            columns: Values per row
+            dtype: Row dtype
+        """
+        if capacity < 1:
+            raise ValueError(f"Ring buffer capacity must be positive, got {capacity}")
+        
+        self.capacity = capacity
+        self._data = np.zeros((2 * capacity, columns), dtype=dtype)
+        self._next = 0   # Slot in [0, capacity) the next row is written to
+        self._size = 0
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def append(self, *values) -> None:
+        """Append one row, overwriting the oldest once the buffer is full."""
+        self._data[self._next] = values
+        self._data[self._next + self.capacity] = values
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+    
+    def window(self, n: Optional[int] = None) -> np.ndarray:
+        """
+        Most recent rows, oldest first.
+        
+        Args:
+            n: Number of rows (defaults to all stored rows)
+        
+        Returns:
+            Read-only view of shape (min(n, len), columns)
+        """
+        n = self._size if n is None else max(0, min(n, self._size))
+        end = self._next + self.capacity
+        view = self._data[end - n:end]
+        view.flags.writeable = False
+        return view
+    
+    def last(self) -> np.ndarray:
+        """
+        Most recent row.
+        
+        Raises:
+            IndexError: If the buffer is empty
+        """
+        if not self._size:
+            raise IndexError("last() on an empty ring buffer")
+        return self.window(1)[0]
+    
+    def clear(self) -> None:
+        """Drop all rows (the storage is kept)."""
+        self._next = 0
+        self._size = 0
@@ -0,0 +1,215 @@
+"""Split a long video into overlapping segments and stitch their tracks back together."""
+
+import os
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .geometry import iou_matrix
+from .proximity import POSSESSION_RADIUS_PIXELS
+
+
+def plan_segments(total_frames: int, num_segments: int, overlap_frames: int = 30) -> List[Dict]:
+    """
+    Split a video into contiguous segments that each start with an overlap window.
+    
+    Every segment except the first starts ``overlap_frames`` before the first
+    frame it owns. The overlap warms up the segment's tracker (DeepSORT only
+    confirms a track after several hits) and is where its tracks are matched
+    against the previous segment.
+    
+    Args:
+        total_frames: Number of frames in the video
+        num_segments: Number of segments to create
+        overlap_frames: Frames shared with the previous segment
+    
+    Returns:
+        Segments as dicts with ``index``, ``start`` (first decoded frame),
+        ``owned_start`` (first frame whose results are kept) and ``stop``
+        (exclusive), all as zero-based frame indices
+    """
+    num_segments = max(1, min(num_segments, total_frames)) if total_frames > 0 else 1
+    bounds = np.linspace(0, max(total_frames, 0), num_segments + 1).round().astype(int)
+    
+    segments = []
+    for index in range(num_segments):
+        owned_start, stop = int(bounds[index]), int(bounds[index + 1])
+        segments.append({
+            'index': index,
+            'start': max(0, owned_start - overlap_frames) if index > 0 else 0,
+            'owned_start': owned_start,
+            'stop': stop
+        })
+    
+    return segments
+
+
+def process_segment(video_path: str, segment: Dict, config: Optional[Dict] = None) -> Dict:
+    """
+    Run detection and tracking on one segment of a video.
+    
+    This is a module-level function so it can be submitted to a process
+    pool or enqueued as a separate RQ job.
+    
+    Args:
+        video_path: Path to input video
+        segment: Segment from ``plan_segments``
+        config: Processor options (``model_path``, ``confidence_threshold``,
+            ``backend``, ``calibration_video``, ``tracker_backend``,
+            ``embedder_model``, ``ball_roi``, ``imgsz``, ``decode_threads``,
+            ``decode_width``, ``possession_radius``, ``possession_hysteresis``,
+            ``batch_size``, ``torch_threads``)
+    
+    Returns:
+        Output of ``BasketballVideoProcessor.track_range`` plus the segment
+    """
+    from .processor import BasketballVideoProcessor
+    
+    config = config or {}
+    
+    # Keep each worker process from claiming every core for itself
+    if config.get('torch_threads'):
+        import torch
+        torch.set_num_threads(int(config['torch_threads']))
+    
+    processor = BasketballVideoProcessor(
+        model_path=config.get('model_path', 'yolov8n.pt'),
+        confidence_threshold=config.get('confidence_threshold', 0.25),
+        output_dir=config.get('output_dir', 'output'),
+        backend=config.get('backend', 'torch'),
+        calibration_video=config.get('calibration_video'),
+        tracker_backend=config.get('tracker_backend', 'deepsort'),
+        embedder_model=config.get('embedder_model', 'default'),
+        ball_roi=config.get('ball_roi', False),
+        imgsz=config.get('imgsz'),
+        threads=config.get('torch_threads'),
+        decode_threads=config.get('decode_threads'),
+        decode_width=config.get('decode_width'),
+        possession_radius=config.get('possession_radius', POSSESSION_RADIUS_PIXELS),
+        possession_hysteresis=config.get('possession_hysteresis', 0.0)
+    )
+    result = processor.track_range(
+        video_path,
+        start_frame=segment['start'],
+        stop_frame=segment['stop'],
+        batch_size=config.get('batch_size', 1)
+    )
+    result['segment'] = segment
+    
+    return result
+
+
+def default_segment_workers() -> int:
+    """Number of segment workers to use when none is configured."""
+    return max(1, os.cpu_count() or 1)
+
+
+def match_overlap_tracks(previous_frames: List[Dict], next_frames: List[Dict],
+                         iou_threshold: float = 0.3) -> Dict:
+    """
+    Match tracks of two segments using the frames both segments processed.
+    
+    For every pair of tracks, the IoU of their boxes is averaged over the
+    overlap frames in which both are present; pairs are then assigned
+    greedily from the highest mean IoU down.
+    
+    Args:
+        previous_frames: Tracked frames of the earlier segment
+        next_frames: Tracked frames of the later segment
+        iou_threshold: Minimum mean IoU for two tracks to be the same player
+    
+    Returns:
+        Mapping of the later segment's track IDs to the earlier segment's
+    """
+    previous_by_id = {frame['frame_id']: frame for frame in previous_frames}
+    iou_sums = {}
+    co_occurrences = {}
+    
+    for frame in next_frames:
+        previous = previous_by_id.get(frame['frame_id'])
+        if previous is None or not previous['tracked_players'] or not frame['tracked_players']:
+            continue
+        
+        previous_ids = [p['track_id'] for p in previous['tracked_players']]
+        next_ids = [p['track_id'] for p in frame['tracked_players']]
+        ious = iou_matrix(
+            np.asarray([p['bbox'] for p in previous['tracked_players']], dtype=np.float64),
+            np.asarray([p['bbox'] for p in frame['tracked_players']], dtype=np.float64)
+        )
+        
+        for i, previous_id in enumerate(previous_ids):
+            for j, next_id in enumerate(next_ids):
+                key = (next_id, previous_id)
+                iou_sums[key] = iou_sums.get(key, 0.0) + float(ious[i, j])
+                co_occurrences[key] = co_occurrences.get(key, 0) + 1
+    
+    candidates = sorted(
+        ((iou_sums[key] / co_occurrences[key], key) for key in iou_sums),
+        key=lambda item: item[0],
+        reverse=True
+    )
+    
+    mapping = {}
+    used_previous = set()
+    for mean_iou, (next_id, previous_id) in candidates:
+        if mean_iou < iou_threshold:
+            break
+        if next_id in mapping or previous_id in used_previous:
+            continue
+        mapping[next_id] = previous_id
+        used_previous.add(previous_id)
+    
+    return mapping
+
+
+def stitch_segments(segment_results: List[Dict], iou_threshold: float = 0.3) -> Iterator[Dict]:
+    """
+    Merge per-segment tracking output into one stream with global track IDs.
+    
+    Each frame is taken from the segment that owns it. Track IDs are
+    renumbered as integers from 1 in order of first appearance; a track
+    that continues across a boundary keeps the ID it had in the earlier
+    segment.
+    
+    Args:
+        segment_results: Outputs of ``process_segment`` in segment order
+        iou_threshold: Minimum mean IoU for matching tracks in the overlap
+    
+    Yields:
+        Tracked frames (as produced by ``track_range``) with global track IDs,
+        in frame order
+    """
+    next_global_id = 1
+    previous_frames = None  # previous segment's frames, with global IDs
+    
+    for result in segment_results:
+        id_map = {}
+        if previous_frames is not None:
+            id_map = match_overlap_tracks(previous_frames, result['frames'], iou_threshold)
+        
+        owned_start = result['segment']['owned_start']
+        for frame in result['frames']:
+            if frame['frame_index'] < owned_start:
+                continue
+            
+            for player in frame['tracked_players']:
+                if player['track_id'] not in id_map:
+                    id_map[player['track_id']] = next_global_id
+                    next_global_id += 1
+            
+            yield dict(frame, tracked_players=[
+                dict(player, track_id=id_map[player['track_id']])
+                for player in frame['tracked_players']
+            ])
+        
+        previous_frames = [
+            {
+                'frame_id': frame['frame_id'],
+                'tracked_players': [
+                    {'track_id': id_map[player['track_id']], 'bbox': player['bbox']}
+                    for player in frame['tracked_players']
+                    if player['track_id'] in id_map
+                ]
+            }
+            for frame in result['frames']
+        ]
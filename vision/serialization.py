@@ -0,0 +1,204 @@
+"""Streaming JSON output for analysis results."""
+
+import dataclasses
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, Optional
+
+import numpy as np
+
+from .sinks import to_json_compatible
+
+
+# Items of a long list (e.g. ``frame_by_frame_data``) encoded per call
+DEFAULT_CHUNK_SIZE = 256
+
+COMPRESSIONS = ('gzip', 'zstd')
+
+
+def json_key(key: Any) -> str:
+    """
+    Object key for a dict key of the results, as ``json`` would write it.
+    
+    Tuples such as the ``heat_map`` cells ``(x, y)``, which ``json``
+    rejects, become ``"x,y"``; NumPy scalars are written like Python ones.
+    """
+    if isinstance(key, str):
+        return key
+    if isinstance(key, np.generic):
+        key = key.item()
+    if isinstance(key, bool) or key is None:
+        return json.dumps(key)
+    if isinstance(key, int):
+        return str(key)
+    if isinstance(key, float):
+        return float.__repr__(key)
+    if isinstance(key, tuple):
+        return ','.join(json_key(part) for part in key)
+    return str(key)
+
+
+class StreamingJSONEncoder:
+    """
+    Encode analysis results to JSON text incrementally.
+    
+    Dicts are walked key by key, converting keys ``json`` rejects, and
+    lists longer than ``chunk_size`` are encoded ``chunk_size`` items at a
+    time, so nothing is converted or copied up front and the text of at
+    most one chunk is held in memory. Everything else is handed to the
+    ``json`` module with ``to_json_compatible`` as fallback, which covers
+    NumPy scalars and arrays and analytics dataclasses.
+    """
+    
+    def __init__(self, indent: Optional[int] = 2, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Initialize the encoder.
+        
+        Args:
+            indent: Indentation width, or None for compact output without
+                whitespace (several times faster to write, and smaller)
+            chunk_size: Items of a long list encoded per call
+        """
+        self.indent = indent
+        self.chunk_size = max(1, chunk_size)
+        self._separators = (',', ': ') if indent is not None else (',', ':')
+    
+    def iterencode(self, obj: Any) -> Iterator[str]:
+        """
+        Encode a value.
+        
+        Args:
+            obj: Value to encode
+        
+        Yields:
+            Consecutive pieces of the JSON text
+        """
+        return self._encode(obj, 0)
+    
+    def _encode(self, obj: Any, level: int) -> Iterator[str]:
+        if isinstance(obj, dict):
+            yield from self._encode_dict(obj, level)
+        elif _is_sequence(obj) and len(obj) > self.chunk_size:
+            yield from self._encode_list(obj, level)
+        else:
+            yield self._dumps(obj, level)
+    
+    def _encode_dict(self, obj: Dict, level: int) -> Iterator[str]:
+        if not obj:
+            yield '{}'
+            return
+        
+        item_separator, key_separator = self._separators
+        inner = self._newline(level + 1)
+        yield '{'
+        for i, (key, value) in enumerate(obj.items()):
+            yield (item_separator if i else '') + inner + json.dumps(json_key(key)) + key_separator
+            yield from self._encode(value, level + 1)
+        yield self._newline(level) + '}'
+    
+    def _encode_list(self, obj, level: int) -> Iterator[str]:
+        yield '['
+        for start in range(0, len(obj), self.chunk_size):
+            # Encoded as a list at this level; drop its brackets and the
+            # newline before the closing one
+            text = self._dumps(obj[start:start + self.chunk_size], level)
+            body = text[1:-1].rstrip(' \n')
+            yield (',' if start else '') + body
+        yield self._newline(level) + ']'
+    
+    def _dumps(self, obj: Any, level: int) -> str:
+        """Encode a value with the ``json`` module, indented for ``level``."""
+        try:
+            text = json.dumps(obj, indent=self.indent, separators=self._separators,
+                              default=to_json_compatible)
+        except TypeError:
+            # Dict keys json rejects somewhere inside (e.g. heat map tuples)
+            text = json.dumps(_convert_keys(obj), indent=self.indent, separators=self._separators,
+                              default=to_json_compatible)
+        if self.indent and level:
+            # JSON strings cannot contain raw newlines, so every newline is indentation
+            text = text.replace('\n', self._newline(level))
+        return text
+    
+    def _newline(self, level: int) -> str:
+        return '' if self.indent is None else '\n' + ' ' * (self.indent * level)
+
+
+def _is_sequence(obj: Any) -> bool:
+    return isinstance(obj, (list, tuple)) or (isinstance(obj, np.ndarray) and obj.ndim > 0)
+
+
+def _convert_keys(obj: Any) -> Any:
+    """Copy of a value with every dict key made acceptable to ``json``."""
+    if isinstance(obj, dict):
+        return {json_key(key): _convert_keys(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_convert_keys(item) for item in obj]
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return _convert_keys(to_json_compatible(obj))
+    return obj
+
+
+def open_json_output(path: str, compression: Optional[str] = None) -> IO[str]:
+    """
+    Open a text file for JSON output, optionally compressed.
+    
+    Args:
+        path: Output file
+        compression: ``gzip``, ``zstd`` (needs the ``zstandard`` package)
+            or None
+    
+    Returns:
+        Writable text file
+    
+    Raises:
+        ValueError: If the compression is unknown
+        ImportError: If ``zstd`` is requested without ``zstandard`` installed
+    """
+    if compression is None:
+        return open(path, 'w', encoding='utf-8')
+    if compression == 'gzip':
+        return gzip.open(path, 'wt', encoding='utf-8', compresslevel=6)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstd output requires the zstandard package "
+                              "(pip install 'project_basket[zstd]')")
+        raw = zstandard.ZstdCompressor().stream_writer(open(path, 'wb'), closefd=True)
+        return io.TextIOWrapper(raw, encoding='utf-8')
+    raise ValueError(f"Unknown compression: {compression}. Choose from {', '.join(COMPRESSIONS)}")
+
+
+def compression_for_path(path: str) -> Optional[str]:
+    """Compression implied by a file name (``.gz`` or ``.zst``)."""
+    suffix = Path(path).suffix
+    if suffix == '.gz':
+        return 'gzip'
+    if suffix == '.zst':
+        return 'zstd'
+    return None
+
+
+def dump_json(obj: Any, path: str, indent: Optional[int] = 2,
+              compression: Optional[str] = 'auto', chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """
+    Stream a value to a JSON file.
+    
+    Args:
+        obj: Value to write (analysis results)
+        path: Output file
+        indent: Indentation width, or None for compact output
+        compression: ``gzip``, ``zstd``, None, or ``auto`` to pick from the
+            file extension
+        chunk_size: Items of a long list encoded per write
+    """
+    if compression == 'auto':
+        compression = compression_for_path(path)
+    
+    encoder = StreamingJSONEncoder(indent, chunk_size)
+    with open_json_output(path, compression) as f:
+        for piece in encoder.iterencode(obj):
+            f.write(piece)
@@ -0,0 +1,108 @@
+"""Frame result sinks for streaming, bounded-memory video processing."""
+
+import dataclasses
+import json
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator
+
+import numpy as np
+
+
+def to_json_compatible(obj: Any) -> Any:
+    """
+    ``json`` fallback for values produced by the vision pipeline.
+    
+    Handles NumPy scalars and arrays and analytics dataclasses such as
+    ``ShotAttempt``; anything else is stringified.
+    """
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        # Shallow, so nested values go through the encoder instead of a deep copy
+        return {field.name: getattr(obj, field.name) for field in dataclasses.fields(obj)}
+    return str(obj)
+
+
+class FrameSink:
+    """
+    Destination for per-frame summaries emitted while a video is processed.
+    
+    Subclasses receive each frame summary exactly once, in frame order, and
+    are closed by ``BasketballVideoProcessor.process_video`` when the run ends.
+    """
+    
+    def write(self, frame_summary: Dict) -> None:
+        """Consume one frame summary."""
+        raise NotImplementedError
+    
+    def close(self) -> None:
+        """Flush and release any resources held by the sink."""
+
+
+class CallbackFrameSink(FrameSink):
+    """Forward every frame summary to a callable (e.g. a batched DB writer)."""
+    
+    def __init__(self, callback: Callable[[Dict], None],
+                 on_close: Callable[[], None] = None):
+        """
+        Initialize the sink.
+        
+        Args:
+            callback: Called with each frame summary
+            on_close: Optional hook called once when the sink is closed
+        """
+        self.callback = callback
+        self.on_close = on_close
+    
+    def write(self, frame_summary: Dict) -> None:
+        self.callback(frame_summary)
+    
+    def close(self) -> None:
+        if self.on_close is not None:
+            self.on_close()
+
+
+class JsonLinesFrameSink(FrameSink):
+    """Append frame summaries to a JSON Lines file, one frame per line."""
+    
+    def __init__(self, path: str):
+        """
+        Initialize the sink.
+        
+        Args:
+            path: Output ``.jsonl`` file path (overwritten)
+        """
+        self.path = Path(path)
+        self._file = open(self.path, 'w')
+        self.frames_written = 0
+    
+    def write(self, frame_summary: Dict) -> None:
+        self._file.write(json.dumps(frame_summary, default=to_json_compatible))
+        self._file.write('\n')
+        self.frames_written += 1
+    
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_frame_jsonl(path: str) -> Iterator[Dict]:
+    """
+    Lazily read frame summaries written by ``JsonLinesFrameSink``.
+    
+    Args:
+        path: JSON Lines file path
+    
+    Yields:
+        Frame summaries in frame order
+    """
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
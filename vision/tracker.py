@@ -5,28 +5,73 @@ import numpy as np
 from typing import List, Dict, Tuple, Optional
 from deep_sort_realtime.deepsort_tracker import DeepSort
 
+from .motion_tracker import MotionTracker
+from .embedding import AppearanceEmbedder
+from .overlay import player_color
+from .proximity import POSSESSION_RADIUS_PIXELS, nearest_player
+from .ring_buffer import RingBuffer
+
+
+TRACKER_BACKENDS = ('deepsort', 'motion')
+
+# History capacities (oldest entries are overwritten)
+PLAYER_POSITIONS_CAPACITY = 100
+BALL_TRAJECTORY_CAPACITY = 50
+POSSESSION_HISTORY_CAPACITY = 50
+
+# Ring buffer columns
+POSITION_COLUMNS = ('timestamp', 'x', 'y')
+BALL_COLUMNS = ('timestamp', 'x', 'y', 'frame_id')
+POSSESSION_COLUMNS = ('timestamp', 'x', 'y', 'frame_id', 'player')  # player -1 = nobody
+
 
 class BasketballTracker:
     """DeepSORT-based tracker for basketball players with unique IDs."""
     
-    def __init__(self, max_age: int = 30, n_init: int = 3):
+    def __init__(self, max_age: int = 30, n_init: int = 3, backend: str = 'deepsort',
+                 embedder_model: str = 'default', possession_radius: float = POSSESSION_RADIUS_PIXELS,
+                 possession_hysteresis: float = 0.0):
         """
         Initialize the basketball tracker.
         
         Args:
             max_age: Maximum frames to keep track alive without detection
             n_init: Number of consecutive detections before track is confirmed
+            backend: ``deepsort`` (appearance + motion) or ``motion``
+                (IoU/Kalman association only, no embedder)
+            embedder_model: Appearance embedder preset for ``deepsort``
+                (``default`` or the cheaper ``small``)
+            possession_radius: Maximum ball distance (pixels) for possession
+            possession_hysteresis: Margin (pixels) another player must be
+                closer by to take possession from the current possessor
         """
-        self.tracker = DeepSort(
-            max_age=max_age,
-            n_init=n_init,
-            max_cosine_distance=0.2,
-            nn_budget=100
-        )
+        self.embedder = None
+        if backend == 'deepsort':
+            # Embeddings are computed in batches by AppearanceEmbedder and
+            # passed in, so DeepSort's own per-frame embedder is not loaded
+            self.tracker = DeepSort(
+                max_age=max_age,
+                n_init=n_init,
+                max_cosine_distance=0.2,
+                nn_budget=100,
+                embedder=None
+            )
+            self.embedder = AppearanceEmbedder(embedder_model)
+        elif backend == 'motion':
+            self.tracker = MotionTracker(max_age=max_age, n_init=n_init)
+        else:
+            raise ValueError(f"Unknown tracker backend '{backend}', expected one of {TRACKER_BACKENDS}")
+        self.backend = backend
+        self.possession_radius = possession_radius
+        self.possession_hysteresis = possession_hysteresis
         
         self.player_stats = {}  # Store player statistics
-        self.ball_trajectory = []  # Store ball trajectory history
-        self.possession_history = []  # Store possession changes
+        # Ball trajectory and possession changes, as fixed-capacity ring buffers
+        self.ball_trajectory = RingBuffer(BALL_TRAJECTORY_CAPACITY, len(BALL_COLUMNS))
+        self.possession_history = RingBuffer(POSSESSION_HISTORY_CAPACITY, len(POSSESSION_COLUMNS))
+        # Track IDs can be strings; possession rows store their index here
+        self._possessor_codes = {}
+        self._possessors = []
         
     def update_tracks(self, detections: Dict, frame: np.ndarray) -> Dict:
         """
@@ -53,16 +98,75 @@ class BasketballTracker:
             h = y2 - y1
             detection_list.append(([x1, y1, w, h], confidence, 'player'))
         
-        # Update tracker
-        tracks = self.tracker.update_tracks(detection_list, frame=frame)
+        # Update tracker, with embeddings precomputed by embed_players if any
+        embeds = detections.pop('player_embeds', None)
+        if self.embedder is not None:
+            if embeds is None:
+                embeds = self.embedder.embed_frames([frame], [detections])[0]
+            tracks = self.tracker.update_tracks(detection_list, embeds=embeds)
+        else:
+            tracks = self.tracker.update_tracks(detection_list, frame=frame)
+        
+        return self._build_tracking_results(detections, tracks)
+    
+    def embed_players(self, frames: List[np.ndarray], detections: List[Dict]):
+        """
+        Precompute appearance embeddings for consecutive frames in one batch.
+        
+        Embeddings are stored as ``player_embeds`` in each detection payload
+        and consumed by ``update_tracks``. Frames must be passed in
+        presentation order; this is a no-op without an embedder.
+        
+        Args:
+            frames: Video frames
+            detections: Detection results of the frames
+        """
+        if self.embedder is None:
+            return
+        
+        for frame_detections, embeds in zip(detections, self.embedder.embed_frames(frames, detections)):
+            frame_detections['player_embeds'] = embeds
+    
+    def propagate_tracks(self, detections: Dict) -> Dict:
+        """
+        Advance tracks with the motion model only, for frames without detection.
+        
+        Every track gets a Kalman prediction step, so boxes keep moving
+        between keyframes, but nothing is matched or marked as missed: tentative
+        tracks survive until the next keyframe and lost tracks still expire
+        after ``max_age`` frames.
+        
+        Args:
+            detections: Detection results for the frame (players are ignored;
+                ``ball`` may hold an extrapolated ball)
+        
+        Returns:
+            Tracking results in the same format as ``update_tracks``
+        """
+        # DeepSort wraps the track manager, MotionTracker is one
+        core = self.tracker.tracker if self.backend == 'deepsort' else self.tracker
+        core.predict()
+        return self._build_tracking_results(detections, core.tracks)
+    
+    def _build_tracking_results(self, detections: Dict, tracks: List) -> Dict:
+        """
+        Build tracking results from the tracker's current tracks.
+        
+        Args:
+            detections: Detection results for the frame
+            tracks: DeepSORT or motion tracker tracks
         
+        Returns:
+            Tracking results with unique IDs
+        """
         # Process tracking results
         tracking_results = {
             'frame_id': detections['frame_id'],
             'timestamp': detections['timestamp'],
             'tracked_players': [],
             'ball_info': detections['ball'],
-            'court_zones': detections['court_zones']
+            'court_zones': detections['court_zones'],
+            'zone_table_id': detections.get('zone_table_id')
         }
         
         # Process confirmed tracks
@@ -79,7 +183,8 @@ class BasketballTracker:
                 'center': self._get_bbox_center(bbox),
                 'confidence': track.get_det_conf() if hasattr(track, 'get_det_conf') else 0.5,
                 'time_since_update': track.time_since_update,
-                'hit_streak': track.hit_streak
+                # deep_sort_realtime tracks only count total hits
+                'hit_streak': getattr(track, 'hit_streak', track.hits)
             }
             
             # Update player statistics
@@ -92,6 +197,33 @@ class BasketballTracker:
         
         return tracking_results
     
+    def replay_tracks(self, tracking_results: Dict) -> Dict:
+        """
+        Update statistics from tracks produced elsewhere (e.g. stitched segments).
+        
+        Player statistics and ball/possession analysis are updated exactly as
+        ``update_tracks`` would for the same confirmed tracks, without
+        running DeepSORT.
+        
+        Args:
+            tracking_results: Tracking results with ``tracked_players`` and
+                ``ball_info``; ``possession`` is (re)computed in place
+        
+        Returns:
+            The updated tracking results
+        """
+        for player_info in tracking_results['tracked_players']:
+            self._update_player_stats(player_info['track_id'], player_info, tracking_results['timestamp'])
+        
+        detections = {
+            'frame_id': tracking_results['frame_id'],
+            'timestamp': tracking_results['timestamp'],
+            'ball': tracking_results['ball_info']
+        }
+        self._update_ball_analysis(detections, tracking_results)
+        
+        return tracking_results
+    
     def _get_bbox_center(self, bbox: np.ndarray) -> Tuple[float, float]:
         """Calculate the center point of a bounding box."""
         x1, y1, x2, y2 = bbox
@@ -102,7 +234,7 @@ class BasketballTracker:
         if track_id not in self.player_stats:
             self.player_stats[track_id] = {
                 'first_seen': timestamp,
-                'positions': [],
+                'positions': RingBuffer(PLAYER_POSITIONS_CAPACITY, len(POSITION_COLUMNS)),
                 'court_zones_visited': set(),
                 'total_distance': 0.0,
                 'possession_time': 0.0,
@@ -111,19 +243,16 @@ class BasketballTracker:
         
         stats = self.player_stats[track_id]
         center = player_info['center']
+        positions = stats['positions']
         
         # Update position history
-        if stats['positions']:
-            last_pos = stats['positions'][-1]
-            distance = np.sqrt((center[0] - last_pos[0])**2 + (center[1] - last_pos[1])**2)
+        if len(positions):
+            _, last_x, last_y = positions.last()
+            distance = np.sqrt((center[0] - last_x)**2 + (center[1] - last_y)**2)
             stats['total_distance'] += distance
         
-        stats['positions'].append(center)
+        positions.append(timestamp, center[0], center[1])
         stats['last_seen'] = timestamp
-        
-        # Limit position history to prevent memory issues
-        if len(stats['positions']) > 100:
-            stats['positions'] = stats['positions'][-50:]
     
     def _update_ball_analysis(self, detections: Dict, tracking_results: Dict):
         """Analyze ball movement and possession."""
@@ -131,15 +260,9 @@ class BasketballTracker:
         
         if ball:
             ball_center = ball['center']
-            self.ball_trajectory.append({
-                'timestamp': detections['timestamp'],
-                'position': ball_center,
-                'frame_id': detections['frame_id']
-            })
-            
-            # Limit trajectory history
-            if len(self.ball_trajectory) > 50:
-                self.ball_trajectory = self.ball_trajectory[-30:]
+            self.ball_trajectory.append(
+                detections['timestamp'], ball_center[0], ball_center[1], detections['frame_id']
+            )
             
             # Determine possession
             possession_player = self._determine_possession(ball_center, tracking_results['tracked_players'])
@@ -150,23 +273,13 @@ class BasketballTracker:
                 'confidence': 0.8 if possession_player else 0.0
             }
             
-            # Update possession history
-            if self.possession_history and self.possession_history[-1]['player_id'] != possession_player:
-                # Possession change
-                self.possession_history.append({
-                    'timestamp': detections['timestamp'],
-                    'player_id': possession_player,
-                    'frame_id': detections['frame_id'],
-                    'ball_position': ball_center
-                })
-            elif not self.possession_history:
-                # First possession record
-                self.possession_history.append({
-                    'timestamp': detections['timestamp'],
-                    'player_id': possession_player,
-                    'frame_id': detections['frame_id'],
-                    'ball_position': ball_center
-                })
+            # Update possession history on the first record and on every change
+            code = self._possessor_code(possession_player)
+            if not len(self.possession_history) or self.possession_history.last()[4] != code:
+                self.possession_history.append(
+                    detections['timestamp'], ball_center[0], ball_center[1],
+                    detections['frame_id'], code
+                )
         else:
             tracking_results['possession'] = {
                 'player_id': None,
@@ -174,6 +287,35 @@ class BasketballTracker:
                 'confidence': 0.0
             }
     
+    def _possessor_code(self, player_id) -> int:
+        """Numeric code of a possessing track ID for the possession buffer (-1 for None)."""
+        if player_id is None:
+            return -1
+        code = self._possessor_codes.get(player_id)
+        if code is None:
+            code = self._possessor_codes[player_id] = len(self._possessors)
+            self._possessors.append(player_id)
+        return code
+    
+    def _possession_entries(self, n: int) -> List[Dict]:
+        """Last ``n`` possession changes as dicts."""
+        return [
+            {
+                'timestamp': float(timestamp),
+                'player_id': self._possessors[int(code)] if code >= 0 else None,
+                'frame_id': int(frame_id),
+                'ball_position': (float(x), float(y))
+            }
+            for timestamp, x, y, frame_id, code in self.possession_history.window(n)
+        ]
+    
+    def _trajectory_entries(self, n: int) -> List[Dict]:
+        """Last ``n`` ball positions as dicts."""
+        return [
+            {'timestamp': float(timestamp), 'position': (float(x), float(y)), 'frame_id': int(frame_id)}
+            for timestamp, x, y, frame_id in self.ball_trajectory.window(n)
+        ]
+    
     def _determine_possession(self, ball_center: Tuple[float, float], players: List[Dict]) -> Optional[int]:
         """
         Determine which player has possession of the ball.
@@ -188,20 +330,19 @@ class BasketballTracker:
         if not players:
             return None
         
-        possession_threshold = 80  # pixels
-        closest_player = None
-        min_distance = float('inf')
+        track_ids = [player['track_id'] for player in players]
+        centers = np.array([player['center'] for player in players], dtype=np.float64)
         
-        for player in players:
-            player_center = player['center']
-            distance = np.sqrt((ball_center[0] - player_center[0])**2 + 
-                             (ball_center[1] - player_center[1])**2)
-            
-            if distance < min_distance and distance < possession_threshold:
-                min_distance = distance
-                closest_player = player['track_id']
+        # Position of the current possessor among this frame's players
+        current = -1
+        if self.possession_hysteresis > 0 and len(self.possession_history):
+            code = int(self.possession_history.last()[4])
+            if code >= 0 and self._possessors[code] in track_ids:
+                current = track_ids.index(self._possessors[code])
         
-        return closest_player
+        index, _ = nearest_player(centers, ball_center, self.possession_radius,
+                                  current, self.possession_hysteresis)
+        return track_ids[index] if index >= 0 else None
     
     def detect_shot_attempt(self, frame_window: int = 10) -> Optional[Dict]:
         """
@@ -216,10 +357,11 @@ class BasketballTracker:
         if len(self.ball_trajectory) < frame_window:
             return None
         
-        recent_trajectory = self.ball_trajectory[-frame_window:]
+        # Zero-copy view of (timestamp, x, y, frame_id) rows
+        recent_trajectory = self.ball_trajectory.window(frame_window)
         
         # Analyze trajectory for upward movement (potential shot)
-        y_positions = [pos['position'][1] for pos in recent_trajectory]
+        y_positions = recent_trajectory[:, 2]
         
         # Check for significant upward movement followed by downward
         if len(y_positions) >= 5:
@@ -232,18 +374,18 @@ class BasketballTracker:
             
             if avg_first > avg_second and (avg_first - avg_second) > 50:
                 # Potential shot detected
+                timestamp, x, y, frame_id = recent_trajectory[0]
                 shot_info = {
-                    'timestamp': recent_trajectory[0]['timestamp'],
-                    'frame_id': recent_trajectory[0]['frame_id'],
-                    'shooter_position': recent_trajectory[0]['position'],
-                    'trajectory': [(pos['position'][0], pos['position'][1]) for pos in recent_trajectory],
+                    'timestamp': float(timestamp),
+                    'frame_id': int(frame_id),
+                    'shooter_position': (float(x), float(y)),
+                    'trajectory': [tuple(point) for point in recent_trajectory[:, 1:3].tolist()],
                     'confidence': 0.7
                 }
                 
                 # Try to identify shooter
-                if self.possession_history:
-                    last_possession = self.possession_history[-1]
-                    shot_info['shooter_id'] = last_possession['player_id']
+                if len(self.possession_history):
+                    shot_info['shooter_id'] = self._possession_entries(1)[0]['player_id']
                 
                 return shot_info
         
@@ -251,24 +393,37 @@ class BasketballTracker:
     
     def get_player_stats(self, track_id: int) -> Optional[Dict]:
         """Get statistics for a specific player."""
-        return self.player_stats.get(track_id)
+        stats = self.player_stats.get(track_id)
+        return self._export_player_stats(stats) if stats is not None else None
     
     def get_all_stats(self) -> Dict:
         """Get statistics for all tracked players."""
         return {
-            'players': self.player_stats,
-            'possession_history': self.possession_history[-10:],  # Last 10 possessions
-            'ball_trajectory': self.ball_trajectory[-20:],  # Last 20 ball positions
+            'players': {
+                track_id: self._export_player_stats(stats)
+                for track_id, stats in self.player_stats.items()
+            },
+            'possession_history': self._possession_entries(10),  # Last 10 possessions
+            'ball_trajectory': self._trajectory_entries(20),  # Last 20 ball positions
             'total_players': len(self.player_stats)
         }
     
-    def visualize_tracks(self, frame: np.ndarray, tracking_results: Dict) -> np.ndarray:
+    def _export_player_stats(self, stats: Dict) -> Dict:
+        """Copy of a player's statistics with positions as a list of (x, y)."""
+        exported = dict(stats)
+        exported['positions'] = [tuple(point) for point in stats['positions'].window()[:, 1:3].tolist()]
+        return exported
+    
+    def visualize_tracks(self, frame: np.ndarray, tracking_results: Dict,
+                         ball_trajectory: Optional[np.ndarray] = None) -> np.ndarray:
         """
         Draw tracking results on frame for visualization.
         
         Args:
             frame: Input frame
             tracking_results: Tracking results
+            ball_trajectory: Ball trajectory rows ``(timestamp, x, y, frame_id)``
+                to draw (defaults to the tracker's current trajectory)
             
         Returns:
             Annotated frame
@@ -304,20 +459,14 @@ class BasketballTracker:
                            (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
         
         # Draw ball trajectory
-        if len(self.ball_trajectory) > 1:
-            points = [pos['position'] for pos in self.ball_trajectory[-10:]]
-            for i in range(1, len(points)):
-                pt1 = (int(points[i-1][0]), int(points[i-1][1]))
-                pt2 = (int(points[i][0]), int(points[i][1]))
-                cv2.line(annotated_frame, pt1, pt2, (255, 255, 0), 2)
+        if ball_trajectory is None:
+            ball_trajectory = self.ball_trajectory.window(10)
+        if len(ball_trajectory) > 1:
+            points = ball_trajectory[-10:, 1:3].astype(np.int32)
+            cv2.polylines(annotated_frame, [points], False, (255, 255, 0), 2)
         
         return annotated_frame
     
     def _get_player_color(self, track_id: int) -> Tuple[int, int, int]:
         """Get a consistent color for a player based on their track ID."""
-        colors = [
-            (255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0),
-            (255, 0, 255), (0, 255, 255), (128, 0, 128), (255, 165, 0),
-            (0, 128, 128), (128, 128, 0)
-        ]
-        return colors[track_id % len(colors)]
\ No newline at end of file
+        return player_color(track_id)
\ No newline at end of file
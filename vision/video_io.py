@@ -0,0 +1,328 @@
+"""Video I/O: threaded, seekable range decoding and H.264 encoding."""
+
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Iterator, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+
+ENCODER_PRESETS = ('ultrafast', 'superfast', 'veryfast', 'faster', 'fast',
+                   'medium', 'slow', 'slower', 'veryslow')
+DEFAULT_PRESET = 'veryfast'
+DEFAULT_CRF = 23
+VIDEO_CODECS = ('h264', 'mp4v')
+
+# How far before the target an overshooting seek retries, doubled on every retry
+SEEK_BACKOFF_FRAMES = 32
+
+# Marker put on the prefetch queue once decoding has finished
+_END = object()
+
+
+class VideoReader:
+    """
+    Decode a range of frames of a video file.
+    
+    The capture is opened with an explicit decoder thread count, seeks to
+    the first frame of the range (checking the position the backend lands
+    on and, when it is not exact, decoding forward from an earlier frame)
+    and stops at the end of the range without decoding further. Frames can
+    be downscaled to a maximum width as they are decoded. With
+    ``prefetch`` > 0 decoding runs on a background thread that keeps up to
+    that many frames ready, so it overlaps with whatever consumes them.
+    """
+    
+    def __init__(self, video_path: str, start_frame: int = 0, stop_frame: Optional[int] = None,
+                 max_width: Optional[int] = None, threads: Optional[int] = None, prefetch: int = 0):
+        """
+        Open a video.
+        
+        Args:
+            video_path: Path to the video file
+            start_frame: First frame index to decode
+            stop_frame: End frame index (exclusive, defaults to the end of the video)
+            max_width: Downscale wider frames to this width, keeping the
+                aspect ratio (dimensions are rounded to even numbers)
+            threads: Decoder threads (defaults to the backend's choice)
+            prefetch: Frames decoded ahead on a background thread (0 decodes
+                on the iterating thread)
+        
+        Raises:
+            ValueError: If the video cannot be opened
+        """
+        self.video_path = video_path
+        self.start_frame = max(0, int(start_frame))
+        self.stop_frame = stop_frame
+        self.prefetch = max(0, int(prefetch))
+        
+        self._decoder = None  # (stop event, thread) of a running prefetch
+        self._cap = self._open(video_path, threads)
+        self.fps = self._cap.get(cv2.CAP_PROP_FPS)
+        self.total_frames = int(self._cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.source_width = int(self._cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.source_height = int(self._cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        
+        if max_width and max_width < self.source_width:
+            self.scale = max_width / self.source_width
+            self.width = 2 * int(round(self.source_width * self.scale / 2))
+            self.height = 2 * int(round(self.source_height * self.scale / 2))
+        else:
+            self.scale = 1.0
+            self.width = self.source_width
+            self.height = self.source_height
+    
+    @staticmethod
+    def _open(video_path: str, threads: Optional[int]) -> cv2.VideoCapture:
+        """Open a capture, with a decoder thread count when one is given."""
+        params = [cv2.CAP_PROP_N_THREADS, int(threads)] if threads else []
+        cap = cv2.VideoCapture(video_path, cv2.CAP_ANY, params)
+        if not cap.isOpened() and params:
+            # Backends without a thread setting refuse the parameter
+            cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise ValueError(f"Could not open video: {video_path}")
+        return cap
+    
+    def __enter__(self) -> 'VideoReader':
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Stop background decoding and release the capture."""
+        self._stop_decoder()
+        self._cap.release()
+    
+    def _stop_decoder(self) -> None:
+        if self._decoder is not None:
+            stop, thread = self._decoder
+            stop.set()
+            thread.join()
+            self._decoder = None
+    
+    def timestamp(self, frame_index: int) -> float:
+        """Presentation time of a frame in seconds (the frame index without a frame rate)."""
+        return frame_index / self.fps if self.fps > 0 else frame_index
+    
+    def frame_index(self, timestamp: float) -> int:
+        """Index of the frame shown at a time (inverse of ``timestamp``)."""
+        return int(round(timestamp * self.fps)) if self.fps > 0 else int(timestamp)
+    
+    def read_at(self, frame_index: int) -> Optional[np.ndarray]:
+        """
+        Decode a single frame.
+        
+        Args:
+            frame_index: Frame to decode
+        
+        Returns:
+            The frame, or None past the end of the video
+        """
+        self._seek(frame_index)
+        ret, frame = self._cap.read()
+        return self._resize(frame) if ret else None
+    
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Decode the range from its start.
+        
+        Yields:
+            (frame index, frame) pairs in presentation order
+        """
+        if self.prefetch:
+            return self._prefetched()
+        return self._decode()
+    
+    def _decode(self) -> Iterator[Tuple[int, np.ndarray]]:
+        self._seek(self.start_frame)
+        index = self.start_frame
+        while self.stop_frame is None or index < self.stop_frame:
+            ret, frame = self._cap.read()
+            if not ret:
+                break
+            yield index, self._resize(frame)
+            index += 1
+    
+    def _prefetched(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """Run ``_decode`` on a background thread through a bounded queue."""
+        frames = queue.Queue(maxsize=self.prefetch)
+        stop = threading.Event()
+        errors = []
+        
+        def put(item) -> bool:
+            while not stop.is_set():
+                try:
+                    frames.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def run():
+            try:
+                for item in self._decode():
+                    if not put(item):
+                        return
+            except BaseException as e:
+                errors.append(e)
+            finally:
+                put(_END)
+        
+        self._stop_decoder()
+        thread = threading.Thread(target=run, name='video-decode', daemon=True)
+        self._decoder = (stop, thread)
+        thread.start()
+        try:
+            while True:
+                item = frames.get()
+                if item is _END:
+                    break
+                yield item
+            if errors:
+                raise errors[0]
+        finally:
+            # Also reached when the consumer stops early
+            if self._decoder is not None and self._decoder[1] is thread:
+                self._stop_decoder()
+    
+    def _seek(self, frame_index: int) -> None:
+        """Position the capture so the next read returns ``frame_index``."""
+        if int(self._cap.get(cv2.CAP_PROP_POS_FRAMES)) == frame_index:
+            return
+        
+        backoff = 0
+        while True:
+            target = max(0, frame_index - backoff)
+            self._cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+            position = int(self._cap.get(cv2.CAP_PROP_POS_FRAMES))
+            if position == frame_index:
+                return
+            # Landed before the frame (e.g. on the previous keyframe), or
+            # nothing earlier to try: decode forward from there
+            if 0 <= position < frame_index or target == 0:
+                break
+            # Landed past it: seek further back
+            backoff = 2 * backoff if backoff else SEEK_BACKOFF_FRAMES
+        
+        for _ in range(frame_index - max(position, 0)):
+            if not self._cap.grab():
+                break
+    
+    def _resize(self, frame: np.ndarray) -> np.ndarray:
+        if self.scale == 1.0:
+            return frame
+        return cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_AREA)
+
+
+class FFmpegVideoWriter:
+    """
+    Encode frames to H.264 by piping raw BGR frames to an ``ffmpeg`` process.
+    
+    Encoding runs in the ffmpeg process with libx264's own threads, so
+    ``write`` only copies the frame into the pipe. Same ``write`` /
+    ``release`` interface as ``cv2.VideoWriter``.
+    """
+    
+    def __init__(self, path: str, fps: float, size: Tuple[int, int],
+                 preset: str = DEFAULT_PRESET, crf: int = DEFAULT_CRF, binary: str = 'ffmpeg'):
+        """
+        Start the encoder.
+        
+        Args:
+            path: Output file
+            fps: Frame rate
+            size: Frame (width, height)
+            preset: libx264 speed/compression preset (see ``ENCODER_PRESETS``)
+            crf: Constant rate factor (lower is better quality, 23 is the default)
+            binary: ffmpeg executable
+        
+        Raises:
+            ValueError: If the preset is unknown
+        """
+        if preset not in ENCODER_PRESETS:
+            raise ValueError(f"Unknown encoder preset: {preset}. Choose from {', '.join(ENCODER_PRESETS)}")
+        
+        self.path = str(path)
+        width, height = size
+        command = [
+            binary, '-y', '-loglevel', 'error', '-nostats',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24', '-s', f"{width}x{height}",
+            '-r', str(fps if fps > 0 else 30), '-i', '-',
+            # yuv420p needs even dimensions
+            '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2',
+            '-c:v', 'libx264', '-preset', preset, '-crf', str(int(crf)),
+            '-pix_fmt', 'yuv420p', '-movflags', '+faststart', self.path
+        ]
+        # ffmpeg's messages go to a file: an unread stderr pipe that fills
+        # up would block ffmpeg, and with it every later ``write``
+        self._stderr = tempfile.TemporaryFile()
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stderr=self._stderr)
+    
+    def write(self, frame: np.ndarray) -> None:
+        """Send one frame to the encoder."""
+        self._process.stdin.write(np.ascontiguousarray(frame).data)
+    
+    def release(self) -> None:
+        """
+        Flush the encoder and wait for the file to be complete.
+        
+        Raises:
+            RuntimeError: If ffmpeg failed
+        """
+        if self._process.returncode is not None:
+            return
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._process.wait()
+        
+        self._stderr.seek(0)
+        stderr = self._stderr.read()
+        self._stderr.close()
+        if self._process.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed writing {self.path}: {stderr.decode(errors='replace')[-500:]}")
+
+
+# Writers returned by ``open_video_writer``
+VideoWriter = Union[cv2.VideoWriter, FFmpegVideoWriter]
+
+
+def open_video_writer(path: str, fps: float, size: Tuple[int, int], codec: str = 'h264',
+                      preset: str = DEFAULT_PRESET, crf: int = DEFAULT_CRF) -> VideoWriter:
+    """
+    Open a video writer.
+    
+    Args:
+        path: Output file
+        fps: Frame rate
+        size: Frame (width, height)
+        codec: ``h264`` (libx264 through ffmpeg; falls back to ``mp4v`` when
+            no ffmpeg binary is found, see ``FFMPEG_BINARY``) or ``mp4v``
+            (OpenCV's built-in MPEG-4 encoder)
+        preset: libx264 preset
+        crf: libx264 constant rate factor
+    
+    Returns:
+        A writer with ``write(frame)`` and ``release()``
+    
+    Raises:
+        ValueError: If the codec is unknown
+    """
+    if codec not in VIDEO_CODECS:
+        raise ValueError(f"Unknown video codec: {codec}. Choose from {', '.join(VIDEO_CODECS)}")
+    
+    if codec == 'h264':
+        binary = shutil.which(os.getenv('FFMPEG_BINARY', 'ffmpeg'))
+        if binary:
+            return FFmpegVideoWriter(path, fps, size, preset, crf, binary)
+        print("ffmpeg not found, writing mp4v video instead of H.264")
+    
+    return cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
@@ -2,17 +2,94 @@
 
 import os
 import sys
+import time
 from pathlib import Path
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, List, Optional, Union
+
+import numpy as np
 
 # Add project root to path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from vision.processor import BasketballVideoProcessor
+from vision.sinks import JsonLinesFrameSink, read_frame_jsonl
+from vision.frame_store import FrameStore, FrameStoreWriter, frame_store_dir
+from vision.detection_cache import DetectionCache
+from vision.frame_dump import FrameDumpWriter
+from vision.render import render_analysis_video
+from vision.video_io import DEFAULT_PRESET
+from vision.proximity import POSSESSION_RADIUS_PIXELS, ball_distances
 from backend.app.database import SessionLocal
 from backend.app import crud
 
 
+class ThrottledProgressUpdater:
+    """
+    Progress callback that publishes to RQ ``job.meta`` and the Analysis row.
+    
+    ``process_video`` calls it after every frame; writes to Redis and the
+    database only happen when ``min_interval`` seconds have passed since the
+    last one, so pollers see live progress at a bounded write rate.
+    """
+    
+    def __init__(self, db, analysis_id: str, job=None, min_interval: float = 2.0):
+        """
+        Initialize the updater.
+        
+        Args:
+            db: Database session
+            analysis_id: Analysis ID
+            job: RQ job whose meta is updated (optional)
+            min_interval: Minimum number of seconds between updates
+        """
+        self.db = db
+        self.analysis_id = analysis_id
+        self.job = job
+        self.min_interval = min_interval
+        
+        self.frames_processed = 0
+        self.total_frames = 0
+        self.updates = 0
+        self._last_update = None
+        self._published_frames = None
+    
+    def __call__(self, frames_processed: int, total_frames: int):
+        """Record progress and publish it if the interval has elapsed."""
+        self.frames_processed = frames_processed
+        self.total_frames = total_frames
+        
+        now = time.monotonic()
+        if self._last_update is None or now - self._last_update >= self.min_interval:
+            self._publish(now)
+    
+    def flush(self):
+        """Publish the latest progress if it has not been published yet."""
+        if self._published_frames != self.frames_processed:
+            self._publish(time.monotonic())
+    
+    def _publish(self, now: float):
+        """Write the current progress to the job meta and the database."""
+        self._last_update = now
+        self._published_frames = self.frames_processed
+        self.updates += 1
+        
+        # Progress must never interrupt processing
+        try:
+            if self.job is not None:
+                self.job.meta['progress'] = (
+                    self.frames_processed / self.total_frames if self.total_frames else 0.0
+                )
+                self.job.meta['frames_processed'] = self.frames_processed
+                self.job.meta['total_frames'] = self.total_frames
+                self.job.save_meta()
+            
+            crud.update_analysis_progress(
+                self.db, self.analysis_id, self.frames_processed, self.total_frames
+            )
+        except Exception as e:
+            print(f"Progress update failed: {e}")
+
+
 def process_video_job(analysis_id: str, video_path: str, config: Dict[str, Any]) -> Dict[str, Any]:
     """
     Process video in background job and update database with enhanced stats.
@@ -33,24 +110,99 @@ def process_video_job(analysis_id: str, video_path: str, config: Dict[str, Any])
         
         # Get processor
         processor = BasketballVideoProcessor(
-            confidence_threshold=config.get('confidence_threshold', 0.25)
+            model_path=config.get('model_path', 'yolov8n.pt'),
+            confidence_threshold=config.get('confidence_threshold', 0.25),
+            backend=config.get('inference_backend', 'torch'),
+            threads=config.get('inference_threads'),
+            calibration_video=config.get('calibration_video'),
+            tracker_backend=config.get('tracker_backend', 'deepsort'),
+            embedder_model=config.get('embedder_model', 'default'),
+            ball_roi=config.get('ball_roi', False),
+            imgsz=config.get('inference_imgsz'),
+            decode_threads=config.get('decode_threads'),
+            decode_width=config.get('decode_width'),
+            video_codec=config.get('video_codec', 'h264'),
+            encoder_preset=config.get('encoder_preset', DEFAULT_PRESET),
+            json_indent=config.get('json_indent', 2),
+            possession_radius=config.get('possession_radius', POSSESSION_RADIUS_PIXELS),
+            possession_hysteresis=config.get('possession_hysteresis', 0.0)
         )
         
-        # Process video
-        results = processor.process_video(
-            video_path=video_path,
-            output_video_path=config.get('output_video_path'),
-            output_json_path=config.get('output_json_path'),
-            visualize=config.get('visualize', True),
-            save_frames=config.get('save_frames', False)
+        # Stream frame summaries to disk instead of holding them in memory,
+        # either as a columnar frame store or as JSON Lines
+        store_dir = frame_store_dir(analysis_id) if config.get('frame_store') else None
+        frame_data_path = config.get('frame_data_path')
+        if store_dir:
+            frame_sink = FrameStoreWriter(str(store_dir))
+        elif frame_data_path:
+            frame_sink = JsonLinesFrameSink(frame_data_path)
+        else:
+            frame_sink = None
+        
+        # Annotated frame images are encoded and saved off the analysis thread
+        frame_dump = None
+        if config.get('save_frames'):
+            frame_dump = FrameDumpWriter(
+                str(processor.output_dir),
+                stride=config.get('frame_dump_stride', 1),
+                events_only=config.get('frame_dump_events_only', False),
+                image_format=config.get('frame_dump_format', 'jpg'),
+                quality=config.get('frame_dump_quality', 90)
+            )
+        
+        # Publish live progress for /jobs/{job_id} and /analyze/{id}/live-data
+        progress = ThrottledProgressUpdater(
+            db, analysis_id, job=_current_job(),
+            min_interval=config.get('progress_interval', 2.0)
         )
         
+        # Process video, optionally as parallel overlapping segments
+        if config.get('segments', 1) > 1:
+            results = processor.process_video_segmented(
+                video_path=video_path,
+                output_json_path=config.get('output_json_path'),
+                num_segments=config['segments'],
+                overlap_frames=config.get('segment_overlap_frames', 30),
+                batch_size=config.get('batch_size', 1),
+                frame_sink=frame_sink,
+                progress_callback=progress
+            )
+        else:
+            results = processor.process_video(
+                video_path=video_path,
+                output_video_path=config.get('output_video_path'),
+                output_json_path=config.get('output_json_path'),
+                visualize=config.get('visualize', True),
+                save_frames=config.get('save_frames', False),
+                batch_size=config.get('batch_size', 1),
+                pipelined=config.get('pipelined', False),
+                frame_sink=frame_sink,
+                progress_callback=progress,
+                detection_stride=config.get('detection_stride', 1),
+                detection_cache=DetectionCache() if config.get('detection_cache') else None,
+                frame_dump=frame_dump
+            )
+        progress.flush()
+        
         # Calculate enhanced stats
-        enhanced_stats = calculate_enhanced_stats(results)
+        if store_dir:
+            frame_data = FrameStore(str(store_dir))
+        elif frame_data_path:
+            frame_data = read_frame_jsonl(frame_data_path)
+        else:
+            frame_data = None
+        enhanced_stats = calculate_enhanced_stats(results, frame_data)
         
-        # Update analysis with results and enhanced stats
+        # Update analysis with results and enhanced stats; streamed frame
+        # summaries are read back from disk for the frame data rows
         results['enhanced_stats'] = enhanced_stats
-        crud.update_analysis_results(db, analysis_id, results)
+        if store_dir:
+            stored_frames = FrameStore(str(store_dir)).iter_frames()
+        elif frame_data_path:
+            stored_frames = read_frame_jsonl(frame_data_path)
+        else:
+            stored_frames = None
+        crud.update_analysis_results(db, analysis_id, results, frame_data=stored_frames)
         crud.update_analysis_status(db, analysis_id, "completed")
         
         return {
@@ -68,7 +220,48 @@ def process_video_job(analysis_id: str, video_path: str, config: Dict[str, Any])
         db.close()
 
 
-def calculate_enhanced_stats(results: Dict[str, Any]) -> Dict[str, Any]:
+def render_video_job(analysis_id: str, video_path: str, start_time: Optional[float] = None,
+                     end_time: Optional[float] = None, frame_data_path: Optional[str] = None,
+                     max_width: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Render the annotated video of a finished analysis in a background job.
+    
+    Args:
+        analysis_id: Analysis ID
+        video_path: Path to the analyzed video file
+        start_time: Clip start in seconds (None = start of the video)
+        end_time: Clip end in seconds (None = end of the video)
+        frame_data_path: JSON Lines frame file, used without a frame store
+        max_width: Width the video was analyzed at, if it was downscaled
+        
+    Returns:
+        Path of the rendered (cached) clip
+    """
+    path = render_analysis_video(analysis_id, video_path, start_time, end_time, frame_data_path,
+                                 max_width=max_width)
+    return {
+        'status': 'completed',
+        'analysis_id': analysis_id,
+        'video_path': str(path)
+    }
+
+
+def _current_job():
+    """The RQ job being executed, or None outside a worker."""
+    try:
+        from rq import get_current_job
+        return get_current_job()
+    except Exception:
+        return None
+
+
+# Approximate court scale: 1 pixel ≈ 0.02m, so 50 pixels ≈ 1 meter
+PIXELS_TO_METERS = 0.02
+BALL_TOUCH_RADIUS_PIXELS = 50
+
+
+def calculate_enhanced_stats(results: Dict[str, Any],
+                             frame_data: Optional[Union[Iterable[Dict[str, Any]], FrameStore]] = None) -> Dict[str, Any]:
     """
     Calculate enhanced statistics from vision processing results.
     
@@ -77,8 +270,15 @@ def calculate_enhanced_stats(results: Dict[str, Any]) -> Dict[str, Any]:
     - Ball touches based on proximity detection
     - Time spent in different court zones
     
+    Per-frame data is first flattened into one row per player observation,
+    then every metric is computed with array operations.
+    
     Args:
         results: Raw vision processing results
+        frame_data: Frame summaries to use instead of
+            ``results['frame_by_frame_data']`` (e.g. streamed from disk), or a
+            ``FrameStore`` whose columns are used directly without building
+            per-frame dicts
         
     Returns:
         Enhanced statistics
@@ -90,83 +290,15 @@ def calculate_enhanced_stats(results: Dict[str, Any]) -> Dict[str, Any]:
     }
     
     try:
-        frame_data = results.get('frame_by_frame_data', [])
+        if frame_data is None:
+            frame_data = results.get('frame_by_frame_data', [])
         
-        if not frame_data:
-            return enhanced_stats
-            
-        # Player tracking data
-        player_positions = {}  # {player_id: [(x, y, timestamp), ...]}
-        ball_touches = {}      # {player_id: count}
-        
-        # Process frame-by-frame data
-        for frame in frame_data:
-            timestamp = frame.get('timestamp', 0)
-            tracked_players = frame.get('tracked_players', [])
-            ball_analysis = frame.get('ball_analysis')
-            
-            # Track player positions
-            for player in tracked_players:
-                player_id = player.get('track_id')
-                if player_id is not None:
-                    center = player.get('center', [0, 0])
-                    if player_id not in player_positions:
-                        player_positions[player_id] = []
-                    player_positions[player_id].append((center[0], center[1], timestamp))
-            
-            # Detect ball touches (ball within 1m/~50 pixels of player)
-            if ball_analysis:
-                ball_pos = ball_analysis.get('position', [0, 0])
-                for player in tracked_players:
-                    player_id = player.get('track_id')
-                    player_center = player.get('center', [0, 0])
-                    
-                    # Calculate distance (approximate 1m = 50 pixels)
-                    distance = ((ball_pos[0] - player_center[0])**2 + (ball_pos[1] - player_center[1])**2)**0.5
-                    if distance < 50:  # Within ~1 meter
-                        if player_id not in ball_touches:
-                            ball_touches[player_id] = 0
-                        ball_touches[player_id] += 1
-        
-        # Calculate distance and speed for each player
-        for player_id, positions in player_positions.items():
-            if len(positions) < 2:
-                continue
-                
-            total_distance_pixels = 0
-            speeds = []
-            
-            for i in range(1, len(positions)):
-                prev_x, prev_y, prev_t = positions[i-1]
-                curr_x, curr_y, curr_t = positions[i]
-                
-                # Distance in pixels
-                distance_pixels = ((curr_x - prev_x)**2 + (curr_y - prev_y)**2)**0.5
-                total_distance_pixels += distance_pixels
-                
-                # Speed calculation (pixels per second)
-                time_diff = curr_t - prev_t
-                if time_diff > 0:
-                    speed_pixels_per_sec = distance_pixels / time_diff
-                    speeds.append(speed_pixels_per_sec)
-            
-            # Convert to real world units (approximate: 1 pixel ≈ 0.02m on basketball court)
-            pixels_to_meters = 0.02
-            distance_meters = total_distance_pixels * pixels_to_meters
-            
-            # Convert speed to km/h
-            avg_speed_pixels_per_sec = sum(speeds) / len(speeds) if speeds else 0
-            avg_speed_kmh = avg_speed_pixels_per_sec * pixels_to_meters * 3.6  # m/s to km/h
-            max_speed_kmh = max(speeds) * pixels_to_meters * 3.6 if speeds else 0
-            
-            enhanced_stats['player_metrics'][player_id] = {
-                'distance_covered_m': round(distance_meters, 2),
-                'avg_speed_kmh': round(avg_speed_kmh, 2),
-                'max_speed_kmh': round(max_speed_kmh, 2),
-                'ball_touches': ball_touches.get(player_id, 0),
-                'total_frames': len(positions),
-                'time_played_seconds': positions[-1][2] - positions[0][2] if positions else 0
-            }
+        if isinstance(frame_data, FrameStore):
+            columns = _frame_store_columns(frame_data)
+        else:
+            columns = _frame_summary_columns(frame_data)
+        
+        enhanced_stats['player_metrics'] = _player_metrics(**columns)
     
     except Exception as e:
         print(f"Error calculating enhanced stats: {e}")
@@ -175,6 +307,166 @@ def calculate_enhanced_stats(results: Dict[str, Any]) -> Dict[str, Any]:
     return enhanced_stats
 
 
+def _frame_summary_columns(frame_data: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Flatten frame summaries into per-observation arrays.
+    
+    Args:
+        frame_data: Frame summaries as written by the processor, with
+            ``tracked_players`` (``position``) and ``ball_position``; the
+            older ``center`` / ``ball_analysis`` keys are still read
+        
+    Returns:
+        Keyword arguments for ``_player_metrics``
+    """
+    player_ids = []        # track IDs in first-seen order
+    player_index = {}      # {track_id: index into player_ids}
+    codes, xs, ys, ts, ball_xs, ball_ys = [], [], [], [], [], []
+    
+    for frame in frame_data:
+        timestamp = frame.get('timestamp', 0)
+        ball_pos = _summary_ball_position(frame)
+        if ball_pos is None:
+            ball_pos = (np.nan, np.nan)
+        
+        for player in frame.get('tracked_players', []):
+            player_id = player.get('track_id')
+            if player_id is None:
+                continue
+            # Track IDs are strings whichever tracker or storage they came from
+            player_id = str(player_id)
+            if player_id not in player_index:
+                player_index[player_id] = len(player_ids)
+                player_ids.append(player_id)
+            
+            center = player.get('position', player.get('center', [0, 0]))
+            codes.append(player_index[player_id])
+            xs.append(center[0])
+            ys.append(center[1])
+            ts.append(timestamp)
+            ball_xs.append(ball_pos[0])
+            ball_ys.append(ball_pos[1])
+    
+    return {
+        'player_ids': player_ids,
+        'codes': np.asarray(codes, dtype=np.int64),
+        'positions': np.column_stack([np.asarray(xs, dtype=np.float64), np.asarray(ys, dtype=np.float64)]),
+        'timestamps': np.asarray(ts, dtype=np.float64),
+        'ball_positions': np.column_stack([np.asarray(ball_xs, dtype=np.float64),
+                                           np.asarray(ball_ys, dtype=np.float64)])
+    }
+
+
+def _summary_ball_position(frame: Dict[str, Any]) -> Optional[Any]:
+    """Ball position of a frame summary, or None when no ball was detected."""
+    if 'ball_position' in frame:
+        return frame['ball_position']
+    # Summaries written before ``ball_position`` existed
+    ball_analysis = frame.get('ball_analysis')
+    return ball_analysis.get('position') if ball_analysis else None
+
+
+def _frame_store_columns(store: FrameStore) -> Dict[str, Any]:
+    """
+    Per-observation arrays read straight from a frame store.
+    
+    The store keeps player centers in ``position`` and the detected ball in
+    ``ball_position`` (NaN when absent).
+    
+    Args:
+        store: Frame store
+        
+    Returns:
+        Keyword arguments for ``_player_metrics``
+    """
+    frame_rows = store.frame_rows()
+    track_ids = np.asarray(store.track_id)
+    
+    # Number players in order of first appearance, like the dict path
+    unique_ids, first_rows, inverse = np.unique(track_ids, return_index=True, return_inverse=True)
+    order = np.argsort(first_rows, kind='stable')
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    
+    return {
+        'player_ids': [str(int(track_id)) for track_id in unique_ids[order]],
+        'codes': rank[inverse.reshape(-1)],
+        'positions': np.asarray(store.position, dtype=np.float64).reshape(-1, 2),
+        'timestamps': np.asarray(store.timestamp, dtype=np.float64)[frame_rows],
+        'ball_positions': np.asarray(store.ball_position, dtype=np.float64).reshape(-1, 2)[frame_rows]
+    }
+
+
+def _player_metrics(player_ids: List[Any], codes: np.ndarray, positions: np.ndarray,
+                    timestamps: np.ndarray, ball_positions: np.ndarray) -> Dict[Any, Dict[str, Any]]:
+    """
+    Distance, speed and ball-touch metrics for every player.
+    
+    Args:
+        player_ids: Track ID of each player code, in first-seen order
+        codes: Player code of each observation (frame order)
+        positions: Player center of each observation, shape (N, 2)
+        timestamps: Frame timestamp of each observation
+        ball_positions: Ball position in the observation's frame, NaN when
+            no ball was detected, shape (N, 2)
+        
+    Returns:
+        Metrics keyed by track ID (as a string)
+    """
+    player_metrics = {}
+    if len(codes) == 0:
+        return player_metrics
+    
+    # Ball touches: ball within ~1 meter of the player (NaN compares False)
+    touching = ball_distances(positions, ball_positions) < BALL_TOUCH_RADIUS_PIXELS
+    ball_touches = np.bincount(codes[touching], minlength=len(player_ids))
+    
+    # Group observations by player, keeping frame order within each player
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    positions = positions[order]
+    timestamps = timestamps[order]
+    
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    ends = np.r_[starts[1:], len(codes)]
+    
+    # Consecutive-observation steps; each player only reads its own range,
+    # so steps that cross from one player to the next are never used
+    steps = np.diff(positions, axis=0)
+    step_distances = np.sqrt((steps ** 2).sum(axis=1))
+    step_times = np.diff(timestamps)
+    
+    for start, end in zip(starts, ends):
+        if end - start < 2:
+            continue
+        
+        player_id = player_ids[codes[start]]
+        distances = step_distances[start:end - 1]
+        time_diffs = step_times[start:end - 1]
+        moving = time_diffs > 0
+        speeds = distances[moving] / time_diffs[moving]
+        
+        # cumsum accumulates left to right like the running totals it replaces
+        total_distance_pixels = float(np.cumsum(distances)[-1])
+        distance_meters = total_distance_pixels * PIXELS_TO_METERS
+        
+        # Convert speed to km/h
+        avg_speed_pixels_per_sec = float(np.cumsum(speeds)[-1]) / len(speeds) if len(speeds) else 0
+        avg_speed_kmh = avg_speed_pixels_per_sec * PIXELS_TO_METERS * 3.6  # m/s to km/h
+        max_speed_kmh = float(speeds.max()) * PIXELS_TO_METERS * 3.6 if len(speeds) else 0
+        
+        player_metrics[player_id] = {
+            'distance_covered_m': round(distance_meters, 2),
+            'avg_speed_kmh': round(avg_speed_kmh, 2),
+            'max_speed_kmh': round(max_speed_kmh, 2),
+            'ball_touches': int(ball_touches[codes[start]]),
+            'total_frames': int(end - start),
+            'time_played_seconds': float(timestamps[end - 1] - timestamps[start])
+        }
+    
+    return player_metrics
+
+
 if __name__ == "__main__":
     # This can be run as a standalone worker
     from rq import Worker, Connection